@@ -15,7 +15,7 @@ comps_path = os.path.join(cur_path, "../../../")
 sys.path.append(comps_path)
 
 from comps import CustomLogger, GeneratedDoc, LLMParamsDoc, ServiceType, opea_microservices, register_microservice
-from comps.agent.src.integrations.agent import instantiate_agent
+from comps.agent.src.integrations.agent import get_tool_registry, instantiate_agent
 from comps.agent.src.integrations.global_var import assistants_global_kv, threads_global_kv
 from comps.agent.src.integrations.thread import instantiate_thread_memory, thread_completion_callback
 from comps.agent.src.integrations.utils import assemble_store_messages, get_args, get_latest_human_message_from_store
@@ -42,6 +42,9 @@ db_client = None
 logger.info("======== args ============")
 logger.info(f"args: {args}")
 
+# load the tools at startup, the requests reuse them
+tool_registry = get_tool_registry(args)
+
 
 class AgentCompletionRequest(ChatCompletionRequest):
     # rewrite, specify tools in this turn of conversation
@@ -349,5 +352,9 @@ def cancel_run(thread_id):
             return "submit cancel request"
 
 
+# connect to the MCP server when the service starts rather than on the first request
+opea_microservices["opea_service@comps-chat-agent"].add_startup_event(tool_registry.start())
+
+
 if __name__ == "__main__":
     opea_microservices["opea_service@comps-chat-agent"].start()
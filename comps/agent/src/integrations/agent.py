@@ -1,23 +1,40 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 from .storage.persistence_redis import RedisPersistence
-from .tools import get_mcp_tools, get_tools_descriptions
+from .tools import ToolRegistry
 from .utils import load_python_prompt
 
 agent = None
+# the registry and version of the tools the agent was built with
+agent_tools = (None, None)
+# tool registries by tools path and MCP server URL, built once and kept across requests
+tool_registries = {}
+
+
+def get_tool_registry(args) -> ToolRegistry:
+    key = (getattr(args, "tools", None), getattr(args, "mcp_sse_server_url", None))
+    registry = tool_registries.get(key)
+    if registry is None:
+        registry = tool_registries[key] = ToolRegistry(*key)
+    return registry
 
 
 async def instantiate_agent(args):
-    global agent
+    global agent, agent_tools
     strategy = args.strategy
     with_memory = args.with_memory
 
-    # initialize tools
-    base_tools = get_tools_descriptions(getattr(args, "tools", None))
-    mcp_tools = await get_mcp_tools(args.mcp_sse_server_url) if getattr(args, "mcp_sse_server_url", None) else []
-    all_tools = base_tools + mcp_tools
+    # the tools are loaded once, and the agent is rebuilt only when they change
+    registry = get_tool_registry(args)
+    # the service starts the background tasks of its own registry at startup, the other registries start on first use
+    await registry.start()
+    if agent is not None and agent_tools[0] is registry and agent_tools[1] != registry.version:
+        print(f">>>>>> tools changed, rebuilding the agent with {list(registry.tools)}")
+        agent = None
 
     if agent is None:
+        all_tools = registry.get_tools()
+        agent_tools = (registry, registry.version)
 
         if args.custom_prompt is not None:
             print(f">>>>>> custom_prompt enabled, {args.custom_prompt}")
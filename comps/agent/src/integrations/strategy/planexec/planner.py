@@ -1,6 +1,7 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 import operator
 from typing import Annotated, List, Sequence, Tuple, TypedDict
 
@@ -70,14 +71,14 @@ class PlanStepChecker:
         self.chain = plan_check_prompt | llm | output_parser
 
     @opea_telemetry
-    def __llm_invoke__(self, state):
-        scored_result = self.chain.invoke(state)
+    async def __llm_invoke__(self, state):
+        scored_result = await self.chain.ainvoke(state)
         return scored_result
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         # print("---CALL PlanStepChecker---")
-        scored_result = self.__llm_invoke__(state)
+        scored_result = await self.__llm_invoke__(state)
         score = scored_result.binary_score
         print(f"Task is {state['context']}, Score is {score}")
         if score.startswith("yes"):
@@ -99,12 +100,12 @@ class Planner:
         self.plan_checker = plan_checker
 
     @opea_telemetry
-    def __llm_invoke__(self, messages):
-        plan = self.llm.invoke(messages)
+    async def __llm_invoke__(self, messages):
+        plan = await self.llm.ainvoke(messages)
         return plan
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         print("---CALL Planner---")
         input = state["messages"][-1].content
         success = False
@@ -112,7 +113,7 @@ class Planner:
         while not success:
             while not success:
                 try:
-                    plan = self.__llm_invoke__({"messages": [("user", state["messages"][-1].content)]})
+                    plan = await self.__llm_invoke__({"messages": [("user", state["messages"][-1].content)]})
                     print("Generated plan: ", plan)
                     success = True
                 except OutputParserException as e:
@@ -120,10 +121,11 @@ class Planner:
                 except Exception as e:
                     raise e
 
-            steps = []
-            for step in plan.steps:
-                if self.plan_checker({"context": step, "question": input}):
-                    steps.append(step)
+            # the steps are checked independently of each other
+            scores = await asyncio.gather(
+                *(self.plan_checker({"context": step, "question": input}) for step in plan.steps)
+            )
+            steps = [step for step, score in zip(plan.steps, scores) if score]
 
             if len(steps) == 0:
                 success = False
@@ -144,7 +146,7 @@ class Executor:
         )
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         print("---CALL Executor---")
         plan = state["plan"]
         out_state = []
@@ -158,7 +160,7 @@ previous steps and output: {out_state}
             success = False
             print(task_formatted)
             while not success:
-                agent_response = self.agent_executor.invoke({"input": task_formatted})
+                agent_response = await self.agent_executor.ainvoke({"input": task_formatted})
                 output = agent_response["output"]
                 success = True
             print(f"Task is {step}, Response is {output}")
@@ -179,18 +181,18 @@ class AnswerMaker:
         self.llm = answer_make_prompt | llm | output_parser
 
     @opea_telemetry
-    def __llm_invoke__(self, state):
-        output = self.llm.invoke(state)
+    async def __llm_invoke__(self, state):
+        output = await self.llm.ainvoke(state)
         return output
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         print("---CALL AnswerMaker---")
         success = False
         # sometime, LLM will not provide accurate steps per ask, try more than one time until success
         while not success:
             try:
-                output = self.__llm_invoke__(state)
+                output = await self.__llm_invoke__(state)
                 print("Generated response: ", output.response)
                 success = True
             except OutputParserException as e:
@@ -221,14 +223,14 @@ class FinalAnswerChecker:
         self.chain = answer_check_prompt | llm | output_parser
 
     @opea_telemetry
-    def __llm_invoke__(self, state):
-        output = self.chain.invoke(state)
+    async def __llm_invoke__(self, state):
+        output = await self.chain.ainvoke(state)
         return output
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         print("---CALL FinalAnswerChecker---")
-        scored_result = self.__llm_invoke__(state)
+        scored_result = await self.__llm_invoke__(state)
         score = scored_result.binary_score
         print(f"Answer is {state['response']}, Grade of good response is {score}")
         if score.startswith("yes"):
@@ -246,18 +248,18 @@ class Replanner:
         self.answer_checker = answer_checker
 
     @opea_telemetry
-    def __llm_invoke__(self, state):
-        output = self.llm.invoke(state)
+    async def __llm_invoke__(self, state):
+        output = await self.llm.ainvoke(state)
         return output
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         print("---CALL Replanner---")
         success = False
         # sometime, LLM will not provide accurate steps per ask, try more than one time until success
         while not success:
             try:
-                output = self.__llm_invoke__(state)
+                output = await self.__llm_invoke__(state)
                 success = True
                 print("Replan: ", output)
             except OutputParserException as e:
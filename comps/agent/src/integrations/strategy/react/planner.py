@@ -163,13 +163,13 @@ from langgraph.prebuilt import ToolNode
 from ...storage.persistence_memory import AgentPersistence, PersistenceConfig
 from ...utils import setup_chat_model
 from .utils import (
+    aassemble_memory_from_store,
+    asave_state_to_store,
     assemble_history,
     assemble_memory,
-    assemble_memory_from_store,
     convert_aimessage_to_chat_completion,
     convert_json_to_tool_call,
     convert_think_to_chat_completion,
-    save_state_to_store,
 )
 
 
@@ -214,15 +214,15 @@ class ReActAgentNodeLlama:
         self.store = store
 
     @opea_telemetry
-    def __llm_invoke__(self, query, history, tools_descriptions, thread_history):
+    async def __llm_invoke__(self, query, history, tools_descriptions, thread_history):
         # invoke chain: raw output from llm
-        response = self.chain.invoke(
+        response = await self.chain.ainvoke(
             {"input": query, "history": history, "tools": tools_descriptions, "thread_history": thread_history}
         )
         return response
 
     @opea_telemetry
-    def __call__(self, state, config):
+    async def __call__(self, state, config):
 
         print("---CALL Agent LLM node---")
         messages = state["messages"]
@@ -234,7 +234,7 @@ class ReActAgentNodeLlama:
             elif self.memory_type == "store":
                 # use thread_id, assistant_id to search memory from store
                 print("@@@ Load memory from store....")
-                query, history, thread_history = assemble_memory_from_store(config, self.store)  # TODO
+                query, history, thread_history = await aassemble_memory_from_store(config, self.store)  # TODO
             else:
                 raise ValueError("Invalid memory type!")
         else:
@@ -253,7 +253,7 @@ class ReActAgentNodeLlama:
         print("@@@ Tools description: ", tools_descriptions)
 
         # invoke chain: raw output from llm
-        response = self.__llm_invoke__(query, history, tools_descriptions, thread_history)
+        response = await self.__llm_invoke__(query, history, tools_descriptions, thread_history)
 
         content = response.content
 
@@ -361,7 +361,7 @@ class ReActAgentLlama(BaseAgent):
                 if event_type == "updates":
                     for node_name, node_state in data.items():
                         if self.memory_type == "store":
-                            save_state_to_store(node_state, config, self.store)
+                            await asave_state_to_store(node_state, config, self.store)
                         print(f"--- CALL {node_name} node ---\n")
 
                         for k, v in node_state.items():
@@ -206,6 +206,18 @@ def save_state_to_store(state, config, store):
     store.put(memory_id, message_object.model_dump_json(), namespace)
 
 
+async def asave_state_to_store(state, config, store):
+    last_message = state["messages"][-1]
+
+    assistant_id = config["configurable"]["user_id"]
+    thread_id = config["configurable"]["thread_id"]
+    namespace = f"{assistant_id}_{thread_id}"
+
+    memory_id = str(uuid.uuid4())
+    message_object = convert_to_message_object(last_message)
+    await store.aput(memory_id, message_object.model_dump_json(), namespace)
+
+
 def convert_from_message_object(message_object):
     if message_object["role"] == "user":
         try:
@@ -258,6 +270,20 @@ def assemble_memory_from_store(config, store):
     return query, query_history, conversation_history
 
 
+async def aassemble_memory_from_store(config, store):
+    """
+    store: RedisPersistence
+    """
+    assistant_id = config["configurable"]["user_id"]
+    thread_id = config["configurable"]["thread_id"]
+    namespace = f"{assistant_id}_{thread_id}"
+
+    saved_all = await store.aget_all(namespace)
+    message_objects = sorted((json.loads(saved) for saved in saved_all.values()), key=lambda x: x["created_at"])
+    messages = [convert_from_message_object(message_object) for message_object in message_objects]
+    return assemble_memory(messages)
+
+
 def convert_aimessage_to_chat_completion(response: Union[dict, Any], stream=False, metadata=None):
     """
     convert langchain output back to openai chat completion format
@@ -1,6 +1,7 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 import json
 import os
 from typing import Annotated, Sequence, TypedDict
@@ -61,19 +62,22 @@ class AgentNodeLlama:
             print("Done embedding column descriptions")
 
     @opea_telemetry
-    def __llm_invoke__(self, prompt):
-        output = self.chain.invoke(prompt)
+    async def __llm_invoke__(self, prompt):
+        output = await self.chain.ainvoke(prompt)
         return output
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         print("----------Call Agent Node----------")
         question = state["messages"][0].content
-        table_schema, num_tables = get_table_schema(self.args.db_path)
+        # the database and the embedding model block, keep them off the event loop
+        table_schema, num_tables = await asyncio.to_thread(get_table_schema, self.args.db_path)
         print("@@@@ Table Schema: ", table_schema)
         if self.args.use_hints:
             if not state["hint"]:
-                hints = pick_hints(question, self.embed_model, self.column_embeddings, self.cols_descriptions)
+                hints = await asyncio.to_thread(
+                    pick_hints, question, self.embed_model, self.column_embeddings, self.cols_descriptions
+                )
             else:
                 hints = state["hint"]
             print("@@@ Hints: ", hints)
@@ -93,8 +97,8 @@ class AgentNodeLlama:
             history=history,
         )
 
-        output = self.__llm_invoke__(prompt)
-        output = self.output_parser.parse(
+        output = await self.__llm_invoke__(prompt)
+        output = await self.output_parser.parse(
             output.content, history, table_schema, hints, question, state["messages"]
         )  # text: str, history: str, db_schema: str, hint: str
         print("@@@@@ Agent output:\n", output)
@@ -201,18 +205,20 @@ class AgentNode:
             self.column_embeddings = self.embed_model.encode(self.values_descriptions)
 
     @opea_telemetry
-    def __llm_invoke__(self, chain, state):
-        response = chain.invoke(state)
+    async def __llm_invoke__(self, chain, state):
+        response = await chain.ainvoke(state)
         return response
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         print("----------Call Agent Node----------")
         question = state["messages"][0].content
-        table_schema, num_tables = get_table_schema(self.args.db_path)
+        table_schema, num_tables = await asyncio.to_thread(get_table_schema, self.args.db_path)
         if self.args.use_hints:
             if not state["hint"]:
-                hints = pick_hints(question, self.embed_model, self.column_embeddings, self.cols_descriptions)
+                hints = await asyncio.to_thread(
+                    pick_hints, question, self.embed_model, self.column_embeddings, self.cols_descriptions
+                )
             else:
                 hints = state["hint"]
         else:
@@ -226,7 +232,7 @@ class AgentNode:
         )
 
         chain = state_modifier_runnable | self.llm
-        response = self.__llm_invoke__(chain, state)
+        response = await self.__llm_invoke__(chain, state)
 
         return {"messages": [response], "hint": hints}
 
@@ -258,8 +264,8 @@ class QueryFixerNode:
         return query, result
 
     @opea_telemetry
-    def __llm_invoke__(self, table_schema, question, hint, query, result):
-        response = self.chain.invoke(
+    async def __llm_invoke__(self, table_schema, question, hint, query, result):
+        response = await self.chain.ainvoke(
             {
                 "DATABASE_SCHEMA": table_schema,
                 "QUESTION": question,
@@ -271,13 +277,13 @@ class QueryFixerNode:
         return response
 
     @opea_telemetry
-    def __call__(self, state):
+    async def __call__(self, state):
         print("----------Call Query Fixer Node----------")
-        table_schema, _ = get_table_schema(self.args.db_path)
+        table_schema, _ = await asyncio.to_thread(get_table_schema, self.args.db_path)
         question = state["messages"][0].content
         hint = state["hint"]
         query, result = self.get_sql_query_and_result(state)
-        response = self.__llm_invoke__(table_schema, question, hint, query, result)
+        response = await self.__llm_invoke__(table_schema, question, hint, query, result)
         # print("@@@@@ Query fixer output:\n", response.content)
         return {"messages": [response]}
 
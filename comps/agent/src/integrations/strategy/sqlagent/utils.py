@@ -10,13 +10,13 @@ from langchain_core.messages.tool import ToolCall
 from .prompt import ANSWER_PARSER_PROMPT, SQL_QUERY_FIXER_PROMPT, SQL_QUERY_FIXER_PROMPT_with_result
 
 
-def parse_answer_with_llm(text, history, chat_model):
+async def parse_answer_with_llm(text, history, chat_model):
     if "FINAL ANSWER:" in text.upper():
         if history == "":
             history = "The agent execution history is empty."
 
         prompt = ANSWER_PARSER_PROMPT.format(output=text, history=history)
-        response = chat_model.invoke(prompt).content
+        response = (await chat_model.ainvoke(prompt)).content
         print("@@@ Answer parser response: ", response)
 
         temp = response[:5]
@@ -93,7 +93,7 @@ def check_query_if_executed_and_result(query, messages):
     return None
 
 
-def parse_and_fix_sql_query_v2(text, chat_model, db_schema, hint, question, messages):
+async def parse_and_fix_sql_query_v2(text, chat_model, db_schema, hint, question, messages):
     chosen_query = get_the_last_sql_query(text)
     if chosen_query:
         # check if the query has been executed before
@@ -109,7 +109,7 @@ def parse_and_fix_sql_query_v2(text, chat_model, db_schema, hint, question, mess
                 DATABASE_SCHEMA=db_schema, HINT=hint, QUERY=chosen_query, QUESTION=question
             )
 
-        response = chat_model.invoke(prompt).content
+        response = (await chat_model.ainvoke(prompt)).content
         print("@@@ SQL query fixer response: ", response)
         if "query is correct" in response.lower():
             return chosen_query
@@ -125,15 +125,15 @@ class LlamaOutputParserAndQueryFixer:
     def __init__(self, chat_model):
         self.chat_model = chat_model
 
-    def parse(self, text: str, history: str, db_schema: str, hint: str, question: str, messages: list):
+    async def parse(self, text: str, history: str, db_schema: str, hint: str, question: str, messages: list):
         print("@@@ Raw output from llm:\n", text)
-        answer = parse_answer_with_llm(text, history, self.chat_model)
+        answer = await parse_answer_with_llm(text, history, self.chat_model)
         if answer:
             print("Final answer exists.")
             return answer
         else:
             tool_calls = get_tool_calls_other_than_sql(text)
-            sql_query = parse_and_fix_sql_query_v2(text, self.chat_model, db_schema, hint, question, messages)
+            sql_query = await parse_and_fix_sql_query_v2(text, self.chat_model, db_schema, hint, question, messages)
             if sql_query:
                 sql_tool_call = [{"tool": "sql_db_query", "args": {"query": sql_query}}]
                 tool_calls.extend(sql_tool_call)
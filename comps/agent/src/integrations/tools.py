@@ -1,36 +1,221 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 import glob
 import importlib
+import json
 import os
+import threading
+from contextlib import nullcontext
+from typing import Optional
 
+import aiohttp
 import yaml
 from langchain.tools import BaseTool, StructuredTool
 from langchain_community.agent_toolkits.load_tools import load_tools
+from langchain_core.tools import ToolException
 from pydantic import BaseModel, Field, create_model
 
+from comps.cores.common.cache import LRUCache
+
+# Seconds between background checks of the local tool files for changes, 0 to load them only once
+AGENT_TOOLS_RELOAD_INTERVAL = float(os.getenv("AGENT_TOOLS_RELOAD_INTERVAL", 10))
+# Seconds between refreshes of the tool list of the MCP server over the open session, 0 to list the tools only once
+AGENT_MCP_REFRESH_INTERVAL = float(os.getenv("AGENT_MCP_REFRESH_INTERVAL", 300))
+# Seconds the first request waits for the MCP server, the connection is retried in the background after that
+AGENT_MCP_CONNECT_TIMEOUT = float(os.getenv("AGENT_MCP_CONNECT_TIMEOUT", 30))
+# Maximum number of concurrent calls of one local tool, 0 for no limit; a tool can set its own `max_concurrency`
+AGENT_TOOL_MAX_CONCURRENCY = int(os.getenv("AGENT_TOOL_MAX_CONCURRENCY", 8))
+# Seconds a call of a local tool may take, 0 for no limit; a tool can set its own `timeout`
+AGENT_TOOL_TIMEOUT = float(os.getenv("AGENT_TOOL_TIMEOUT", 60))
+# Seconds the results of a local tool are cached by tool arguments, 0 to disable; a tool can set its own `cache_ttl`
+AGENT_TOOL_CACHE_TTL = float(os.getenv("AGENT_TOOL_CACHE_TTL", 0))
+# Maximum number of cached results per tool
+AGENT_TOOL_CACHE_SIZE = int(os.getenv("AGENT_TOOL_CACHE_SIZE", 1024))
+
+_http_session = None
+_http_session_loop = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Returns the HTTP session shared by the endpoint tools, one per event loop, to reuse its connections."""
+    global _http_session, _http_session_loop
+    loop = asyncio.get_running_loop()
+    if _http_session is None or _http_session.closed or _http_session_loop is not loop:
+        _http_session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300))
+        _http_session_loop = loop
+    return _http_session
+
 
 def generate_request_function(url):
-    def process_request(query):
-        import json
+    import requests
 
-        import requests
+    # reuses the connections to the endpoint across calls
+    session = requests.Session()
 
+    def process_request(query):
         content = json.dumps({"query": query})
         print(content)
         try:
-            resp = requests.post(url=url, data=content)
+            resp = session.post(url=url, data=content)
             ret = resp.text
             resp.raise_for_status()  # Raise an exception for unsuccessful HTTP status codes
         except requests.exceptions.RequestException as e:
-            ret = f"An error occurred:{e}"
+            # returned as the tool output, without caching it
+            raise ToolException(f"An error occurred:{e}")
         print(ret)
         return ret
 
     return process_request
 
 
+def generate_async_request_function(url):
+    async def aprocess_request(query):
+        content = json.dumps({"query": query})
+        print(content)
+        try:
+            async with get_http_session().post(url, data=content) as resp:
+                ret = await resp.text()
+                resp.raise_for_status()  # Raise an exception for unsuccessful HTTP status codes
+        except aiohttp.ClientError as e:
+            # returned as the tool output, without caching it
+            raise ToolException(f"An error occurred:{e}")
+        print(ret)
+        return ret
+
+    return aprocess_request
+
+
+def _normalize_args(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _normalize_args(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_args(v) for v in value]
+    return value
+
+
+class ToolPolicy:
+    """Bounds the concurrent calls of a tool, times them out and caches their results.
+
+    The agent graphs run the tool calls of one LLM turn concurrently, so the policy keeps a burst of calls from
+    overloading the service behind a tool and a hung call from stalling the turn. Results are cached by the
+    arguments of the call, with whitespace normalized, and only when the call succeeds.
+
+    Attributes:
+        max_concurrency (int): The maximum number of concurrent calls, 0 for no limit.
+        timeout (float): The seconds an async call may take, None for no limit.
+        cache (LRUCache): The results by arguments, None if caching is disabled.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = AGENT_TOOL_MAX_CONCURRENCY,
+        timeout: float = AGENT_TOOL_TIMEOUT,
+        cache_ttl: float = AGENT_TOOL_CACHE_TTL,
+        cache_size: int = AGENT_TOOL_CACHE_SIZE,
+    ):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout or None
+        self.cache = LRUCache(cache_size, ttl=cache_ttl) if cache_ttl > 0 else None
+        # the cache is shared by the sync calls, run on worker threads, and the async calls
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else nullcontext()
+        self._async_semaphore = None
+
+    @classmethod
+    def from_setting(cls, tool_setting: dict) -> "ToolPolicy":
+        """Creates the policy of a tool from its yaml setting, with the env defaults for the keys it does not set."""
+        return cls(
+            max_concurrency=int(tool_setting.get("max_concurrency", AGENT_TOOL_MAX_CONCURRENCY)),
+            timeout=float(tool_setting.get("timeout", AGENT_TOOL_TIMEOUT)),
+            cache_ttl=float(tool_setting.get("cache_ttl", AGENT_TOOL_CACHE_TTL)),
+        )
+
+    def _cache_key(self, kwargs: dict):
+        if self.cache is None:
+            return None
+        return json.dumps(_normalize_args(kwargs), sort_keys=True, default=str)
+
+    def _cached(self, key):
+        if key is None:
+            return False, None
+        with self._lock:
+            if key in self.cache:
+                return True, self.cache.get(key)
+        return False, None
+
+    def _store(self, key, result):
+        if key is not None:
+            with self._lock:
+                self.cache.set(key, result)
+
+    def run(self, func, kwargs: dict):
+        key = self._cache_key(kwargs)
+        hit, result = self._cached(key)
+        if hit:
+            return result
+        with self._semaphore:
+            result = func(**kwargs)
+        self._store(key, result)
+        return result
+
+    async def arun(self, coroutine, kwargs: dict):
+        key = self._cache_key(kwargs)
+        hit, result = self._cached(key)
+        if hit:
+            return result
+        if self._async_semaphore is None:
+            self._async_semaphore = (
+                asyncio.Semaphore(self.max_concurrency) if self.max_concurrency > 0 else nullcontext()
+            )
+        async with self._async_semaphore:
+            try:
+                result = await asyncio.wait_for(coroutine(**kwargs), self.timeout)
+            except asyncio.TimeoutError:
+                # returned as the tool output, so that the agent can go on without it
+                raise ToolException(f"The tool call timed out after {self.timeout}s")
+        self._store(key, result)
+        return result
+
+
+def apply_tool_policy(tool: BaseTool, policy: ToolPolicy, coroutine=None) -> BaseTool:
+    """Returns a copy of a tool calling it under `policy`.
+
+    Args:
+        coroutine: The async implementation of the tool, by default its own, or its function run on a thread.
+
+    Only the structured tools returning their content are wrapped, other tools are returned as they are.
+    """
+    if not isinstance(tool, StructuredTool) or tool.response_format != "content" or tool.func is None:
+        return tool
+    func = tool.func
+    if coroutine is None:
+        coroutine = tool.coroutine
+    if coroutine is None:
+
+        async def coroutine(**kwargs):
+            return await asyncio.to_thread(func, **kwargs)
+
+    def call(**kwargs):
+        return policy.run(func, kwargs)
+
+    async def acall(**kwargs):
+        return await policy.arun(coroutine, kwargs)
+
+    return StructuredTool(
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+        func=call,
+        coroutine=acall,
+        return_direct=tool.return_direct,
+        handle_tool_error=True if tool.handle_tool_error is False else tool.handle_tool_error,
+    )
+
+
 def load_func_str(tools_dir, func_str, env=None, pip_dependencies=None):
     if env is not None:
         env_list = [i.split("=") for i in env.split(",")]
@@ -86,12 +271,17 @@ def load_langchain_tool(tools_dir, tool_setting_tuple):
     env = tool_setting["env"] if "env" in tool_setting else None
     pip_dependencies = tool_setting["pip_dependencies"] if "pip_dependencies" in tool_setting else None
     func_definition = load_func_str(tools_dir, tool_setting["callable_api"], env, pip_dependencies)
+    policy = ToolPolicy.from_setting(tool_setting)
+    # endpoint tools are called with the shared async HTTP session rather than on a thread
+    coroutine = None
+    if tool_setting["callable_api"].startswith(("http://", "https://")):
+        coroutine = generate_async_request_function(tool_setting["callable_api"])
     if "args_schema" not in tool_setting or "description" not in tool_setting:
         if isinstance(func_definition, BaseTool):
-            return func_definition
+            return apply_tool_policy(func_definition, policy)
         else:
             # for the tool function with no arguments
-            return StructuredTool(
+            tool = StructuredTool(
                 name=tool_name,
                 description=tool_setting["description"],
                 func=func_definition,
@@ -99,12 +289,13 @@ def load_langchain_tool(tools_dir, tool_setting_tuple):
             )
     else:
         func_inputs = load_func_args(tool_name, tool_setting["args_schema"])
-        return StructuredTool(
+        tool = StructuredTool(
             name=tool_name,
             description=tool_setting["description"],
             func=func_definition,
             args_schema=func_inputs,
         )
+    return apply_tool_policy(tool, policy, coroutine)
 
 
 def load_yaml_tools(file_dir_path: str):
@@ -124,26 +315,26 @@ def load_python_tools(file_dir_path: str):
     module = importlib.util.module_from_spec(spec)
     # sys.modules["custom_tools"] = module
     spec.loader.exec_module(module)
-    return module.tools_descriptions()
+    return [apply_tool_policy(tool, ToolPolicy()) for tool in module.tools_descriptions()]
+
+
+def get_tool_files(file_dir_path: str):
+    if not file_dir_path:
+        return []
+    if os.path.isdir(file_dir_path):
+        file_path_list = glob.glob(file_dir_path + "/*")
+    else:
+        file_path_list = [file_dir_path]
+    return [file for file in file_path_list if os.path.basename(file).endswith((".yaml", ".yml", ".py"))]
 
 
 def get_tools_descriptions(file_dir_path: str):
     tools = []
-    if file_dir_path:
-        file_path_list = []
-        if os.path.isdir(file_dir_path):
-            file_path_list += glob.glob(file_dir_path + "/*")
+    for file in get_tool_files(file_dir_path):
+        if os.path.basename(file).endswith((".yaml", ".yml")):
+            tools += load_yaml_tools(file)
         else:
-            file_path_list.append(file_dir_path)
-        for file in file_path_list:
-            if os.path.basename(file).endswith(".yaml"):
-                tools += load_yaml_tools(file)
-            elif os.path.basename(file).endswith(".yml"):
-                tools += load_yaml_tools(file)
-            elif os.path.basename(file).endswith(".py"):
-                tools += load_python_tools(file)
-            else:
-                pass
+            tools += load_python_tools(file)
     return tools
 
 
@@ -163,3 +354,156 @@ async def get_mcp_tools(mcp_sse_server_url):
 
     mcp_tools = await client.get_tools()
     return mcp_tools
+
+
+class ToolRegistry:
+    """Keeps the tools of an agent loaded across requests.
+
+    The local tools are loaded once, and loaded again by a background task when the modification time of a tool file
+    of their directory changes, checked every `reload_interval` seconds. The MCP tools are listed over one long-lived
+    session, owned by a background task that refreshes the tool list every `mcp_refresh_interval` seconds and
+    reconnects with backoff when the session fails. The background tasks are started by `start`. Every change of the
+    tools increments `version`, so that the agent built on the previous tools can be rebuilt.
+
+    Attributes:
+        tools (dict): The tools by name.
+        version (int): The number of changes of the tools.
+    """
+
+    def __init__(
+        self,
+        tools_path: str = None,
+        mcp_sse_server_url: str = None,
+        reload_interval: float = AGENT_TOOLS_RELOAD_INTERVAL,
+        mcp_refresh_interval: float = AGENT_MCP_REFRESH_INTERVAL,
+    ):
+        self.tools_path = tools_path
+        self.mcp_sse_server_url = mcp_sse_server_url
+        self.reload_interval = reload_interval
+        self.mcp_refresh_interval = mcp_refresh_interval
+        self.local_tools = []
+        self.mcp_tools = []
+        self.tools = {}
+        self.version = 0
+        self._files_signature = None
+        self._watch_task = None
+        self._mcp_task = None
+        self._mcp_ready = None
+        self._started = False
+        self._start_lock = None
+        self.local_tools = self.load_changed_local_tools()
+        self._update()
+
+    def get_tools(self) -> list:
+        return list(self.tools.values())
+
+    def load_changed_local_tools(self) -> Optional[list]:
+        """Loads the local tools again if their files changed since they were loaded.
+
+        It stats the tool files and imports the changed ones, run it outside of the event loop.
+
+        Returns:
+            list: The local tools, None if their files did not change.
+        """
+        # the callables of a yaml file are python files of its directory
+        watched = self.tools_path
+        if watched and not os.path.isdir(watched):
+            watched = os.path.dirname(watched) or "."
+        signature = []
+        for file in get_tool_files(watched):
+            try:
+                signature.append((file, os.stat(file).st_mtime_ns))
+            except OSError:
+                pass
+        signature = tuple(signature)
+        if signature == self._files_signature:
+            return None
+
+        try:
+            tools = get_tools_descriptions(self.tools_path)
+        except Exception as e:
+            if self._files_signature is None:
+                raise
+            # keep the current tools until the files change again
+            print(f"Failed to reload the tools from {self.tools_path}, keeping the current tools: {e}")
+            self._files_signature = signature
+            return None
+        print(f"Loaded {len(tools)} tools from {self.tools_path}")
+        self._files_signature = signature
+        return tools
+
+    async def start(self):
+        """Starts watching the local tools, opens the MCP session and waits for its first tool list, once."""
+        if self._started:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._started:
+                return
+            if self.reload_interval > 0:
+                self._watch_task = asyncio.create_task(self._watch_local_tools())
+            if self.mcp_sse_server_url:
+                self._mcp_ready = asyncio.Event()
+                self._mcp_task = asyncio.create_task(self._run_mcp_session())
+                try:
+                    await asyncio.wait_for(self._mcp_ready.wait(), AGENT_MCP_CONNECT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    print(f"MCP server {self.mcp_sse_server_url} is not ready, its tools will be added once connected")
+            self._started = True
+
+    async def _watch_local_tools(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                tools = await asyncio.to_thread(self.load_changed_local_tools)
+            except Exception as e:
+                print(f"Failed to check the tools of {self.tools_path}: {e}")
+                continue
+            if tools is not None:
+                self.local_tools = tools
+                self._update()
+
+    async def _run_mcp_session(self):
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+        from langchain_mcp_adapters.tools import load_mcp_tools
+
+        client = MultiServerMCPClient(
+            {
+                "math": {
+                    "url": self.mcp_sse_server_url,
+                    "transport": "sse",
+                }
+            }
+        )
+        backoff = 1
+        while True:
+            try:
+                async with client.session("math") as session:
+                    # the tools of a new session replace those bound to the previous one
+                    self._set_mcp_tools(await load_mcp_tools(session), force=True)
+                    self._mcp_ready.set()
+                    backoff = 1
+                    while self.mcp_refresh_interval > 0:
+                        await asyncio.sleep(self.mcp_refresh_interval)
+                        self._set_mcp_tools(await load_mcp_tools(session))
+                    await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"MCP session with {self.mcp_sse_server_url} failed, reconnecting in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    def _set_mcp_tools(self, tools: list, force: bool = False):
+        def signature(tools):
+            return [(tool.name, tool.description, str(tool.args)) for tool in tools]
+
+        if force or signature(tools) != signature(self.mcp_tools):
+            print(f"Loaded {len(tools)} tools from MCP server {self.mcp_sse_server_url}")
+            self.mcp_tools = tools
+            self._update()
+
+    def _update(self):
+        self.tools = {tool.name: tool for tool in self.local_tools + self.mcp_tools}
+        self.version += 1
@@ -4,10 +4,17 @@
 import argparse
 import importlib
 import json
+import os
+import threading
 
 from .config import env_config
 
 LLM_ENDPOINT_URL_DEFAULT = "http://localhost:8080"
+# Maximum number of concurrent requests to one LLM endpoint, shared by all the agents and nodes of the process
+AGENT_LLM_MAX_CONCURRENCY = int(os.getenv("AGENT_LLM_MAX_CONCURRENCY", 32))
+
+_llm_http_clients = {}
+_llm_http_clients_lock = threading.Lock()
 
 
 def format_date(date):
@@ -49,6 +56,28 @@ def setup_hf_tgi_client(args):
     return llm
 
 
+def get_llm_http_clients(endpoint, timeout=None):
+    """Returns the sync and async HTTP clients of an LLM endpoint, created once per endpoint.
+
+    The chat models of every agent and graph node calling the same endpoint share these clients, so their
+    connection pools bound the number of requests in flight to the endpoint to AGENT_LLM_MAX_CONCURRENCY, and
+    further requests wait for a free connection instead of failing.
+    """
+    import httpx
+
+    with _llm_http_clients_lock:
+        clients = _llm_http_clients.get(endpoint)
+        if clients is None:
+            limits = httpx.Limits(
+                max_connections=AGENT_LLM_MAX_CONCURRENCY, max_keepalive_connections=AGENT_LLM_MAX_CONCURRENCY
+            )
+            # no pool timeout: a request waits for its turn, the request timeout applies once it is sent
+            timeout = httpx.Timeout(timeout, pool=None)
+            clients = (httpx.Client(limits=limits, timeout=timeout), httpx.AsyncClient(limits=limits, timeout=timeout))
+            _llm_http_clients[endpoint] = clients
+        return clients
+
+
 def setup_chat_model(args):
     from langchain_openai import ChatOpenAI
 
@@ -66,11 +95,15 @@ def setup_chat_model(args):
         raise ValueError("llm_engine must be vllm, tgi, or openai")
 
     openai_endpoint = None if args.llm_endpoint_url is LLM_ENDPOINT_URL_DEFAULT else args.llm_endpoint_url + "/v1"
+    http_client, http_async_client = get_llm_http_clients(openai_endpoint, args.timeout)
     llm = ChatOpenAI(
         openai_api_key=openai_key,
         openai_api_base=openai_endpoint,
         model_name=args.model,
-        request_timeout=args.timeout,
+        # the timeout of the clients, sent with every request, waits for a free connection without limit
+        request_timeout=http_async_client.timeout,
+        http_client=http_client,
+        http_async_client=http_async_client,
         **params,
     )
     return llm
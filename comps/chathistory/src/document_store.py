@@ -3,13 +3,17 @@
 
 
 import bson.errors as BsonError
+import pymongo
 from bson.objectid import ObjectId
 
 from comps.chathistory.src.integrations.mongo.config import COLLECTION_NAME
 from comps.chathistory.src.integrations.mongo.mongo_conn import MongoClient
+from comps.cores.common.bulk import insert_many_unordered
 
 
 class DocumentStore:
+    # Collections whose indexes were created by this process
+    indexed_collections: set = set()
 
     def __init__(
         self,
@@ -21,6 +25,17 @@ class DocumentStore:
         self.db_client = MongoClient.get_db_client()
         self.collection = self.db_client[COLLECTION_NAME]
 
+    async def ensure_indexes(self) -> None:
+        """Creates the index of the conversations of a user, newest first, once per collection.
+
+        Every query filters on `data.user`, and the listing pages through the conversations by descending `_id`,
+        so both are served by the compound index without scanning the collection or sorting in memory.
+        """
+        if COLLECTION_NAME in DocumentStore.indexed_collections:
+            return
+        await self.collection.create_index([("data.user", pymongo.ASCENDING), ("_id", pymongo.DESCENDING)])
+        DocumentStore.indexed_collections.add(COLLECTION_NAME)
+
     async def save_document(self, document):
         """Stores a new document into the storage.
 
@@ -44,6 +59,20 @@ class DocumentStore:
             print(e)
             raise Exception(e)
 
+    async def save_documents(self, documents) -> list:
+        """Stores new documents into the storage with one unordered insert.
+
+        A document that fails to insert does not stop the insertion of the others.
+
+        Args:
+            documents: The documents to be stored.
+
+        Returns:
+            list: For each document, in order, its ID or the exception that prevented storing it.
+        """
+        data = [document.model_dump(by_alias=True, mode="json", exclude={"id"}) for document in documents]
+        return await insert_many_unordered(self.collection, data)
+
     async def update_document(self, document_id, updated_data, first_query) -> str:
         """Updates a document in the collection with the given document_id.
 
@@ -77,6 +106,40 @@ class DocumentStore:
             print(e)
             raise Exception(e)
 
+    async def append_messages(self, document_id, messages: list[dict]) -> str:
+        """Appends messages to the end of a conversation.
+
+        Only the new messages are sent to the database, the stored conversation is not rewritten.
+
+        Args:
+            document_id (str): The ID of the conversation.
+            messages (list[dict]): The messages of the new turn, e.g. the user query and the assistant answer.
+
+        Returns:
+            str: A message confirming the update.
+
+        Raises:
+            KeyError: If an invalid document_id is provided.
+            Exception: If the conversation does not exist or its messages are not a list.
+        """
+        try:
+            _id = ObjectId(document_id)
+            update_result = await self.collection.update_one(
+                {"_id": _id, "data.user": self.user, "data.messages": {"$type": "array"}},
+                {"$push": {"data.messages": {"$each": messages}}},
+            )
+            if update_result.matched_count == 1:
+                return "Updated document : {}".format(document_id)
+            else:
+                raise Exception("Not able to append to the Document")
+
+        except BsonError.InvalidId as e:
+            print(e)
+            raise KeyError(e)
+        except Exception as e:
+            print(e)
+            raise Exception(e)
+
     async def get_all_documents_of_user(self) -> list[dict]:
         """Retrieves all documents of a specific user from the collection.
 
@@ -87,7 +150,8 @@ class DocumentStore:
         """
         conversation_list: list = []
         try:
-            cursor = self.collection.find({"data.user": self.user}, {"data": 0})
+            await self.ensure_indexes()
+            cursor = self.collection.find({"data.user": self.user}, {"first_query": 1})
 
             async for document in cursor:
                 document["id"] = str(document["_id"])
@@ -99,6 +163,45 @@ class DocumentStore:
             print(e)
             raise Exception(e)
 
+    async def get_documents_of_user_page(self, limit: int, cursor: str | None = None) -> dict:
+        """Retrieves a page of the conversations of the user, newest first.
+
+        Args:
+            limit (int): The maximum number of conversations of the page.
+            cursor (str, optional): The `next_cursor` of the previous page. Defaults to the first page.
+
+        Returns:
+            dict: The conversations of the page, with their id and first query, and the `next_cursor` of the
+                following page, None on the last page.
+
+        Raises:
+            KeyError: If an invalid cursor is provided.
+            Exception: If there is an error while retrieving the documents.
+        """
+        try:
+            await self.ensure_indexes()
+            query = {"data.user": self.user}
+            if cursor is not None:
+                query["_id"] = {"$lt": ObjectId(cursor)}
+            # one more conversation than the page tells whether there is a next page
+            documents = (
+                await self.collection.find(query, {"first_query": 1})
+                .sort("_id", pymongo.DESCENDING)
+                .limit(limit + 1)
+                .to_list(length=limit + 1)
+            )
+
+            conversation_list = [{"id": str(document.pop("_id")), **document} for document in documents[:limit]]
+            next_cursor = conversation_list[-1]["id"] if len(documents) > limit else None
+            return {"conversations": conversation_list, "next_cursor": next_cursor}
+
+        except BsonError.InvalidId as e:
+            print(e)
+            raise KeyError(e)
+        except Exception as e:
+            print(e)
+            raise Exception(e)
+
     async def get_user_documents_by_id(self, document_id) -> dict | None:
         """Retrieves a user document from the collection based on the given document ID.
 
@@ -124,6 +227,36 @@ class DocumentStore:
             print(e)
             raise Exception(e)
 
+    async def get_last_messages(self, document_id, last_n: int) -> dict | None:
+        """Retrieves a user document with only the last messages of the conversation.
+
+        The messages are sliced by the database, so that the size of the response does not grow with the
+        conversation when assembling a prompt.
+
+        Args:
+            document_id (str): The ID of the document to retrieve.
+            last_n (int): The number of messages to retrieve.
+
+        Returns:
+            dict | None: The user document with its last `last_n` messages if found, None otherwise.
+        """
+        try:
+            _id = ObjectId(document_id)
+            response: dict | None = await self.collection.find_one(
+                {"_id": _id, "data.user": self.user}, {"_id": 0, "first_query": 0, "data.messages": {"$slice": -last_n}}
+            )
+            if response:
+                return response["data"]
+            return None
+
+        except BsonError.InvalidId as e:
+            print(e)
+            raise KeyError(e)
+
+        except Exception as e:
+            print(e)
+            raise Exception(e)
+
     async def delete_document(self, document_id) -> str:
         """Deletes a document from the collection based on the provided document ID.
 
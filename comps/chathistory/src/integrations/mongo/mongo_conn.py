@@ -10,12 +10,15 @@ from comps.chathistory.src.integrations.mongo.config import DB_NAME, MONGO_HOST,
 
 class MongoClient:
     conn_url = f"mongodb://{MONGO_HOST}:{MONGO_PORT}/"
+    # The client holds a connection pool, it is shared by all the requests
+    client = None
 
     @staticmethod
     def get_db_client() -> Any:
         try:
-            client = motor.AsyncIOMotorClient(MongoClient.conn_url)
-            db = client[DB_NAME]
+            if MongoClient.client is None:
+                MongoClient.client = motor.AsyncIOMotorClient(MongoClient.conn_url)
+            db = MongoClient.client[DB_NAME]
             return db
 
         except Exception as e:
@@ -1,13 +1,14 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 import os
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import HTTPException
-from pydantic import BaseModel
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, Field
 
 from comps import CustomLogger
 from comps.chathistory.src.document_store import DocumentStore
+from comps.cores.common.bulk import BulkIngestor, aiter_ndjson
 from comps.cores.mega.micro_service import opea_microservices, register_microservice
 from comps.cores.proto.api_protocol import ChatCompletionRequest
 
@@ -24,6 +25,17 @@ class ChatMessage(BaseModel):
 class ChatId(BaseModel):
     user: str
     id: Optional[str] = None
+    # Return only the last `last_n` messages of the conversation given by id
+    last_n: Optional[int] = Field(default=None, gt=0)
+    # Page through the conversations of the user instead of listing them all
+    limit: Optional[int] = Field(default=None, gt=0, le=1000)
+    cursor: Optional[str] = None
+
+
+class ChatAppend(BaseModel):
+    user: str
+    id: str
+    messages: List[Dict[str, Any]]
 
 
 def get_first_string(value):
@@ -77,6 +89,42 @@ async def create_documents(document: ChatMessage):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def parse_bulk_document(record: dict) -> ChatMessage:
+    document = ChatMessage.model_validate(record)
+    if document.data.user is None:
+        raise ValueError("Please provide the user information")
+    if document.id is not None:
+        raise ValueError("Bulk create does not update documents, remove the id")
+    if document.first_query is None:
+        document.first_query = get_first_string(document.data.messages)
+    return document
+
+
+@register_microservice(
+    name="opea_service@chathistory_mongo",
+    endpoint="/v1/chathistory/create/bulk",
+    host="0.0.0.0",
+    input_datatype=ChatMessage,
+    port=6012,
+)
+async def create_documents_bulk(request: Request):
+    """Creates documents from an NDJSON stream of ChatMessage objects, with one line per document.
+
+    Args:
+        request (Request): The request whose body is the NDJSON stream.
+
+    Returns:
+        JSON: The number of succeeded and failed lines, and the errors of the failed lines in order: their index
+            and error.
+    """
+    store = DocumentStore(None)
+    store.initialize_storage()
+    ingestor = BulkIngestor(store.save_documents, parse_bulk_document)
+    response = await ingestor.ingest(aiter_ndjson(request.stream()))
+    logger.info(f"Bulk create: {ingestor.get_statistics()}")
+    return response
+
+
 @register_microservice(
     name="opea_service@chathistory_mongo",
     endpoint="/v1/chathistory/get",
@@ -98,8 +146,12 @@ async def get_documents(document: ChatId):
     try:
         store = DocumentStore(document.user)
         store.initialize_storage()
-        if document.id is None:
+        if document.id is None and document.limit is not None:
+            res = await store.get_documents_of_user_page(document.limit, document.cursor)
+        elif document.id is None:
             res = await store.get_all_documents_of_user()
+        elif document.last_n is not None:
+            res = await store.get_last_messages(document.id, document.last_n)
         else:
             res = await store.get_user_documents_by_id(document.id)
         if logflag:
@@ -111,6 +163,37 @@ async def get_documents(document: ChatId):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@register_microservice(
+    name="opea_service@chathistory_mongo",
+    endpoint="/v1/chathistory/append",
+    host="0.0.0.0",
+    input_datatype=ChatAppend,
+    port=6012,
+)
+async def append_messages(document: ChatAppend):
+    """Appends the messages of a new turn to a stored conversation.
+
+    Args:
+        document (ChatAppend): The ChatAppend object containing the user, the conversation id and the new messages.
+
+    Returns:
+        The result of the operation if successful, None otherwise.
+    """
+    if logflag:
+        logger.info(document)
+    try:
+        store = DocumentStore(document.user)
+        store.initialize_storage()
+        res = await store.append_messages(document.id, document.messages)
+        if logflag:
+            logger.info(res)
+        return res
+    except Exception as e:
+        # Handle the exception here
+        logger.info(f"An error occurred: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @register_microservice(
     name="opea_service@chathistory_mongo",
     endpoint="/v1/chathistory/delete",
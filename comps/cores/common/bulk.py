@@ -0,0 +1,159 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+from ..mega.logger import CustomLogger
+
+logger = CustomLogger("bulk_ingest")
+
+# Number of records saved by one batch call of the store
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 500))
+# Number of batches saved concurrently by one bulk request
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", 4))
+
+
+async def aiter_ndjson(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Yields the non-empty lines of an NDJSON stream, e.g. the body of a request from `Request.stream()`."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line.decode("utf-8")
+    if buffer.strip():
+        yield buffer.decode("utf-8")
+
+
+async def insert_many_unordered(collection, documents: List[dict]) -> list:
+    """Inserts documents into a MongoDB collection with one unordered insert_many, the `save_batch` of a BulkIngestor.
+
+    A document that fails to insert, e.g. on a duplicate key, does not stop the insertion of the others.
+
+    Args:
+        collection: The motor collection to insert into.
+        documents (List[dict]): The documents to insert.
+
+    Returns:
+        list: For each document, in order, its ID or the exception that prevented inserting it.
+    """
+    if not documents:
+        return []
+    errors = {}
+    try:
+        await collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = {error["index"]: Exception(error.get("errmsg")) for error in e.details.get("writeErrors", [])}
+    # insert_many sets the _id of the inserted documents
+    return [errors.get(i) or str(document["_id"]) for i, document in enumerate(documents)]
+
+
+class BulkIngestor:
+    """Saves a stream of records in batches, with a bounded number of batches in flight.
+
+    Each record is parsed on its own, so that an invalid record fails alone, and the valid ones are saved by
+    `save_batch`, which returns one result per record: the id of the saved record or the exception that prevented
+    saving it, as the batch methods of the stores do. The stream is read no faster than the batches are saved, so
+    that a request of millions of records does not hold them all in memory.
+
+    Attributes:
+        save_batch (Callable): Saves a list of parsed records, returns one id or exception per record.
+        parse (Callable): Turns a decoded JSON record into what `save_batch` saves, raises if it is invalid.
+        batch_size (int): The maximum number of records per `save_batch` call.
+        concurrency (int): The maximum number of concurrent `save_batch` calls.
+    """
+
+    def __init__(
+        self,
+        save_batch: Callable[[list], Awaitable[list]],
+        parse: Optional[Callable[[Any], Any]] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+        concurrency: int = BULK_CONCURRENCY,
+    ):
+        if batch_size <= 0 or concurrency <= 0:
+            raise ValueError("batch_size and concurrency must be positive")
+        self.save_batch = save_batch
+        self.parse = parse if parse is not None else (lambda record: record)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.succeeded = 0
+        self.failed = 0
+
+    async def run(self, lines: AsyncIterable[str]) -> AsyncIterator[dict]:
+        """Saves the records of JSON lines.
+
+        Yields:
+            dict: The result of each record as it completes, not in order: its `index` in the stream, its
+                `status`, "ok" or "error", and its `id` or `error`.
+        """
+        pending = set()
+        batch: List[Tuple[int, Any]] = []
+        index = 0
+        try:
+            async for line in lines:
+                try:
+                    batch.append((index, self.parse(json.loads(line))))
+                except Exception as e:
+                    yield self._result(index, e)
+                index += 1
+                if len(batch) < self.batch_size:
+                    continue
+                if len(pending) >= self.concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        for result in task.result():
+                            yield result
+                pending.add(asyncio.create_task(self._save(batch)))
+                batch = []
+            if batch:
+                pending.add(asyncio.create_task(self._save(batch)))
+            for task in asyncio.as_completed(pending):
+                for result in await task:
+                    yield result
+            pending = set()
+        finally:
+            # the client went away, stop saving its records
+            for task in pending:
+                task.cancel()
+
+    async def ingest(self, lines: AsyncIterable[str]) -> dict:
+        """Saves the records of JSON lines and collects the failed ones.
+
+        Only the results of the failed records are kept, so that the memory held by a request grows with its
+        failures rather than with its records.
+
+        Returns:
+            dict: The number of `succeeded` and `failed` records, and the `errors` of the failed records in stream
+                order.
+        """
+        errors = [result async for result in self.run(lines) if result["status"] == "error"]
+        errors.sort(key=lambda result: result["index"])
+        return {"succeeded": self.succeeded, "failed": self.failed, "errors": errors}
+
+    def get_statistics(self) -> dict:
+        """Returns the number of saved and failed records, in the format of /v1/statistics."""
+        return {"succeeded": self.succeeded, "failed": self.failed}
+
+    async def _save(self, batch: List[Tuple[int, Any]]) -> List[dict]:
+        indices = [index for index, _ in batch]
+        try:
+            outputs = await self.save_batch([record for _, record in batch])
+            if len(outputs) != len(batch):
+                raise ValueError(f"The store returned {len(outputs)} results for {len(batch)} records")
+        except Exception as e:
+            logger.error(f"Failed to save a batch of {len(batch)} records: {e}")
+            outputs = [e] * len(batch)
+        return [self._result(index, output) for index, output in zip(indices, outputs)]
+
+    def _result(self, index: int, output) -> dict:
+        if isinstance(output, Exception):
+            self.failed += 1
+            return {"index": index, "status": "error", "error": str(output)}
+        self.succeeded += 1
+        return {"index": index, "status": "ok", "id": output}
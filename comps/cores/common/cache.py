@@ -0,0 +1,87 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """In-process LRU cache with an optional time-to-live, counting its hits and misses.
+
+    The cache is not thread-safe, it is meant to be used from the event loop of one service.
+
+    Attributes:
+        max_size (int): The maximum number of entries, the least recently used entry is evicted beyond it.
+        ttl (float): The default number of seconds an entry stays valid, None to keep entries until evicted.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """Initializes an empty cache.
+
+        Args:
+            max_size (int): The maximum number of entries.
+            ttl (float, optional): The default time-to-live of the entries in seconds. Defaults to no expiry.
+        """
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (expiry time or None, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value cached for `key` and marks it as recently used, or `default` on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Caches `value` for `key`, for `ttl` seconds if given, else for the default time-to-live."""
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Removes `key` from the cache and returns its value, or `default` if it is not cached."""
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Returns the unexpired entries from the least to the most recently used, without counting lookups."""
+        now = time.monotonic()
+        return [
+            (key, value) for key, (expires_at, value) in self._entries.items() if expires_at is None or expires_at > now
+        ]
+
+    def clear(self):
+        """Removes all entries, the hit and miss counters are kept."""
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and (entry[0] is None or entry[0] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_statistics(self) -> dict:
+        """Returns the size and hit/miss counters of the cache, in the format of /v1/statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+        }
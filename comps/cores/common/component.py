@@ -1,6 +1,7 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 from abc import ABC, abstractmethod
 
 from ..mega.logger import CustomLogger
@@ -77,6 +78,20 @@ class OpeaComponent(ABC):
         """
         raise NotImplementedError("The 'invoke' method must be implemented by subclasses.")
 
+    async def invoke_batch(self, inputs: list) -> list:
+        """Invoke the service for a batch of inputs, e.g. one collected by MicroService dynamic batching.
+
+        Components whose backend accepts batches can override this with a single call. By default each
+        input is invoked concurrently.
+
+        Args:
+            inputs (list): The inputs, each as accepted by `invoke`.
+
+        Returns:
+            list: One result per input, in order. A failing input yields its exception instead of a result.
+        """
+        return await asyncio.gather(*(self.invoke(input) for input in inputs), return_exceptions=True)
+
     def __repr__(self):
         """Provides a string representation of the component for debugging and logging purposes.
 
@@ -161,3 +176,11 @@ class OpeaComponentLoader:
         if not hasattr(self.component, "invoke"):
             raise AttributeError(f"The component '{self.component}' does not have an 'invoke' method.")
         return await self.component.invoke(*args, **kwargs)
+
+    async def invoke_batch(self, inputs: list) -> list:
+        """Invoke the loaded component on a batch of inputs.
+
+        :param inputs: The inputs, each as accepted by the invoke method
+        :return: One result (or exception) per input, in order
+        """
+        return await self.component.invoke_batch(inputs)
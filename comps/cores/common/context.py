@@ -0,0 +1,169 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import re
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from ..mega.logger import CustomLogger
+from .cache import LRUCache
+
+logger = CustomLogger("context_packer")
+
+# Approximate tokens when the tokenizer of the model is not available: CJK characters, words and punctuation marks
+APPROXIMATE_TOKEN = re.compile(r"[\u4e00-\u9fff]|\w+|[^\w\s]")
+# A document is trimmed after the end of a sentence or a line
+SENTENCE_END = re.compile(r"[.!?](?=\s)|[。！？]|\n")
+
+
+class PackedContext(NamedTuple):
+    """The documents packed into the context of a prompt.
+
+    Attributes:
+        documents (List[str]): The packed documents, from the highest to the lowest score.
+        tokens (int): The number of tokens of the packed documents.
+        trimmed (bool): Whether the last packed document was trimmed at a sentence boundary.
+        dropped (int): The number of documents left out of the context.
+    """
+
+    documents: List[str]
+    tokens: int
+    trimmed: bool = False
+    dropped: int = 0
+
+
+def context_token_budget(model_config: Optional[dict] = None) -> Optional[int]:
+    """Returns the number of tokens the retrieved documents may take in the prompt of a model.
+
+    The budget is the `maxContextTokens` field of the model in MODEL_CONFIGS, else the RAG_CONTEXT_TOKENS
+    environment variable. None, the default, means the documents are not packed.
+    """
+    budget = (model_config or {}).get("maxContextTokens") or os.getenv("RAG_CONTEXT_TOKENS")
+    return int(budget) if budget and int(budget) > 0 else None
+
+
+class ContextPacker:
+    """Packs retrieved documents into a token budget.
+
+    Documents are taken greedily from the highest to the lowest score, and the first one that does not fit is
+    trimmed at its last sentence boundary within the budget. Each document is tokenized once, its token offsets
+    are cached since the same documents are retrieved again and again.
+
+    Attributes:
+        max_tokens (int): The token budget of the documents.
+        tokenizer: The Hugging Face tokenizer of the model, None to approximate tokens.
+        token_offsets (LRUCache): The cache of the token end offsets, document -> offsets.
+    """
+
+    def __init__(self, max_tokens: int, tokenizer=None, cache_size: int = 4096):
+        """Initializes the packer.
+
+        Args:
+            max_tokens (int): The token budget of the documents.
+            tokenizer (optional): A Hugging Face tokenizer, or the name of the model to load its tokenizer.
+                Defaults to approximating tokens, which is also the fallback when the tokenizer cannot be loaded.
+            cache_size (int): The maximum number of documents whose tokens are cached.
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        self.tokenizer = self._load_tokenizer(tokenizer) if isinstance(tokenizer, str) else tokenizer
+        self.token_offsets = LRUCache(cache_size)
+        self.requests = 0
+        self.tokens = 0
+        self.trimmed = 0
+        self.dropped = 0
+
+    def pack(self, documents: Sequence[str], scores: Optional[Sequence[float]] = None) -> PackedContext:
+        """Packs documents into the token budget.
+
+        Args:
+            documents (Sequence[str]): The documents, in ranking order.
+            scores (Sequence[float], optional): The scores of the documents, the higher the better. Defaults to
+                the ranking order.
+
+        Returns:
+            PackedContext: The packed documents and the number of tokens they use.
+        """
+        if scores is not None:
+            order = sorted(range(len(documents)), key=lambda i: -scores[i])
+            documents = [documents[i] for i in order]
+        offsets = self._tokenize(documents)
+
+        packed, tokens, trimmed = [], 0, False
+        for document, ends in zip(documents, offsets):
+            remaining = self.max_tokens - tokens
+            if len(ends) <= remaining:
+                packed.append(document)
+                tokens += len(ends)
+                continue
+            if remaining > 0:
+                cut = self._sentence_boundary(document, ends[remaining - 1])
+                if cut:
+                    packed.append(document[:cut].rstrip())
+                    tokens += sum(1 for end in ends[:remaining] if end <= cut)
+                    trimmed = True
+            break
+
+        result = PackedContext(packed, tokens, trimmed, len(documents) - len(packed))
+        self.requests += 1
+        self.tokens += tokens
+        self.trimmed += trimmed
+        self.dropped += result.dropped
+        logger.debug(
+            f"Packed {len(packed)}/{len(documents)} documents in {tokens}/{self.max_tokens} tokens, trimmed={trimmed}"
+        )
+        return result
+
+    def get_statistics(self) -> dict:
+        """Returns the packing counters, in the format of /v1/statistics."""
+        return {
+            "max_tokens": self.max_tokens,
+            "requests": self.requests,
+            "average_tokens": self.tokens / self.requests if self.requests else None,
+            "trimmed": self.trimmed,
+            "dropped": self.dropped,
+            "token_cache": self.token_offsets.get_statistics(),
+        }
+
+    def _tokenize(self, documents: Sequence[str]) -> List[Tuple[int, ...]]:
+        """Returns the end offset of every token of the documents, tokenizing the uncached ones in one batch."""
+        offsets = [self.token_offsets.get(document) for document in documents]
+        missing = list({document: None for document, ends in zip(documents, offsets) if ends is None})
+        if missing:
+            computed = dict(zip(missing, self._token_ends(missing)))
+            for document, ends in computed.items():
+                self.token_offsets.set(document, ends)
+            offsets = [computed[document] if ends is None else ends for document, ends in zip(documents, offsets)]
+        return offsets
+
+    def _token_ends(self, documents: List[str]) -> List[Tuple[int, ...]]:
+        if self.tokenizer is not None:
+            try:
+                encodings = self.tokenizer(documents, add_special_tokens=False, return_offsets_mapping=True)
+                return [tuple(end for _, end in mapping) for mapping in encodings["offset_mapping"]]
+            except Exception as e:
+                # slow tokenizers do not return offsets
+                logger.warning(f"Failed to tokenize with {type(self.tokenizer).__name__}, approximating tokens: {e}")
+                self.tokenizer = None
+        return [tuple(match.end() for match in APPROXIMATE_TOKEN.finditer(document)) for document in documents]
+
+    @staticmethod
+    def _sentence_boundary(document: str, limit: int) -> int:
+        """Returns the offset right after the last sentence of `document` that ends within `limit`, 0 if none does."""
+        cut = 0
+        for match in SENTENCE_END.finditer(document):
+            if match.end() > limit:
+                break
+            cut = match.end()
+        return cut
+
+    @staticmethod
+    def _load_tokenizer(model_name: str):
+        try:
+            from transformers import AutoTokenizer
+
+            return AutoTokenizer.from_pretrained(model_name)
+        except Exception as e:
+            logger.warning(f"Failed to load the tokenizer of {model_name}, approximating tokens: {e}")
+            return None
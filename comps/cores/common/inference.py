@@ -0,0 +1,83 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from ..mega.logger import CustomLogger
+
+logger = CustomLogger("batch_inference")
+
+
+class BatchInference:
+    """Runs a local model on batches of texts from a dedicated worker thread.
+
+    Meant to serve the batches collected by MicroService dynamic batching with a model such as a transformers
+    pipeline. The texts are sorted by length and split into sub-batches of at most `max_batch_size`, so each
+    sub-batch is padded to the length of similar texts rather than to the longest text of the whole batch. The
+    model runs on `workers` threads, one by default, so concurrent batches queue up instead of competing for the
+    same cores.
+
+    Attributes:
+        model (Callable): Called with a list of texts, their number as `batch_size` and `model_kwargs`, returns one
+            result per text. A transformers pipeline needs `batch_size` to run a list of texts as one batch.
+        max_batch_size (int): The maximum number of texts per model call.
+        model_kwargs (dict): The keyword arguments of every model call, e.g. truncation=True.
+    """
+
+    def __init__(self, model: Callable[..., list], max_batch_size: int = 32, workers: int = 1, **model_kwargs):
+        """Initializes the worker of the model.
+
+        Args:
+            model (Callable): Called with a list of texts, their number as `batch_size` and `model_kwargs`, returns
+                one result per text.
+            max_batch_size (int): The maximum number of texts per model call.
+            workers (int): The number of threads running the model.
+            **model_kwargs: The keyword arguments of every model call.
+        """
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.model_kwargs = model_kwargs
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch_inference")
+        self.batches = 0
+        self.texts = 0
+
+    def __call__(self, texts: List[str]) -> List[Any]:
+        """Runs the model on the texts in the calling thread, in length-sorted sub-batches.
+
+        Returns:
+            One result per text, in order.
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        results: List[Optional[Any]] = [None] * len(texts)
+        for start in range(0, len(order), self.max_batch_size):
+            indices = order[start : start + self.max_batch_size]
+            outputs = self.model([texts[i] for i in indices], **{"batch_size": len(indices), **self.model_kwargs})
+            if len(outputs) != len(indices):
+                raise ValueError(f"The model returned {len(outputs)} results for {len(indices)} texts")
+            for i, output in zip(indices, outputs):
+                results[i] = output
+            self.batches += 1
+        self.texts += len(texts)
+        return results
+
+    async def run(self, texts: List[str]) -> List[Any]:
+        """Runs the model on the texts from the worker thread.
+
+        Returns:
+            One result per text, in order.
+        """
+        if not texts:
+            return []
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self, list(texts))
+
+    def get_statistics(self) -> dict:
+        """Returns the number of model calls and texts, in the format of /v1/statistics."""
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "average_batch_size": self.texts / self.batches if self.batches else None,
+        }
@@ -0,0 +1,140 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import os
+from typing import Any, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ..mega.logger import CustomLogger
+from .cache import LRUCache
+
+logger = CustomLogger("opea_llm_response_cache")
+logflag = os.getenv("LOGFLAG", False)
+
+
+class ResponseCacheKey(NamedTuple):
+    """Where a response is cached: its exact key, and for the semantic tier its signature and query embedding."""
+
+    exact: str
+    signature: Optional[str] = None
+    embedding: Optional[np.ndarray] = None
+
+
+class ResponseCache:
+    """A cache of LLM responses keyed on the normalized request parameters.
+
+    The exact tier serves requests whose parameters are identical once normalized. The optional semantic tier
+    serves a request whose query, i.e. the prompt or the last user message, has an embedding within
+    `similarity_threshold` cosine similarity of a cached one, provided all other parameters are identical.
+
+    Attributes:
+        exact (LRUCache): The exact tier, normalized parameters hash -> response.
+        semantic (LRUCache): The semantic tier, exact key -> (signature, unit query embedding, response).
+        similarity_threshold (float): The minimum cosine similarity of a semantic hit, None to disable the tier.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: Optional[float] = None,
+        similarity_threshold: Optional[float] = None,
+        embedding_endpoint: Optional[str] = None,
+    ):
+        self.exact = LRUCache(max_size, ttl)
+        self.similarity_threshold = similarity_threshold if embedding_endpoint else None
+        self.semantic = LRUCache(max_size, ttl)
+        self.semantic_hits = 0
+        self.embedding_client = None
+        if self.similarity_threshold is not None:
+            from huggingface_hub import AsyncInferenceClient
+
+            self.embedding_client = AsyncInferenceClient(model=embedding_endpoint)
+
+    async def get(self, params: dict) -> Tuple[ResponseCacheKey, Any]:
+        """Looks up the response to a request.
+
+        Returns:
+            The key to cache the response of the request under, and the cached response or None on a miss.
+        """
+        key = ResponseCacheKey(self._hash(params))
+        response = self.exact.get(key.exact)
+        if response is not None or self.similarity_threshold is None:
+            return key, response
+
+        query, signature = self._split_query(params)
+        if query is None:
+            return key, None
+        embedding = await self._embed(query)
+        if embedding is None:
+            return key, None
+        key = key._replace(signature=signature, embedding=embedding)
+
+        candidates = [entry for _, entry in self.semantic.items() if entry[0] == signature]
+        if candidates:
+            similarities = np.stack([entry[1] for entry in candidates]) @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity_threshold:
+                self.semantic_hits += 1
+                if logflag:
+                    logger.info(f"Semantic cache hit with similarity {similarities[best]:.4f}")
+                return key, candidates[best][2]
+        return key, None
+
+    async def set(self, key: ResponseCacheKey, response: Any):
+        """Caches the response of a request under the key returned by get."""
+        self.exact.set(key.exact, response)
+        if key.embedding is not None:
+            self.semantic.set(key.exact, (key.signature, key.embedding, response))
+
+    def get_statistics(self) -> dict:
+        """Returns the cache counters, in the format of /v1/statistics."""
+        statistics = self.exact.get_statistics()
+        lookups = self.exact.hits + self.exact.misses
+        statistics["semantic_hits"] = self.semantic_hits if self.similarity_threshold is not None else None
+        statistics["hit_rate"] = (self.exact.hits + self.semantic_hits) / lookups if lookups else None
+        return statistics
+
+    def _hash(self, params: dict) -> str:
+        normalized = json.dumps(self._normalize(params), sort_keys=True, default=str)
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def _normalize(self, value):
+        # surrounding whitespace of prompts and messages never changes the answer
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, dict):
+            return {k: self._normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._normalize(v) for v in value]
+        return value
+
+    def _split_query(self, params: dict) -> Tuple[Optional[str], Optional[str]]:
+        """Splits a request into its query text and the hash of all its other parameters."""
+        params = dict(params)
+        if isinstance(params.get("prompt"), str):
+            query = params.pop("prompt")
+        elif isinstance(params.get("messages"), str):
+            query = params.pop("messages")
+        elif isinstance(params.get("messages"), list):
+            messages = list(params["messages"])
+            last = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].get("role") == "user"), None)
+            if last is None or not isinstance(messages[last].get("content"), str):
+                return None, None
+            query = messages[last]["content"]
+            messages[last] = {**messages[last], "content": None}
+            params["messages"] = messages
+        else:
+            return None, None
+        return query.strip(), self._hash(params)
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            embedding = np.asarray(await self.embedding_client.feature_extraction(text), dtype=np.float32).reshape(-1)
+        except Exception as e:
+            logger.error(f"Failed to embed the query for the semantic cache: {e}")
+            return None
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else None
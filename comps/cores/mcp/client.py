@@ -3,7 +3,7 @@
 
 import asyncio
 import os
-from contextlib import AsyncExitStack
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import List, Optional
 
 from mcp import ClientSession, StdioServerParameters
@@ -18,12 +18,40 @@ logger = CustomLogger("comps-mcp-client")
 log_flag = os.getenv("LOGFLAG", False)
 
 
+@asynccontextmanager
+async def _deadline(timeout: float):
+    """Raise asyncio.TimeoutError when the block runs longer than `timeout` seconds.
+
+    Unlike asyncio.wait_for, the block runs in the current task, so the anyio task groups entered by the transports
+    are exited by the task that entered them.
+    """
+    task = asyncio.current_task()
+    expired = False
+
+    def expire():
+        nonlocal expired
+        expired = True
+        task.cancel()
+
+    handle = asyncio.get_running_loop().call_later(timeout, expire)
+    try:
+        yield
+    except asyncio.CancelledError:
+        if not expired:
+            raise
+        if hasattr(task, "uncancel"):
+            task.uncancel()
+        raise asyncio.TimeoutError() from None
+    finally:
+        handle.cancel()
+
+
 class OpeaMCPClient(BaseModel):
     """A client for interacting with MCP servers, managing tools, and handling server communication."""
 
     description: str = "MCP client for server interaction and tool management"
     session: Optional[ClientSession] = None
-    exit_stack: AsyncExitStack = AsyncExitStack()
+    exit_stack: AsyncExitStack = Field(default_factory=AsyncExitStack)
 
     tools: List[OpeaMCPClientTool] = Field(default_factory=list)
     tool_registry: dict[str, OpeaMCPClientTool] = Field(default_factory=dict)
@@ -50,8 +78,7 @@ class OpeaMCPClient(BaseModel):
             await self.disconnect()
 
         try:
-
-            async def connect_with_timeout():
+            async with _deadline(timeout):
                 streams_context = sse_client(
                     url=server_url,
                     headers={"Authorization": f"Bearer {api_key}"} if api_key else None,
@@ -60,8 +87,6 @@ class OpeaMCPClient(BaseModel):
                 streams = await self.exit_stack.enter_async_context(streams_context)
                 self.session = await self.exit_stack.enter_async_context(ClientSession(*streams))
                 await self._initialize_tools()
-
-            await asyncio.wait_for(connect_with_timeout(), timeout=timeout)
         except asyncio.TimeoutError:
             logger.error(f"Connection to {server_url} timed out after {timeout} seconds")
             await self.disconnect()
@@ -150,16 +175,21 @@ class OpeaMCPClient(BaseModel):
         return await self.session.call_tool(name=tool_name, arguments=parameters)
 
     async def disconnect(self) -> None:
-        """Disconnect from the MCP server and clean up resources."""
-        if self.session:
-            try:
-                if hasattr(self.session, "close"):
-                    await self.session.close()
-                await self.exit_stack.aclose()
-            except Exception as e:
-                logger.error(f"Error during disconnect: {str(e)}")
-            finally:
-                self.session = None
-                self.tools = []
-                self.tool_registry = {}
+        """Disconnect from the MCP server and clean up resources.
+
+        The transports are anyio task groups, call it from the task that connected the client.
+        """
+        connected = self.session is not None
+        try:
+            if connected and hasattr(self.session, "close"):
+                await self.session.close()
+            # a transport may be open without a session, when the connection failed
+            await self.exit_stack.aclose()
+        except Exception as e:
+            logger.error(f"Error during disconnect: {str(e)}")
+        finally:
+            self.session = None
+            self.tools = []
+            self.tool_registry = {}
+            if connected:
                 logger.info("Disconnected from MCP server")
@@ -1,9 +1,12 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 import json
 import os
-from typing import List, Union
+from typing import Dict, List, Optional, Tuple, Union
+
+import anyio
 
 from comps import CustomLogger
 from comps.cores.mcp.client import OpeaMCPClient
@@ -12,71 +15,205 @@ from comps.cores.mcp.config import OpeaMCPConfig, OpeaMCPSSEServerConfig, OpeaMC
 logger = CustomLogger("comps-mcp-manager")
 logflag = os.getenv("LOGFLAG", False)
 
+# Seconds to connect to one MCP server, the servers are connected concurrently
+MCP_CONNECT_TIMEOUT = float(os.getenv("MCP_CONNECT_TIMEOUT", 30))
+# Maximum seconds between two reconnection attempts of the servers that failed or dropped
+MCP_RECONNECT_MAX_BACKOFF = float(os.getenv("MCP_RECONNECT_MAX_BACKOFF", 60))
+
+# Errors of a tool call meaning that the session with the server is gone, rather than that the tool failed
+SESSION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+ServerConfig = Union[OpeaMCPSSEServerConfig, OpeaMCPStdioServerConfig]
 
-class OpeaMCPToolsManager:
-    """A unified interface for handling MCP clients with different server configurations."""
 
-    def __init__(self, config: OpeaMCPConfig):
+class OpeaMCPToolsManager:
+    """A unified interface for handling MCP clients with different server configurations.
+
+    The servers are connected concurrently, each within `connect_timeout` seconds. The servers that fail to connect,
+    and those whose session drops during a tool call, are reconnected by a background task with exponential backoff.
+    Tool calls find their client in a tool name index, rebuilt whenever the connected clients change, and run
+    concurrently over the sessions of the clients. The transports are anyio task groups, so the connection of each
+    client is opened and closed by one task, which disconnects the client when it is signalled to stop.
+    """
+
+    def __init__(
+        self,
+        config: OpeaMCPConfig,
+        connect_timeout: float = MCP_CONNECT_TIMEOUT,
+        max_backoff: float = MCP_RECONNECT_MAX_BACKOFF,
+    ):
         """Initialize the MCPToolsManager with the provided configuration.
 
         Args:
             config: The OPEA MCP configuration containing server details.
+            connect_timeout: Seconds to connect to one server.
+            max_backoff: Maximum seconds between two reconnection attempts.
         """
         self.config = config
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
         self.tools_registry: List[dict] = []
+        self.tool_index: Dict[str, OpeaMCPClient] = {}
         self.clients: List[OpeaMCPClient] = []
+        # the servers to reconnect, and the server of each connected client by client id
+        self.pending_servers: List[ServerConfig] = []
+        self._client_servers: Dict[int, ServerConfig] = {}
+        # the task owning the connection of each connected client, and the event stopping it, by client id
+        self._client_tasks: Dict[int, Tuple[asyncio.Task, asyncio.Event]] = {}
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    @property
+    def clients(self) -> List[OpeaMCPClient]:
+        return self._clients
+
+    @clients.setter
+    def clients(self, clients: List[OpeaMCPClient]):
+        self._clients = clients
+        self._rebuild_tool_index()
 
     @classmethod
-    async def create(cls, config: OpeaMCPConfig) -> "OpeaMCPToolsManager":
+    async def create(cls, config: OpeaMCPConfig, **kwargs) -> "OpeaMCPToolsManager":
         """Asynchronous factory method to create an instance of OpeaMCPToolsManager.
 
         Args:
             config: The OPEA MCP configuration containing server details.
+            **kwargs: The connection settings of the manager, `connect_timeout` and `max_backoff`.
 
         Returns:
             An instance of OpeaMCPToolsManager with initialized clients.
         """
-        instance = cls(config)
+        instance = cls(config, **kwargs)
         instance.clients = await instance._initialize_clients(config.sse_servers + config.stdio_servers)
         await instance._register_tools()
+        instance._start_reconnect()
         return instance
 
-    async def _initialize_clients(
-        self, server_configs: List[Union[OpeaMCPSSEServerConfig, OpeaMCPStdioServerConfig]]
-    ) -> List[OpeaMCPClient]:
-        """Initialize MCP clients based on the provided server configurations.
+    async def _connect(self, server_config: ServerConfig) -> OpeaMCPClient:
+        """Connect a new client to a server within the connection timeout, in a task owning the connection."""
+        client = OpeaMCPClient()
+        connected = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+        task = asyncio.create_task(self._run_client(client, server_config, connected, stop))
+        try:
+            await asyncio.wait_for(asyncio.shield(connected), self.connect_timeout)
+        except BaseException:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            raise
+        self._client_tasks[id(client)] = (task, stop)
+        return client
+
+    async def _run_client(
+        self, client: OpeaMCPClient, server_config: ServerConfig, connected: asyncio.Future, stop: asyncio.Event
+    ):
+        """Connect a client, then keep its connection open until `stop` is set and disconnect it, in one task."""
+        try:
+            try:
+                if isinstance(server_config, OpeaMCPSSEServerConfig):
+                    logger.info(f"Initializing MCP client for SSE server: {server_config.url}")
+                    await client.connect_via_sse(server_config.url, server_config.api_key, timeout=self.connect_timeout)
+                else:
+                    logger.info(f"Initializing MCP client for Stdio server: {server_config.command}")
+                    await client.connect_via_stdio(server_config.command, server_config.args)
+            except Exception as e:
+                if not connected.done():
+                    connected.set_exception(e)
+                return
+            if not connected.done():
+                connected.set_result(None)
+            await stop.wait()
+        finally:
+            if not connected.done():
+                connected.cancel()
+            try:
+                await client.disconnect()
+            except Exception as disconnect_error:
+                logger.error(f"Error while disconnecting MCP client: {str(disconnect_error)}")
+
+    async def _disconnect(self, client: OpeaMCPClient):
+        """Stop the task owning the connection of a client, and wait for it to disconnect the client."""
+        owner = self._client_tasks.pop(id(client), None)
+        if owner is None:
+            # a client not connected by the manager
+            try:
+                await client.disconnect()
+            except Exception as disconnect_error:
+                logger.error(f"Error while disconnecting MCP client: {str(disconnect_error)}")
+            return
+        task, stop = owner
+        stop.set()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def _initialize_clients(self, server_configs: List[ServerConfig]) -> List[OpeaMCPClient]:
+        """Initialize MCP clients based on the provided server configurations, concurrently.
+
+        The servers that fail to connect are added to `pending_servers`.
 
         Args:
             server_configs: A list of server configurations (SSE or Stdio).
 
         Returns:
-            A list of initialized MCP clients.
+            A list of initialized MCP clients, in the order of their configurations.
         """
-        initialized_clients = []
+        supported = []
         for server_config in server_configs:
-            client = OpeaMCPClient()
-            try:
-                if isinstance(server_config, OpeaMCPSSEServerConfig):
-                    logger.info(f"Initializing MCP client for SSE server: {server_config.url}")
-                    await client.connect_via_sse(server_config.url, server_config.api_key)
-                elif isinstance(server_config, OpeaMCPStdioServerConfig):
-                    logger.info(f"Initializing MCP client for Stdio server: {server_config.command}")
-                    await client.connect_via_stdio(server_config.command, server_config.args)
-                else:
-                    logger.error(f"Unsupported server configuration type: {server_config}")
-                    continue
-
-                initialized_clients.append(client)
-                logger.info(f"Successfully connected to MCP server: {server_config}")
-            except Exception as e:
-                logger.error(f"Failed to connect to server {server_config}: {str(e)}")
-                try:
-                    await client.disconnect()
-                except Exception as disconnect_error:
-                    logger.error(f"Error during disconnect after failed connection: {str(disconnect_error)}")
+            if isinstance(server_config, (OpeaMCPSSEServerConfig, OpeaMCPStdioServerConfig)):
+                supported.append(server_config)
+            else:
+                logger.error(f"Unsupported server configuration type: {server_config}")
 
+        results = await asyncio.gather(*(self._connect(c) for c in supported), return_exceptions=True)
+        initialized_clients = []
+        for server_config, result in zip(supported, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                logger.error(f"Failed to connect to server {server_config}: {str(result) or type(result).__name__}")
+                self.pending_servers.append(server_config)
+                continue
+            self._client_servers[id(result)] = server_config
+            initialized_clients.append(result)
+            logger.info(f"Successfully connected to MCP server: {server_config}")
         return initialized_clients
 
+    def _rebuild_tool_index(self):
+        """Map each tool name to the first connected client providing it."""
+        index = {}
+        for client in self._clients:
+            for tool in client.tools:
+                index.setdefault(tool.name, client)
+        self.tool_index = index
+
+    def _start_reconnect(self):
+        """Start reconnecting the pending servers in the background, unless it is already running."""
+        if self.pending_servers and (self._reconnect_task is None or self._reconnect_task.done()):
+            self._reconnect_task = asyncio.create_task(self._reconnect_pending())
+
+    async def _reconnect_pending(self):
+        backoff = min(1.0, self.max_backoff)
+        while self.pending_servers:
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+            server_configs, self.pending_servers = self.pending_servers, []
+            logger.info(f"Reconnecting to {len(server_configs)} MCP servers")
+            clients = await self._initialize_clients(server_configs)
+            if clients:
+                self.clients = self.clients + clients
+                await self._register_tools()
+
+    async def _drop_client(self, client: OpeaMCPClient):
+        """Remove a client whose session is gone and reconnect its server in the background."""
+        if not any(c is client for c in self.clients):
+            # already dropped by a concurrent call
+            return
+        self.clients = [c for c in self.clients if c is not client]
+        server_config = self._client_servers.pop(id(client), None)
+        await self._disconnect(client)
+        if server_config is not None:
+            logger.warning(f"Lost the session with MCP server {server_config}, reconnecting in the background")
+            self.pending_servers.append(server_config)
+            self._start_reconnect()
+
     async def _register_tools(self):
         """Dynamically register tools as methods of the manager for natural invocation."""
         tools = self._extract_tools_from_clients(self.clients)
@@ -86,11 +223,15 @@ class OpeaMCPToolsManager:
                 logger.error(f"Tool metadata missing 'name': {tool}")
                 continue
 
-            async def tool_method(self, **kwargs):
-                return await self.execute_tool(tool_name, kwargs)
-
             # Dynamically add the tool method to the manager
-            setattr(self, tool_name, tool_method.__get__(self))
+            setattr(self, tool_name, self._tool_method(tool_name).__get__(self))
+
+    @staticmethod
+    def _tool_method(tool_name: str):
+        async def tool_method(self, **kwargs):
+            return await self.execute_tool(tool_name, kwargs)
+
+        return tool_method
 
     def _extract_tools_from_clients(self, clients: List[OpeaMCPClient]) -> List[dict]:
         """Extracts tools from a list of OpeaMCPClient instances and converts them to a standardized format.
@@ -101,6 +242,7 @@ class OpeaMCPToolsManager:
         Returns:
             A list of tool dictionaries ready to be used by OPEA Agents.
         """
+        self.tools_registry = []
         if not clients:
             logger.warning("No MCP clients provided, returning an empty tool list.")
             return []
@@ -130,33 +272,48 @@ class OpeaMCPToolsManager:
 
         logger.debug(f"Attempting to execute tool: {tool_name}")
 
-        # Find the client that provides the specified tool
-        target_client = None
-        for client in self.clients:
-            logger.debug(f"Checking tools for client: {client}")
-            if tool_name in [tool.name for tool in client.tools]:
-                target_client = client
-                break
-
+        target_client = self.tool_index.get(tool_name)
         if target_client is None:
             raise ValueError(f"No MCP client found that provides the tool: {tool_name}")
 
         logger.debug(f"Found matching client for tool {tool_name}: {target_client}")
 
-        # Execute the tool
-        response = await target_client.invoke_tool(tool_name, parameters)
+        # Execute the tool, concurrent calls share the session of the client
+        try:
+            response = await target_client.invoke_tool(tool_name, parameters)
+        except SESSION_ERRORS:
+            await self._drop_client(target_client)
+            raise
         logger.debug(f"Received response from tool {tool_name}: {response}")
 
         return json.dumps(response.model_dump(mode="json"))
 
+    async def execute_tools(self, calls: List[tuple]) -> List[Union[str, Exception]]:
+        """Execute several tools concurrently.
+
+        Args:
+            calls: The (tool name, parameters) of each call.
+
+        Returns:
+            The result of each call, as a JSON string, or the exception it raised.
+        """
+        return await asyncio.gather(
+            *(self.execute_tool(tool_name, parameters) for tool_name, parameters in calls), return_exceptions=True
+        )
+
     async def __aenter__(self):
         """Support for async context management."""
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
         """Disconnect all clients on exit."""
-        for client in self.clients:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
             try:
-                await client.disconnect()
-            except Exception as disconnect_error:
-                logger.error(f"Error while disconnecting MCP client: {str(disconnect_error)}")
+                await self._reconnect_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reconnect_task = None
+        self.pending_servers = []
+        for client in self.clients:
+            await self._disconnect(client)
@@ -1,42 +1,192 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import math
+import threading
+import time
+from collections import deque
+
 import numpy as np
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
 
 # name => statistic dict
 statistics_dict = {}
 
+# reported percentiles, and sliding windows as name => (length in seconds, number of slots)
+PERCENTILES = (50, 90, 95, 99, 99.9)
+WINDOWS = {"1m": (60, 6), "5m": (300, 10), "1h": (3600, 12)}
+
+
+class QuantileSketch:
+    """Fixed-memory quantile sketch with relative accuracy, in the spirit of DDSketch.
+
+    Values are counted in logarithmically sized buckets, so a quantile is estimated within relative_accuracy
+    of its true value whatever the number of samples. The first exact_samples values are also kept as is,
+    which makes the estimates exact as long as few samples were added.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048, exact_samples=128):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.exact_samples = exact_samples
+        self.buckets = {}  # bucket index => count, bucket i holds values in (gamma^(i-1), gamma^i]
+        self.zero_count = 0  # values too small for a bucket
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.samples = []  # exact values, None once more than exact_samples were added
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if self.samples is not None:
+            self.samples.append(value)
+            if len(self.samples) > self.exact_samples:
+                self.samples = None
+        if value <= 1e-9:
+            self.zero_count += 1
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+            self._collapse()
+
+    def merge(self, other):
+        """Add the samples of another sketch with the same accuracy to this one."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if self.samples is None or other.samples is None or len(self.samples) + len(other.samples) > self.exact_samples:
+            self.samples = None
+        else:
+            self.samples = self.samples + other.samples
+
+    def quantile(self, q):
+        """Return the estimated q-quantile (0 <= q <= 1), or None if the sketch is empty."""
+        if not self.count:
+            return None
+        if self.samples is not None:
+            return float(np.percentile(self.samples, q * 100))
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                value = 2 * self.gamma**index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def average(self):
+        return self.sum / self.count if self.count else None
+
+    def _collapse(self):
+        # keep memory bounded by merging the lowest buckets, only the accuracy of the lowest quantiles suffers
+        while len(self.buckets) > self.max_buckets:
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+
+
+class SlidingWindowSketch:
+    """Quantile sketch of the values added during the last `length` seconds.
+
+    The window is split in slots of equal length, each with its own sketch, and expires slot by slot.
+    """
+
+    def __init__(self, length, slots):
+        self.length = length
+        self.slots = slots
+        self.slot_length = length / slots
+        self._slots = deque()  # (slot number, sketch)
+
+    def add(self, value, now):
+        slot = int(now // self.slot_length)
+        if not self._slots or self._slots[-1][0] != slot:
+            self._slots.append((slot, QuantileSketch()))
+        self._slots[-1][1].add(value)
+        self._expire(slot)
+
+    def snapshot(self, now):
+        """Return a sketch of the values of the current window."""
+        self._expire(int(now // self.slot_length))
+        sketch = QuantileSketch()
+        for _, slot_sketch in self._slots:
+            sketch.merge(slot_sketch)
+        return sketch
+
+    def _expire(self, current_slot):
+        while self._slots and self._slots[0][0] <= current_slot - self.slots:
+            self._slots.popleft()
+
+
+class LatencyStatistics:
+    """All-time and sliding-window sketches of one latency metric."""
+
+    def __init__(self):
+        self.total = QuantileSketch()
+        self.windows = {name: SlidingWindowSketch(length, slots) for name, (length, slots) in WINDOWS.items()}
+
+    def add(self, value, now):
+        self.total.add(value)
+        for window in self.windows.values():
+            window.add(value, now)
+
 
 class BaseStatistics:
-    """Base class to store in-memory statistics of an entity for measurement in one service."""
+    """Base class to store in-memory statistics of an entity for measurement in one service.
+
+    Latencies are summarized in fixed-memory sketches, all-time and over sliding windows, so neither memory
+    use nor the cost of get_statistics grows with the number of requests.
+    """
 
     def __init__(
         self,
     ):
-        self.response_times = []  # store responses time for all requests
-        self.first_token_latencies = []  # store first token latencies for all requests
+        # appends come from the event loop while Prometheus may collect from another thread
+        self._lock = threading.Lock()
+        self.response_times = LatencyStatistics()  # responses time of all requests
+        self.first_token_latencies = LatencyStatistics()  # first token latencies of all requests
 
     def append_latency(self, latency, first_token_latency=None):
-        self.response_times.append(latency)
-        if first_token_latency:
-            self.first_token_latencies.append(first_token_latency)
-
-    def _add_statistics(self, result, stats, suffix):
-        "add P50 (median), P99 and average values for 'stats' array to 'result' dict"
-        if stats:
-            result[f"p50_{suffix}"] = np.percentile(stats, 50)
-            result[f"p99_{suffix}"] = np.percentile(stats, 99)
-            result[f"average_{suffix}"] = np.average(stats)
-        else:
-            result[f"p50_{suffix}"] = None
-            result[f"p99_{suffix}"] = None
-            result[f"average_{suffix}"] = None
+        now = time.monotonic()
+        with self._lock:
+            self.response_times.add(latency, now)
+            if first_token_latency:
+                self.first_token_latencies.add(first_token_latency, now)
+
+    def _add_statistics(self, result, sketch, suffix):
+        "add percentiles (P50 (median), P90, P95, P99, P99.9) and average values of 'sketch' to 'result' dict"
+        for percentile in PERCENTILES:
+            result[f"p{percentile:g}_{suffix}".replace(".", "")] = sketch.quantile(percentile / 100)
+        result[f"average_{suffix}"] = sketch.average()
 
     def get_statistics(self):
-        "return stats dict with P50, P99 and average values for first token and response timings"
+        "return stats dict with percentiles and average values for first token and response timings"
+        now = time.monotonic()
         result = {}
-        self._add_statistics(result, self.response_times, "latency")
-        self._add_statistics(result, self.first_token_latencies, "latency_first_token")
+        with self._lock:
+            result["count"] = self.response_times.total.count
+            self._add_statistics(result, self.response_times.total, "latency")
+            self._add_statistics(result, self.first_token_latencies.total, "latency_first_token")
+            result["windows"] = {}
+            for name, (length, _) in WINDOWS.items():
+                latency = self.response_times.windows[name].snapshot(now)
+                window_result = {"count": latency.count, "throughput": latency.count / length}
+                self._add_statistics(window_result, latency, "latency")
+                self._add_statistics(
+                    window_result, self.first_token_latencies.windows[name].snapshot(now), "latency_first_token"
+                )
+                result["windows"][name] = window_result
         return result
 
 
@@ -57,3 +207,41 @@ def collect_all_statistics():
         for name, statistic in statistics_dict.items():
             results[name] = statistic.get_statistics()
     return results
+
+
+class StatisticsCollector:
+    """Export the latency statistics of all registered services to Prometheus on each scrape."""
+
+    def collect(self):
+        requests = CounterMetricFamily(
+            "opea_service_requests", "Requests measured by service statistics", labels=["service"]
+        )
+        latency = GaugeMetricFamily(
+            "opea_service_latency_seconds",
+            "Latency percentiles measured by service statistics",
+            labels=["service", "metric", "window", "quantile"],
+        )
+        for name, statistic in list(statistics_dict.items()):
+            if not isinstance(statistic, BaseStatistics):
+                continue
+            now = time.monotonic()
+            with statistic._lock:
+                requests.add_metric([name], statistic.response_times.total.count)
+                for metric, latencies in (
+                    ("latency", statistic.response_times),
+                    ("latency_first_token", statistic.first_token_latencies),
+                ):
+                    sketches = {"all": latencies.total}
+                    sketches.update({window: latencies.windows[window].snapshot(now) for window in WINDOWS})
+                    for window, sketch in sketches.items():
+                        if not sketch.count:
+                            continue
+                        for percentile in PERCENTILES:
+                            latency.add_metric(
+                                [name, metric, window, f"{percentile / 100:g}"], sketch.quantile(percentile / 100)
+                            )
+        yield requests
+        yield latency
+
+
+REGISTRY.register(StatisticsCollector())
@@ -2,7 +2,6 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from collections import OrderedDict, defaultdict
-from copy import deepcopy
 
 
 class DAG(object):
@@ -41,13 +40,21 @@ class DAG(object):
         graph = self.graph
         if ind_node not in graph or dep_node not in graph:
             raise KeyError("one or more nodes do not exist in graph")
-        test_graph = deepcopy(graph)
-        test_graph[ind_node].add(dep_node)
-        is_valid = self.validate(test_graph)
-        if is_valid:
-            graph[ind_node].add(dep_node)
-        else:
+        # the new edge closes a cycle iff ind_node is already reachable from dep_node
+        if ind_node == dep_node or ind_node in self._reachable(dep_node):
             raise Exception("validation error!")
+        graph[ind_node].add(dep_node)
+
+    def _reachable(self, node):
+        graph = self.graph
+        seen = set()
+        stack = [node]
+        while stack:
+            for downstream_node in graph[stack.pop()]:
+                if downstream_node not in seen:
+                    seen.add(downstream_node)
+                    stack.append(downstream_node)
+        return seen
 
     def delete_edge(self, ind_node, dep_node):
         graph = self.graph
@@ -140,3 +147,106 @@ class DAG(object):
 
     def size(self):
         return len(self.graph)
+
+
+class ExecutionPlan(object):
+    """Immutable, precompiled form of a DAG.
+
+    Adjacency in both directions, in-degrees and a topological order are computed once, so running a
+    request over the graph needs neither a copy of it nor any scan of its edges.
+    """
+
+    def __init__(self, graph):
+        self.nodes = tuple(graph)
+        self.successors = {node: tuple(edges) for node, edges in graph.items()}
+        predecessors = {node: [] for node in graph}
+        for node, edges in graph.items():
+            for dep_node in edges:
+                predecessors[dep_node].append(node)
+        self.predecessors = {node: tuple(nodes) for node, nodes in predecessors.items()}
+        self.in_degree = {node: len(nodes) for node, nodes in predecessors.items()}
+        self.ind_nodes = tuple(node for node in self.nodes if not self.in_degree[node])
+        self.topological_order = tuple(DAG().topological_sort(graph))
+
+
+class RuntimeGraph(DAG):
+    """Per-request copy-on-write view of an ExecutionPlan.
+
+    Only pruned edges and nodes are recorded, the plan is shared by all requests. The view can be
+    pruned with delete_edge/delete_node but not grown.
+    """
+
+    def __init__(self, plan: ExecutionPlan):
+        self.plan = plan
+        self.deleted_edges = set()
+        self.deleted_nodes = set()
+
+    @property
+    def graph(self):
+        return OrderedDict((node, set(self.downstream(node))) for node in self.plan.nodes if self._has_node(node))
+
+    def _has_node(self, node):
+        return node in self.plan.successors and node not in self.deleted_nodes
+
+    def _is_live(self, ind_node, dep_node):
+        return (ind_node, dep_node) not in self.deleted_edges and dep_node not in self.deleted_nodes
+
+    def add_node(self, node_name: str):
+        raise TypeError("nodes cannot be added to a runtime graph")
+
+    def add_edge(self, ind_node, dep_node):
+        raise TypeError("edges cannot be added to a runtime graph")
+
+    def reset_graph(self):
+        raise TypeError("a runtime graph cannot be reset")
+
+    def delete_node(self, node_name):
+        if not self._has_node(node_name):
+            raise KeyError("node %s does not exist" % node_name)
+        self.deleted_nodes.add(node_name)
+
+    def delete_edge(self, ind_node, dep_node):
+        if dep_node not in self.downstream(ind_node):
+            raise KeyError("this edge does not exist in graph")
+        self.deleted_edges.add((ind_node, dep_node))
+
+    def predecessors(self, node):
+        if not self._has_node(node):
+            return []
+        return [
+            key for key in self.plan.predecessors[node] if key not in self.deleted_nodes and self._is_live(key, node)
+        ]
+
+    def downstream(self, node) -> list:
+        if not self._has_node(node):
+            raise KeyError("node %s is not in graph" % node)
+        return [dep_node for dep_node in self.plan.successors[node] if self._is_live(node, dep_node)]
+
+    def all_downstreams(self, node):
+        nodes = [node]
+        nodes_seen = set()
+        i = 0
+        while i < len(nodes):
+            for downstream_node in self.downstream(nodes[i]):
+                if downstream_node not in nodes_seen:
+                    nodes_seen.add(downstream_node)
+                    nodes.append(downstream_node)
+            i += 1
+        return [node for node in self.topological_sort() if node in nodes_seen]
+
+    def all_leaves(self):
+        return [node for node in self.plan.nodes if self._has_node(node) and not self.downstream(node)]
+
+    def ind_nodes(self, graph=None):
+        if graph is not None:
+            return super().ind_nodes(graph=graph)
+        return [node for node in self.plan.nodes if self._has_node(node) and not self.predecessors(node)]
+
+    def topological_sort(self, graph=None):
+        if graph is not None:
+            return super().topological_sort(graph=graph)
+        # the order of the whole plan stays valid for any pruned subgraph of it
+        return [node for node in self.plan.topological_order if node not in self.deleted_nodes]
+
+    def size(self):
+        return len(self.plan.nodes) - len(self.deleted_nodes)
@@ -98,6 +98,13 @@ class HTTPService(BaseService):
         async def startup_event():
             asyncio.create_task(func)
 
+    def add_shutdown_event(self, func):
+        """Await ``func()`` when the server shuts down, e.g. to close a ServiceOrchestrator's connection pool."""
+
+        @self.app.on_event("shutdown")
+        async def shutdown_event():
+            await func()
+
     async def initialize_server(self):
         """Initialize and return HTTP server."""
         self.logger.info("Setting up HTTP server")
@@ -3,11 +3,14 @@
 
 import asyncio
 import os
+import time
 from collections import defaultdict, deque
 from collections.abc import Callable
 from enum import Enum
 from typing import Any, List, Optional, Type, TypeAlias
 
+from prometheus_client import Counter, Gauge, Histogram
+
 from ..proto.docarray import TextDoc
 from .constants import MCPFuncType, ServiceRoleType, ServiceType
 from .http_service import HTTPService
@@ -20,6 +23,45 @@ logger = CustomLogger("micro_service")
 logflag = os.getenv("LOGFLAG", False)
 AnyFunction: TypeAlias = Callable[..., Any]
 
+# Prometheus metrics need to be singletons, they are created when a batch processor first runs
+_batching_metrics = {}
+
+
+def _get_batching_metrics() -> dict:
+    if not _batching_metrics:
+        labels = ["service", "service_type"]
+        _batching_metrics["queue_depth"] = Gauge(
+            "microservice_batch_queue_depth", "Requests waiting for dynamic batching (gauge)", labels
+        )
+        _batching_metrics["batch_size"] = Histogram(
+            "microservice_batch_size",
+            "Size of the dynamic batches (histogram)",
+            labels,
+            buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+        )
+        _batching_metrics["queue_time"] = Histogram(
+            "microservice_batch_queue_time", "Time requests waited for their dynamic batch (histogram)", labels
+        )
+        _batching_metrics["dropped"] = Counter(
+            "microservice_batch_dropped_requests",
+            "Requests dropped from dynamic batching because they were cancelled or expired (counter)",
+            labels + ["reason"],
+        )
+    return _batching_metrics
+
+
+class _BatchQueue(deque):
+    """Request buffer of one service type that wakes up the batch processor on every append."""
+
+    def __init__(self, wakeup: asyncio.Event):
+        super().__init__()
+        self._wakeup = wakeup
+
+    def append(self, request: dict):
+        request.setdefault("enqueue_time", time.monotonic())
+        super().append(request)
+        self._wakeup.set()
+
 
 class MicroService(HTTPService):
     """MicroService class to create a microservice."""
@@ -43,13 +85,17 @@ class MicroService(HTTPService):
         use_remote_service: Optional[bool] = False,
         description: Optional[str] = None,
         dynamic_batching: bool = False,
-        dynamic_batching_timeout: int = 1,
+        dynamic_batching_timeout: float = 0.01,
         dynamic_batching_max_batch_size: int = 32,
         enable_mcp: bool = False,
         mcp_func_type: Enum = MCPFuncType.TOOL,
         func: AnyFunction = None,
     ):
-        """Init the microservice."""
+        """Init the microservice.
+
+        With dynamic batching, buffered requests are flushed as soon as dynamic_batching_max_batch_size of
+        one service type are waiting, or once the oldest of them waited dynamic_batching_timeout seconds.
+        """
         self.service_role = service_role
         self.service_type = service_type
         self.protocol = protocol
@@ -65,6 +111,8 @@ class MicroService(HTTPService):
         self.dynamic_batching = dynamic_batching
         self.dynamic_batching_timeout = dynamic_batching_timeout
         self.dynamic_batching_max_batch_size = dynamic_batching_max_batch_size
+        # component whose invoke_batch serves the default dynamic_batching_infer
+        self.dynamic_batching_component = None
         self.uvicorn_kwargs = {}
 
         if ssl_keyfile:
@@ -96,7 +144,8 @@ class MicroService(HTTPService):
             # create a batch request processor loop if using dynamic batching
             if self.dynamic_batching:
                 self.buffer_lock = asyncio.Lock()
-                self.request_buffer = defaultdict(deque)
+                self.request_event = asyncio.Event()
+                self.request_buffer = defaultdict(lambda: _BatchQueue(self.request_event))
                 self.add_startup_event(self._dynamic_batch_processor())
 
             if not enable_mcp:
@@ -118,36 +167,103 @@ class MicroService(HTTPService):
         # overwrite name
         self.name = f"{name}/{self.__class__.__name__}" if name else self.__class__.__name__
 
+    async def dynamic_batching_request(self, service_type: Enum, request: Any, timeout: Optional[float] = None):
+        """Queue a request for dynamic batching and wait for its result.
+
+        :param service_type: buffer of the request, a batch only holds requests of one service type
+        :param request: request handed to dynamic_batching_infer as part of a batch
+        :param timeout: seconds the caller waits at most, the request is dropped from its batch once expired
+        :return: the result dynamic_batching_infer returned for this request
+        """
+        response = asyncio.get_running_loop().create_future()
+        item = {"request": request, "response": response}
+        if timeout is not None:
+            item["deadline"] = time.monotonic() + timeout
+        async with self.buffer_lock:
+            self.request_buffer[service_type].append(item)
+        # the future is cancelled when the caller gives up, so the processor skips it
+        return await asyncio.wait_for(response, timeout)
+
+    async def _wait_for_batch(self):
+        """Return once a buffer is full or its oldest request waited dynamic_batching_timeout."""
+        while True:
+            # nothing is awaited between clearing and checking, so no append goes unnoticed
+            self.request_event.clear()
+            now = time.monotonic()
+            oldest = None
+            for request_lst in self.request_buffer.values():
+                if len(request_lst) >= self.dynamic_batching_max_batch_size:
+                    return
+                if request_lst:
+                    enqueue_time = request_lst[0].setdefault("enqueue_time", now)
+                    oldest = enqueue_time if oldest is None else min(oldest, enqueue_time)
+
+            if oldest is None:
+                await self.request_event.wait()
+                continue
+            wait = oldest + self.dynamic_batching_timeout - now
+            if wait <= 0:
+                return
+            try:
+                await asyncio.wait_for(self.request_event.wait(), wait)
+            except asyncio.TimeoutError:
+                return
+
     async def _dynamic_batch_processor(self):
         if logflag:
             logger.info("dynamic batch processor looping...")
+        metrics = _get_batching_metrics()
         while True:
-            await asyncio.sleep(self.dynamic_batching_timeout)
+            await self._wait_for_batch()
             runtime_batch: dict[Enum, list[dict]] = {}  # {ServiceType.Embedding: [{"request": xx, "response": yy}, {}]}
 
             async with self.buffer_lock:
                 # prepare the runtime batch, access to buffer is locked
-                if self.request_buffer:
-                    for service_type, request_lst in self.request_buffer.items():
-                        batch = []
-                        # grab min(MAX_BATCH_SIZE, REQUEST_SIZE) requests from buffer
-                        for _ in range(min(self.dynamic_batching_max_batch_size, len(request_lst))):
-                            batch.append(request_lst.popleft())
-
+                now = time.monotonic()
+                for service_type, request_lst in self.request_buffer.items():
+                    labels = (self.name, getattr(service_type, "name", str(service_type)))
+                    batch = []
+                    # grab min(MAX_BATCH_SIZE, REQUEST_SIZE) live requests from buffer
+                    while request_lst and len(batch) < self.dynamic_batching_max_batch_size:
+                        req = request_lst.popleft()
+                        if req["response"].done():
+                            # abandoned by its caller, e.g. the client disconnected
+                            metrics["dropped"].labels(*labels, "cancelled").inc()
+                        elif req.get("deadline") is not None and req["deadline"] <= now:
+                            req["response"].set_exception(asyncio.TimeoutError("Request expired before batching"))
+                            metrics["dropped"].labels(*labels, "expired").inc()
+                        else:
+                            metrics["queue_time"].labels(*labels).observe(now - req.get("enqueue_time", now))
+                            batch.append(req)
+                    metrics["queue_depth"].labels(*labels).set(len(request_lst))
+                    if batch:
+                        metrics["batch_size"].labels(*labels).observe(len(batch))
                         runtime_batch[service_type] = batch
 
             # Run batched inference on the batch and set results
             for service_type, batch in runtime_batch.items():
-                if not batch:
-                    continue
-                results = await self.dynamic_batching_infer(service_type, batch)
+                try:
+                    results = await self.dynamic_batching_infer(service_type, batch)
+                except Exception as e:
+                    logger.error(f"Dynamic batching inference failed: {e}")
+                    results = [e] * len(batch)
 
                 for req, result in zip(batch, results):
-                    req["response"].set_result(result)
+                    if req["response"].done():
+                        continue
+                    if isinstance(result, BaseException):
+                        req["response"].set_exception(result)
+                    else:
+                        req["response"].set_result(result)
 
     async def dynamic_batching_infer(self, service_type: Enum, batch: list[dict]):
-        """Need to implement."""
-        raise NotImplementedError("Unimplemented dynamic batching inference!")
+        """Run inference on a batch, by default through invoke_batch of dynamic_batching_component.
+
+        :return: one result per request of the batch, exceptions are raised to their request only
+        """
+        if self.dynamic_batching_component is None:
+            raise NotImplementedError("Unimplemented dynamic batching inference!")
+        return await self.dynamic_batching_component.invoke_batch([req["request"] for req in batch])
 
     def _validate_env(self):
         """Check whether to use the microservice locally."""
@@ -193,7 +309,7 @@ def register_microservice(
     provider_endpoint: Optional[str] = None,
     methods: List[str] = ["POST"],
     dynamic_batching: bool = False,
-    dynamic_batching_timeout: int = 1,
+    dynamic_batching_timeout: float = 0.01,
     dynamic_batching_max_batch_size: int = 32,
     enable_mcp: bool = False,
     description: str = None,
@@ -2,8 +2,9 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import asyncio
+import collections
 import contextlib
-import copy
+import inspect
 import json
 import os
 import re
@@ -12,7 +13,6 @@ import time
 from typing import Dict, List
 
 import aiohttp
-import requests
 from fastapi.responses import StreamingResponse
 from prometheus_client import Gauge, Histogram
 from pydantic import BaseModel
@@ -20,13 +20,21 @@ from pydantic import BaseModel
 from ..proto.docarray import LLMParams
 from ..telemetry.opea_telemetry import opea_telemetry, tracer
 from .constants import ServiceType
-from .dag import DAG
+from .dag import DAG, ExecutionPlan, RuntimeGraph
 from .logger import CustomLogger
 
 logger = CustomLogger("comps-core-orchestrator")
 LOGFLAG = os.getenv("LOGFLAG", False)
 ENABLE_OPEA_TELEMETRY = bool(os.environ.get("TELEMETRY_ENDPOINT"))
 
+# Defaults of the connection pool every ServiceOrchestrator keeps to its micro services
+HTTP_TIMEOUT = float(os.getenv("MEGA_HTTP_TIMEOUT", 2000))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("MEGA_HTTP_CONNECT_TIMEOUT", 30))
+HTTP_POOL_LIMIT = int(os.getenv("MEGA_HTTP_POOL_LIMIT", 1000))
+HTTP_POOL_LIMIT_PER_SERVICE = int(os.getenv("MEGA_HTTP_POOL_LIMIT_PER_SERVICE", 100))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("MEGA_HTTP_KEEPALIVE_TIMEOUT", 60))
+HTTP_DNS_CACHE_TTL = int(os.getenv("MEGA_HTTP_DNS_CACHE_TTL", 300))
+
 
 class OrchestratorMetrics:
     def __init__(self) -> None:
@@ -103,15 +111,41 @@ _metrics = OrchestratorMetrics()
 class ServiceOrchestrator(DAG):
     """Manage 1 or N micro services in a DAG through Python API."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        timeout: float = HTTP_TIMEOUT,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        pool_limit: int = HTTP_POOL_LIMIT,
+        pool_limit_per_service: int = HTTP_POOL_LIMIT_PER_SERVICE,
+        keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = HTTP_DNS_CACHE_TTL,
+    ) -> None:
+        """Initialize the orchestrator.
+
+        :param timeout: total timeout in seconds of one call to a micro service
+        :param connect_timeout: timeout in seconds to acquire a pooled connection or open a new one
+        :param pool_limit: maximum number of simultaneous connections to all micro services
+        :param pool_limit_per_service: maximum number of simultaneous connections to one micro service endpoint
+        :param keepalive_timeout: seconds an idle connection is kept open for reuse
+        :param dns_cache_ttl: seconds resolved micro service host names are cached
+        """
         self.metrics = _metrics
         self.services = {}  # all services, id -> service
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.pool_limit = pool_limit
+        self.pool_limit_per_service = pool_limit_per_service
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self._session = None
+        self._session_loop = None
         super().__init__()
+        self.execution_plan = ExecutionPlan(self.graph)
 
     def add(self, service):
         if service.name not in self.services:
             self.services[service.name] = service
             self.add_node_if_not_exists(service.name)
+            self.execution_plan = ExecutionPlan(self.graph)
         else:
             raise Exception(f"Service {service.name} already exists!")
         return self
@@ -119,84 +153,108 @@ class ServiceOrchestrator(DAG):
     def flow_to(self, from_service, to_service):
         try:
             self.add_edge(from_service.name, to_service.name)
+            self.execution_plan = ExecutionPlan(self.graph)
             return True
         except Exception as e:
             logger.error(e)
             return False
 
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session shared by all requests running on the current event loop."""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # micro services are addressed by host:port, so the per-host limit bounds each of them
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.pool_limit_per_service,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, trust_env=True)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        """Close the pooled HTTP session, e.g. from HTTPService.add_shutdown_event."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+
     @opea_telemetry
     async def schedule(self, initial_inputs: Dict | BaseModel, llm_parameters: LLMParams = LLMParams(), **kwargs):
         req_start = time.monotonic()
         self.metrics.pending_update(True)
 
         result_dict = {}
-        runtime_graph = DAG()
-        runtime_graph.graph = copy.deepcopy(self.graph)
+        plan = self.execution_plan
+        runtime_graph = RuntimeGraph(plan)
+        # number of predecessors each node still waits for, pruned edges are not waited for
+        waiting_for = dict(plan.in_degree)
         if LOGFLAG:
             logger.info(initial_inputs)
 
-        timeout = aiohttp.ClientTimeout(total=2000)
-        async with aiohttp.ClientSession(trust_env=True, timeout=timeout) as session:
-            pending = {
-                asyncio.create_task(
-                    self.execute(session, req_start, node, initial_inputs, runtime_graph, llm_parameters, **kwargs)
-                )
-                for node in self.ind_nodes()
-            }
-            ind_nodes = self.ind_nodes()
-
-            while pending:
-                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
-                for done_task in done:
-                    response, node = await done_task
-                    result_dict[node] = response
-
-                    # traverse the current node's downstream nodes and execute if all one's predecessors are finished
-                    downstreams = runtime_graph.downstream(node)
-
-                    # remove all the black nodes that are skipped to be forwarded to
-                    if not isinstance(response, StreamingResponse) and "downstream_black_list" in response:
-                        for black_node in response["downstream_black_list"]:
-                            for downstream in reversed(downstreams):
-                                try:
-                                    if re.findall(black_node, downstream):
-                                        if LOGFLAG:
-                                            logger.info(f"skip forwardding to {downstream}...")
-                                        runtime_graph.delete_edge(node, downstream)
-                                        downstreams.remove(downstream)
-                                except re.error as e:
-                                    logger.error("Pattern invalid! Operation cancelled.")
-                            if len(downstreams) == 0 and llm_parameters.stream:
-                                # turn the response to a StreamingResponse
-                                # to make the response uniform to UI
-                                def fake_stream(text):
-                                    yield "data: b'" + text + "'\n\n"
-                                    yield "data: [DONE]\n\n"
-
-                                result_dict[node] = StreamingResponse(
-                                    fake_stream(response["text"]), media_type="text/event-stream"
-                                )
+        session = self.get_session()
+        pending = {
+            asyncio.create_task(
+                self.execute(session, req_start, node, initial_inputs, runtime_graph, llm_parameters, **kwargs)
+            )
+            for node in plan.ind_nodes
+        }
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for done_task in done:
+                response, node = await done_task
+                result_dict[node] = response
+
+                # traverse the current node's downstream nodes and execute if all one's predecessors are finished
+                downstreams = runtime_graph.downstream(node)
+
+                # remove all the black nodes that are skipped to be forwarded to
+                if not isinstance(response, StreamingResponse) and "downstream_black_list" in response:
+                    for black_node in response["downstream_black_list"]:
+                        for downstream in reversed(downstreams):
+                            try:
+                                if re.findall(black_node, downstream):
+                                    if LOGFLAG:
+                                        logger.info(f"skip forwardding to {downstream}...")
+                                    runtime_graph.delete_edge(node, downstream)
+                                    downstreams.remove(downstream)
+                                    waiting_for[downstream] -= 1
+                            except re.error as e:
+                                logger.error("Pattern invalid! Operation cancelled.")
+                        if len(downstreams) == 0 and llm_parameters.stream:
+                            # turn the response to a StreamingResponse
+                            # to make the response uniform to UI
+                            def fake_stream(text):
+                                yield "data: b'" + text + "'\n\n"
+                                yield "data: [DONE]\n\n"
+
+                            result_dict[node] = StreamingResponse(
+                                fake_stream(response["text"]), media_type="text/event-stream"
+                            )
 
-                    for d_node in downstreams:
-                        if all(i in result_dict for i in runtime_graph.predecessors(d_node)):
-                            inputs = self.process_outputs(runtime_graph.predecessors(d_node), result_dict)
-                            pending.add(
-                                asyncio.create_task(
-                                    self.execute(
-                                        session, req_start, d_node, inputs, runtime_graph, llm_parameters, **kwargs
-                                    )
+                for d_node in downstreams:
+                    waiting_for[d_node] -= 1
+                    if waiting_for[d_node] == 0:
+                        inputs = self.process_outputs(runtime_graph.predecessors(d_node), result_dict)
+                        pending.add(
+                            asyncio.create_task(
+                                self.execute(
+                                    session, req_start, d_node, inputs, runtime_graph, llm_parameters, **kwargs
                                 )
                             )
-        nodes_to_keep = []
-        for i in ind_nodes:
-            nodes_to_keep.append(i)
-            nodes_to_keep.extend(runtime_graph.all_downstreams(i))
+                        )
+        # every node is reachable from an independent one unless edges were pruned
+        if runtime_graph.deleted_edges:
+            nodes_to_keep = set(plan.ind_nodes)
+            for i in plan.ind_nodes:
+                nodes_to_keep.update(runtime_graph.all_downstreams(i))
 
-        all_nodes = list(runtime_graph.graph.keys())
-
-        for node in all_nodes:
-            if node not in nodes_to_keep:
-                runtime_graph.delete_node_if_exists(node)
+            for node in plan.nodes:
+                if node not in nodes_to_keep:
+                    runtime_graph.delete_node_if_exists(node)
 
         if not llm_parameters.stream:
             self.metrics.pending_update(False)
@@ -230,6 +288,62 @@ class ServiceOrchestrator(DAG):
                     except Exception as e:
                         raise e
 
+    async def wrap_async_iterable(self, aiterable, is_first=True):
+
+        with tracer.start_as_current_span("llm_generate_stream") if ENABLE_OPEA_TELEMETRY else contextlib.nullcontext():
+            while True:
+                with (
+                    tracer.start_as_current_span("llm_generate_stream_first_token")
+                    if is_first and ENABLE_OPEA_TELEMETRY
+                    else contextlib.nullcontext()
+                ):
+                    try:
+                        token = await aiterable.__anext__()
+                    except StopAsyncIteration:
+                        # Exiting the iterable loop cleanly
+                        break
+                    yield token
+                    is_first = False
+
+    @staticmethod
+    async def _iter_http_chunks(response: aiohttp.ClientResponse):
+        # one item per HTTP chunk (i.e. per SSE event of the LLM servers), like requests' iter_content(None)
+        chunked = response.headers.get("Transfer-Encoding", "").lower() == "chunked"
+        buffer = b""
+        async for data, end_of_http_chunk in response.content.iter_chunks():
+            if not chunked:
+                yield data
+                continue
+            buffer += data
+            if end_of_http_chunk:
+                yield buffer
+                buffer = b""
+        if buffer:
+            yield buffer
+
+    def _align_stream(self, gen, **kwargs):
+        """Pass the async token stream through align_generator.
+
+        Overrides written as plain (sync) generators get a blocking view of the stream that is
+        driven on the event loop, so the network I/O itself never leaves the loop.
+        """
+        align_generator = getattr(self.align_generator, "__func__", self.align_generator)
+        if align_generator is ServiceOrchestrator.align_generator or inspect.isasyncgenfunction(align_generator):
+            return self.align_generator(gen, **kwargs)
+        return self.align_generator(self._iterate_in_loop(gen, asyncio.get_running_loop()), **kwargs)
+
+    @staticmethod
+    def _iterate_in_loop(agen, loop):
+        # StreamingResponse iterates sync bodies in a worker thread, each step is scheduled back on the loop
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    break
+        finally:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), loop)
+
     @opea_telemetry
     async def execute(
         self,
@@ -259,35 +373,17 @@ class ServiceOrchestrator(DAG):
         else:
             endpoint = self.services[cur_node].endpoint_path(None)
         if is_llm_vlm and llm_parameters.stream:
-            # Still leave to sync requests.post for StreamingResponse
             if LOGFLAG:
                 logger.info(inputs)
+            headers = {"Content-type": "application/json"}
+            if access_token:
+                headers["Authorization"] = f"Bearer {access_token}"
             with (
                 tracer.start_as_current_span(f"{cur_node}_asyn_generate")
                 if ENABLE_OPEA_TELEMETRY
                 else contextlib.nullcontext()
             ):
-                if access_token:
-                    response = requests.post(
-                        url=endpoint,
-                        data=json.dumps(inputs),
-                        headers={"Content-type": "application/json", "Authorization": f"Bearer {access_token}"},
-                        proxies={"http": None},
-                        stream=True,
-                        timeout=2000,
-                    )
-
-                else:
-                    response = requests.post(
-                        url=endpoint,
-                        data=json.dumps(inputs),
-                        headers={
-                            "Content-type": "application/json",
-                        },
-                        proxies={"http": None},
-                        stream=True,
-                        timeout=2000,
-                    )
+                response = await session.post(endpoint, json=inputs, headers=headers)
 
             downstream = runtime_graph.downstream(cur_node)
             if downstream:
@@ -296,61 +392,64 @@ class ServiceOrchestrator(DAG):
                 hitted_ends = [".", "?", "!", "。", "，", "！"]
                 downstream_endpoint = self.services[downstream[0]].endpoint_path()
 
-            def generate():
+            async def post_downstream(text):
+                async with session.post(downstream_endpoint, json={"text": text}, headers=headers) as res:
+                    res_json = await res.json()
+                if "text" in res_json:
+                    return res_json["text"]
+                else:
+                    raise Exception("Other response types not supported yet!")
+
+            async def generate():
                 token_start = req_start
-                if response:
-                    # response.elapsed = time until first headers received
-                    buffered_chunk_str = ""
-                    is_first = True
-                    for chunk in self.wrap_iterable(response.iter_content(chunk_size=None)):
-                        if chunk:
-                            if downstream:
-                                chunk = chunk.decode("utf-8")
-                                buffered_chunk_str += self.extract_chunk_str(chunk)
-                                is_last = chunk.endswith("[DONE]\n\n")
-                                if (buffered_chunk_str and buffered_chunk_str[-1] in hitted_ends) or is_last:
-                                    if access_token:
-                                        res = requests.post(
-                                            url=downstream_endpoint,
-                                            data=json.dumps({"text": buffered_chunk_str}),
-                                            headers={
-                                                "Content-type": "application/json",
-                                                "Authorization": f"Bearer {access_token}",
-                                            },
-                                            proxies={"http": None},
-                                            timeout=2000,
-                                        )
-                                    else:
-                                        res = requests.post(
-                                            url=downstream_endpoint,
-                                            data=json.dumps({"text": buffered_chunk_str}),
-                                            headers={
-                                                "Content-type": "application/json",
-                                            },
-                                            proxies={"http": None},
-                                            timeout=2000,
+                is_first = True
+                # sentences posted downstream but not yet emitted, kept in LLM output order
+                in_flight = collections.deque()
+
+                def emit_ready():
+                    nonlocal token_start, is_first
+                    while in_flight and in_flight[0][0].done():
+                        task, is_last = in_flight.popleft()
+                        yield from self.token_generator(task.result(), token_start, is_first=is_first, is_last=is_last)
+                        token_start = time.monotonic()
+                        is_first = False
+
+                try:
+                    if response.ok:
+                        buffered_chunk_str = ""
+                        async for chunk in self.wrap_async_iterable(self._iter_http_chunks(response)):
+                            if chunk:
+                                if downstream:
+                                    chunk = chunk.decode("utf-8")
+                                    buffered_chunk_str += self.extract_chunk_str(chunk)
+                                    is_last = chunk.endswith("[DONE]\n\n")
+                                    if (buffered_chunk_str and buffered_chunk_str[-1] in hitted_ends) or is_last:
+                                        # keep reading the LLM stream while the downstream handles this sentence
+                                        in_flight.append(
+                                            (asyncio.create_task(post_downstream(buffered_chunk_str)), is_last)
                                         )
-                                    res_json = res.json()
-                                    if "text" in res_json:
-                                        res_txt = res_json["text"]
-                                    else:
-                                        raise Exception("Other response types not supported yet!")
-                                    buffered_chunk_str = ""  # clear
-                                    yield from self.token_generator(
-                                        res_txt, token_start, is_first=is_first, is_last=is_last
-                                    )
-                                    token_start = time.monotonic()
+                                        buffered_chunk_str = ""  # clear
+                                    for token in emit_ready():
+                                        yield token
+                                else:
+                                    token_start = self.metrics.token_update(token_start, is_first)
                                     is_first = False
-                            else:
-                                token_start = self.metrics.token_update(token_start, is_first)
-                                is_first = False
-                                yield chunk
+                                    yield chunk
+
+                        while in_flight:
+                            await asyncio.wait([in_flight[0][0]])
+                            for token in emit_ready():
+                                yield token
 
-                    self.metrics.request_update(req_start)
-                    self.metrics.pending_update(False)
+                        self.metrics.request_update(req_start)
+                        self.metrics.pending_update(False)
+                finally:
+                    for task, _ in in_flight:
+                        task.cancel()
+                    response.release()
 
             return (
-                StreamingResponse(self.align_generator(generate(), **kwargs), media_type="text/event-stream"),
+                StreamingResponse(self._align_stream(generate(), **kwargs), media_type="text/event-stream"),
                 cur_node,
             )
         else:
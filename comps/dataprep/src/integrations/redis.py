@@ -5,7 +5,10 @@
 
 import asyncio
 import json
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Optional, Union
 
@@ -23,15 +26,19 @@ from redis.commands.search.indexDefinition import IndexDefinition, IndexType
 from comps import CustomLogger, DocPath, OpeaComponent, OpeaComponentRegistry, ServiceType
 from comps.cores.proto.api_protocol import DataprepRequest, RedisDataprepRequest
 from comps.dataprep.src.utils import (
+    PDF_LOADER_WORKERS,
     create_upload_folder,
     document_loader,
     encode_filename,
     format_search_results,
     get_separators,
     get_tables_result,
+    iter_pdf_pages,
     parse_html_new,
     remove_folder_with_ignore,
     save_content_to_local_disk,
+    set_pdf_loader_workers,
+    split_text_stream,
 )
 
 logger = CustomLogger("redis_dataprep")
@@ -52,6 +59,13 @@ KEY_INDEX_NAME = os.getenv("KEY_INDEX_NAME", "file-keys")
 TIMEOUT_SECONDS = int(os.getenv("TIMEOUT_SECONDS", 600))
 SEARCH_BATCH_SIZE = int(os.getenv("SEARCH_BATCH_SIZE", 10))
 
+# Ingestion Pipeline Configuration
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", 32))
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", 4))
+INGEST_WRITE_BATCH_SIZE = int(os.getenv("INGEST_WRITE_BATCH_SIZE", 1000))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 16))
+
 # Vector Schema Configuration
 DEFAULT_VECTOR_SCHEMA = {"algorithm": "HNSW", "m": 16, "ef_construction": 200}
 VECTOR_SCHEMA = os.getenv("VECTOR_SCHEMA", json.dumps(DEFAULT_VECTOR_SCHEMA))
@@ -106,6 +120,7 @@ def format_redis_conn_from_env():
 
 REDIS_URL = format_redis_conn_from_env()
 redis_pool = redis.ConnectionPool.from_url(REDIS_URL)
+parse_executor = None
 
 
 async def check_index_existance(client):
@@ -194,66 +209,8 @@ async def delete_by_id(client, id):
     return True
 
 
-async def ingest_chunks_to_redis(file_name: str, chunks: List, embedder, index_name: str):
-    if logflag:
-        logger.info(f"[ redis ingest chunks ] file name: {file_name}")
-
-    # Batch size
-    batch_size = 32
-    num_chunks = len(chunks)
-
-    # if data will be saved to a different index name than the default one
-    ingest_index_name = index_name if index_name else INDEX_NAME
-    # Parse vector schema
-    try:
-        vector_schema = json.loads(VECTOR_SCHEMA)
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid VECTOR_SCHEMA format: {e}")
-        vector_schema = DEFAULT_VECTOR_SCHEMA
-
-    file_ids = []
-    for i in range(0, num_chunks, batch_size):
-        if logflag:
-            logger.info(f"[ redis ingest chunks ] Current batch: {i}")
-        batch_chunks = chunks[i : i + batch_size]
-        batch_texts = batch_chunks
-
-        _, keys = await asyncio.to_thread(
-            Redis.from_texts_return_keys,
-            texts=batch_texts,
-            embedding=embedder,
-            index_name=ingest_index_name,
-            redis_url=REDIS_URL,
-            vector_schema=vector_schema,
-        )
-        if logflag:
-            logger.info(f"[ redis ingest chunks ] keys: {keys}")
-        file_ids.extend(keys)
-        if logflag:
-            logger.info(f"[ redis ingest chunks ] Processed batch {i//batch_size + 1}/{(num_chunks-1)//batch_size + 1}")
-
-    # store file_ids into index file-keys
-    r = await aioredis.from_url(REDIS_URL)
-    client = r.ft(KEY_INDEX_NAME)
-    if not await check_index_existance(client):
-        await create_index(client)
-
-    try:
-        await store_by_id(
-            client,
-            key=encode_filename(ingest_index_name) + "_" + file_name,
-            value="#".join(file_ids),
-            ingest_index_name=ingest_index_name,
-        )
-    except Exception as e:
-        if logflag:
-            logger.info(f"[ redis ingest chunks ] {e}. Fail to store chunks of file {file_name}.")
-        raise HTTPException(status_code=500, detail=f"Fail to store chunks of file {file_name}.")
-    return True
-
-
-async def ingest_data_to_redis(doc_path: DocPath, embedder, index_name):
-    """Ingest document to Redis."""
+async def split_document(doc_path: DocPath) -> List:
+    """Load a document and split it into chunks."""
     path = doc_path.path
     if logflag:
         logger.info(f"[ redis ingest data ] Parsing document {path}.")
@@ -273,17 +230,23 @@ async def ingest_data_to_redis(doc_path: DocPath, embedder, index_name):
             separators=get_separators(),
         )
 
-    content = await document_loader(path)
-    if logflag:
-        logger.info("[ redis ingest data ] file content loaded")
-
     structured_types = [".xlsx", ".csv", ".json", "jsonl"]
     _, ext = os.path.splitext(path)
 
-    if ext in structured_types:
-        chunks = content
+    if path.endswith(".pdf"):
+        # split the pages as they are extracted instead of loading the whole document first
+        chunks = await asyncio.to_thread(
+            lambda: list(split_text_stream(iter_pdf_pages(path), text_splitter, doc_path.chunk_size))
+        )
     else:
-        chunks = await asyncio.to_thread(text_splitter.split_text, content)
+        content = await document_loader(path)
+        if logflag:
+            logger.info("[ redis ingest data ] file content loaded")
+
+        if ext in structured_types:
+            chunks = content
+        else:
+            chunks = await asyncio.to_thread(text_splitter.split_text, content)
 
     ### Specially processing for the table content in PDFs
     if doc_path.process_table and path.endswith(".pdf"):
@@ -295,9 +258,209 @@ async def ingest_data_to_redis(doc_path: DocPath, embedder, index_name):
             logger.info(f"[ redis ingest data ] No table chunks found in {path}.")
     if logflag:
         logger.info(f"[ redis ingest data ] Done preprocessing. Created {len(chunks)} chunks of the given file.")
+    return chunks
+
+
+def get_parse_executor():
+    """Return the process pool parsing documents, None to parse them in the service process.
+
+    The workers are spawned rather than forked, the service process runs threads which may hold locks when forking.
+    They run the redis_parse_worker module, each extracts PDF pages with its share of the PDF loader processes.
+    """
+    global parse_executor
+    if parse_executor is None and INGEST_PARSE_WORKERS > 0:
+        parse_executor = ProcessPoolExecutor(
+            max_workers=INGEST_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=set_pdf_loader_workers,
+            initargs=(max(1, PDF_LOADER_WORKERS // INGEST_PARSE_WORKERS),),
+        )
+    return parse_executor
+
+
+class IngestionProgress:
+    """Progress and per-stage throughput of the ingestion pipeline, in the format of /v1/statistics.
+
+    Throughputs are items per second of wall time during which at least one ingestion was running.
+    """
+
+    STAGES = ("parse", "embed", "write")
+
+    def __init__(self):
+        self.files_total = 0
+        self.files_done = 0
+        self.chunks_total = 0
+        self.processed = {stage: 0 for stage in self.STAGES}
+        self.running = 0
+        self.active_time = 0.0
+        self.active_since = None
+
+    def start(self, files: int):
+        if not self.running:
+            self.active_since = time.monotonic()
+        self.running += 1
+        self.files_total += files
+
+    def stop(self):
+        self.running -= 1
+        if not self.running:
+            self.active_time += time.monotonic() - self.active_since
+            self.active_since = None
+
+    def record(self, stage: str, items: int):
+        self.processed[stage] += items
+
+    def get_statistics(self) -> dict:
+        active_time = self.active_time
+        if self.active_since is not None:
+            active_time += time.monotonic() - self.active_since
+        statistics = {
+            "running": self.running,
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "chunks_total": self.chunks_total,
+        }
+        for stage in self.STAGES:
+            statistics[f"{stage}_processed"] = self.processed[stage]
+            statistics[f"{stage}_throughput"] = self.processed[stage] / active_time if active_time else None
+        return statistics
+
+
+ingestion_progress = IngestionProgress()
+
+
+async def ingest_documents_to_redis(doc_paths: List[DocPath], embedder, index_name: str):
+    """Ingest documents to Redis through a staged pipeline.
+
+    Documents are parsed and split in a process pool, their chunks are embedded in batches with up to
+    INGEST_EMBED_CONCURRENCY batches in flight, and one writer stores the embedded batches in Redis with
+    pipelined commands. The stages are connected by bounded queues, so a slow stage holds back the previous ones.
+    """
+    # if data will be saved to a different index name than the default one
+    ingest_index_name = index_name if index_name else INDEX_NAME
+    # Parse vector schema
+    try:
+        vector_schema = json.loads(VECTOR_SCHEMA)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid VECTOR_SCHEMA format: {e}")
+        vector_schema = DEFAULT_VECTOR_SCHEMA
+
+    progress = ingestion_progress
+    embed_queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+    write_queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+    parse_semaphore = asyncio.Semaphore(max(INGEST_PARSE_WORKERS, 1))
+    files = {}  # document index -> (number of batches, batch number -> keys)
+
+    r = await aioredis.from_url(REDIS_URL)
+    key_client = r.ft(KEY_INDEX_NAME)
+    if not await check_index_existance(key_client):
+        await create_index(key_client)
+
+    async def store_file(doc_index):
+        num_batches, batch_keys = files.pop(doc_index)
+        file_name = doc_paths[doc_index].path.split("/")[-1]
+        file_ids = [key for i in range(num_batches) for key in batch_keys[i]]
+        try:
+            await store_by_id(
+                key_client,
+                key=encode_filename(ingest_index_name) + "_" + file_name,
+                value="#".join(file_ids),
+                ingest_index_name=ingest_index_name,
+            )
+        except Exception as e:
+            if logflag:
+                logger.info(f"[ redis ingest chunks ] {e}. Fail to store chunks of file {file_name}.")
+            raise HTTPException(status_code=500, detail=f"Fail to store chunks of file {file_name}.")
+        progress.files_done += 1
+        if logflag:
+            logger.info(
+                f"[ redis ingest chunks ] Stored file {file_name}, {progress.files_done}/{progress.files_total} files done"
+            )
+
+    async def parse(doc_index, doc_path):
+        async with parse_semaphore:
+            executor = get_parse_executor()
+            if executor:
+                from .redis_parse_worker import split_document_in_process
 
-    file_name = doc_path.path.split("/")[-1]
-    return await ingest_chunks_to_redis(file_name, chunks, embedder, index_name)
+                chunks = await asyncio.get_running_loop().run_in_executor(executor, split_document_in_process, doc_path)
+            else:
+                chunks = await split_document(doc_path)
+        progress.record("parse", 1)
+        progress.chunks_total += len(chunks)
+
+        batches = [chunks[i : i + INGEST_EMBED_BATCH_SIZE] for i in range(0, len(chunks), INGEST_EMBED_BATCH_SIZE)]
+        files[doc_index] = (len(batches), {})
+        if not batches:
+            await store_file(doc_index)
+        for i, batch in enumerate(batches):
+            await embed_queue.put((doc_index, i, batch))
+
+    async def parse_stage():
+        await asyncio.gather(*(parse(doc_index, doc_path) for doc_index, doc_path in enumerate(doc_paths)))
+        for _ in range(INGEST_EMBED_CONCURRENCY):
+            await embed_queue.put(None)
+
+    async def embed_worker():
+        while (item := await embed_queue.get()) is not None:
+            doc_index, i, texts = item
+            embeddings = await asyncio.to_thread(embedder.embed_documents, texts)
+            progress.record("embed", len(texts))
+            await write_queue.put((doc_index, i, texts, embeddings))
+
+    async def embed_stage():
+        await asyncio.gather(*(embed_worker() for _ in range(INGEST_EMBED_CONCURRENCY)))
+        await write_queue.put(None)
+
+    async def write_stage():
+        vector_store = None
+        done = False
+        while not done and (item := await write_queue.get()) is not None:
+            # write all the batches embedded meanwhile in one pipeline, up to INGEST_WRITE_BATCH_SIZE chunks
+            items = [item]
+            num_chunks = len(item[2])
+            while num_chunks < INGEST_WRITE_BATCH_SIZE and not write_queue.empty():
+                item = write_queue.get_nowait()
+                if item is None:
+                    done = True
+                    break
+                items.append(item)
+                num_chunks += len(item[2])
+
+            if vector_store is None:
+                vector_store = await asyncio.to_thread(
+                    Redis, REDIS_URL, ingest_index_name, embedder, vector_schema=vector_schema
+                )
+            keys = await asyncio.to_thread(
+                vector_store.add_texts,
+                [text for _, _, texts, _ in items for text in texts],
+                embeddings=[embedding for _, _, _, embeddings in items for embedding in embeddings],
+                batch_size=INGEST_WRITE_BATCH_SIZE,
+            )
+            progress.record("write", num_chunks)
+
+            offset = 0
+            for doc_index, i, texts, _ in items:
+                num_batches, batch_keys = files[doc_index]
+                batch_keys[i] = keys[offset : offset + len(texts)]
+                offset += len(texts)
+                if len(batch_keys) == num_batches:
+                    await store_file(doc_index)
+
+    progress.start(len(doc_paths))
+    tasks = [asyncio.create_task(stage()) for stage in (parse_stage, embed_stage, write_stage)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        progress.stop()
+    return True
+
+
+async def ingest_data_to_redis(doc_path: DocPath, embedder, index_name):
+    """Ingest document to Redis."""
+    return await ingest_documents_to_redis([doc_path], embedder, index_name)
 
 
 @OpeaComponentRegistry.register("OPEA_DATAPREP_REDIS")
@@ -306,11 +469,13 @@ class OpeaRedisDataprep(OpeaComponent):
 
     Attributes:
         client (redis.Redis): An instance of the redis client for vector database operations.
+        ingestion_progress (IngestionProgress): Progress and throughput of the ingestion pipeline.
     """
 
     def __init__(self, name: str, description: str, config: dict = None):
         super().__init__(name, ServiceType.DATAPREP.name.lower(), description, config)
         self.client = redis.Redis(connection_pool=redis_pool)
+        self.ingestion_progress = ingestion_progress
         self.data_index_client, self.key_index_client = asyncio.run(self._initialize_client())
         self.embedder = asyncio.run(self._initialize_embedder())
         health_status = asyncio.run(self.check_health())
@@ -416,47 +581,36 @@ class OpeaRedisDataprep(OpeaComponent):
         if files:
             if not isinstance(files, list):
                 files = [files]
-            uploaded_files = []
-
-            for file in files:
-                encode_file = encode_filename(file.filename)
-                index_name_id = encode_filename(INDEX_NAME if index_name is None else index_name)
-                doc_id = "file:" + index_name_id + "_" + encode_file
-
-                if logflag:
-                    logger.info(f"[ redis ingest ] processing file {doc_id}")
+            index_name_id = encode_filename(INDEX_NAME if index_name is None else index_name)
 
-                # check whether the file already exists
-                key_ids = None
-                try:
-                    result = await search_by_id(self.key_index_client, doc_id)
-                    key_ids = result.key_ids
+            # check whether any of the files already exists, or is uploaded twice, before ingesting them
+            doc_ids = ["file:" + index_name_id + "_" + encode_filename(file.filename) for file in files]
+            results = await asyncio.gather(*(search_by_id(self.key_index_client, doc_id) for doc_id in doc_ids))
+            for i, (file, result) in enumerate(zip(files, results)):
+                if doc_ids[i] in doc_ids[:i] or result is not None and getattr(result, "key_ids", None):
                     if logflag:
                         logger.info(f"[ redis ingest] File {file.filename} already exists.")
-                except Exception as e:
-                    logger.info(f"[ redis ingest] File {file.filename} does not exist.")
-                if key_ids:
                     raise HTTPException(
                         status_code=400,
                         detail=f"Uploaded file {file.filename} already exists. Please change file name or index name.",
                     )
 
-                save_path = upload_folder + encode_file
+            doc_paths = []
+            for file in files:
+                save_path = upload_folder + encode_filename(file.filename)
                 await save_content_to_local_disk(save_path, file)
-                await ingest_data_to_redis(
+                doc_paths.append(
                     DocPath(
                         path=save_path,
                         chunk_size=chunk_size,
                         chunk_overlap=chunk_overlap,
                         process_table=process_table,
                         table_strategy=table_strategy,
-                    ),
-                    self.embedder,
-                    index_name,
+                    )
                 )
-                uploaded_files.append(save_path)
-                if logflag:
-                    logger.info(f"[ redis ingest] Successfully saved file {save_path}")
+            await ingest_documents_to_redis(doc_paths, self.embedder, index_name)
+            if logflag:
+                logger.info(f"[ redis ingest] Successfully saved files {[doc_path.path for doc_path in doc_paths]}")
 
             result = {"status": 200, "message": "Data preparation succeeded"}
             if logflag:
@@ -467,42 +621,36 @@ class OpeaRedisDataprep(OpeaComponent):
             link_list = json.loads(link_list)  # Parse JSON string to list
             if not isinstance(link_list, list):
                 raise HTTPException(status_code=400, detail=f"Link_list {link_list} should be a list.")
-            for link in link_list:
-                encoded_link = encode_filename(link)
-                index_name_id = encode_filename(INDEX_NAME if index_name is None else index_name)
-                doc_id = "file:" + index_name_id + "_" + encoded_link + ".txt"
-                if logflag:
-                    logger.info(f"[ redis ingest] processing link {doc_id}")
+            index_name_id = encode_filename(INDEX_NAME if index_name is None else index_name)
 
-                # check whether the link file already exists
-                key_ids = None
-                try:
-                    result = await search_by_id(self.key_index_client, doc_id)
-                    key_ids = result.key_ids
+            # check whether any of the link files already exists, or is uploaded twice, before ingesting them
+            doc_ids = ["file:" + index_name_id + "_" + encode_filename(link) + ".txt" for link in link_list]
+            results = await asyncio.gather(*(search_by_id(self.key_index_client, doc_id) for doc_id in doc_ids))
+            for i, (link, result) in enumerate(zip(link_list, results)):
+                if doc_ids[i] in doc_ids[:i] or result is not None and getattr(result, "key_ids", None):
                     if logflag:
                         logger.info(f"[ redis ingest] Link {link} already exists.")
-                except Exception as e:
-                    logger.info(f"[ redis ingest] Link {link} does not exist. Keep storing.")
-                if key_ids:
                     raise HTTPException(
                         status_code=400,
                         detail=f"Uploaded link {link} already exists. Please change another link or index_name.",
                     )
 
-                save_path = upload_folder + encoded_link + ".txt"
-                content = parse_html_new([link], chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+            async def save_link(link):
+                save_path = upload_folder + encode_filename(link) + ".txt"
+                content = await asyncio.to_thread(
+                    parse_html_new, [link], chunk_size=chunk_size, chunk_overlap=chunk_overlap
+                )
                 await save_content_to_local_disk(save_path, content)
-                await ingest_data_to_redis(
-                    DocPath(
-                        path=save_path,
-                        chunk_size=chunk_size,
-                        chunk_overlap=chunk_overlap,
-                        process_table=process_table,
-                        table_strategy=table_strategy,
-                    ),
-                    self.embedder,
-                    index_name,
+                return DocPath(
+                    path=save_path,
+                    chunk_size=chunk_size,
+                    chunk_overlap=chunk_overlap,
+                    process_table=process_table,
+                    table_strategy=table_strategy,
                 )
+
+            doc_paths = await asyncio.gather(*(save_link(link) for link in link_list))
+            await ingest_documents_to_redis(doc_paths, self.embedder, index_name)
             if logflag:
                 logger.info(f"[ redis ingest] Successfully saved link list {link_list}")
             return {"status": 200, "message": "Data preparation succeeded"}
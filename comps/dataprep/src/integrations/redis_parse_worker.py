@@ -0,0 +1,16 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+# The parse workers of the Redis ingestion pipeline only need this module and the ones it imports
+
+import asyncio
+from typing import List
+
+from comps import DocPath
+
+from .redis import split_document
+
+
+def split_document_in_process(doc_path: DocPath) -> List:
+    """Entry point of the parse workers of the ingestion pipeline."""
+    return asyncio.run(split_document(doc_path))
@@ -43,11 +43,9 @@ logflag = os.getenv("LOGFLAG", False)
 upload_folder = "./uploaded_files/"
 
 dataprep_component_name = os.getenv("DATAPREP_COMPONENT_NAME", "OPEA_DATAPREP_REDIS")
-# Initialize OpeaComponentLoader
-loader = OpeaDataprepLoader(
-    dataprep_component_name,
-    description=f"OPEA DATAPREP Component: {dataprep_component_name}",
-)
+# The component is loaded when the service starts rather than on import, the worker processes spawned by the
+# components import this module too
+loader = None
 
 
 async def resolve_dataprep_request(request: Request):
@@ -252,5 +250,13 @@ async def get_list_of_indices():
 
 if __name__ == "__main__":
     logger.info("OPEA Dataprep Microservice is starting...")
+    # Initialize OpeaComponentLoader
+    loader = OpeaDataprepLoader(
+        dataprep_component_name,
+        description=f"OPEA DATAPREP Component: {dataprep_component_name}",
+    )
+    # report the progress of components ingesting through a pipeline in /v1/statistics
+    if getattr(loader.component, "ingestion_progress", None) is not None:
+        statistics_dict["opea_service@dataprep_ingestion"] = loader.component.ingestion_progress
     create_upload_folder(upload_folder)
     opea_microservices["opea_service@dataprep"].start()
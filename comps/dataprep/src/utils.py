@@ -5,7 +5,9 @@ import asyncio
 import base64
 import errno
 import functools
+import hashlib
 import json
+import math
 import multiprocessing
 import os
 import re
@@ -13,11 +15,12 @@ import shutil
 import signal
 import subprocess
 import tempfile
+import threading
 import timeit
 import unicodedata
 import urllib.parse
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Union
 from urllib.parse import urlparse, urlunparse
@@ -46,10 +49,24 @@ from langchain_community.document_loaders import (
 from langchain_community.llms import HuggingFaceEndpoint
 
 from comps import CustomLogger
+from comps.cores.common.cache import LRUCache
 
 logger = CustomLogger("prepare_doc_util")
 logflag = os.getenv("LOGFLAG", False)
 
+# PDF pages are extracted by a process pool sized to the available cores, processes which are themselves workers of
+# a pool, e.g. the parse workers of the Redis ingestion pipeline, get their share of the cores from set_pdf_loader_workers
+PDF_LOADER_WORKERS = int(os.getenv("PDF_LOADER_WORKERS", 0)) or (
+    len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+)
+# OCR results are cached by image hash in an LRU of each process, the PDF loader processes do not share their caches
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", 1024))
+
+pdf_loader_workers = PDF_LOADER_WORKERS
+pdf_executor = None
+ocr_cache = LRUCache(OCR_CACHE_SIZE)
+ocr_cache_lock = threading.Lock()
+
 
 class TimeoutError(Exception):
     pass
@@ -115,6 +132,22 @@ def get_separators():
     return separators
 
 
+def ocr_image(img_bytes):
+    """OCR an image, images already seen by this process are served from a cache keyed by their hash.
+
+    The cache is per process: an image repeated in the pages of several PDF loader processes is OCRed by each of them.
+    """
+    key = hashlib.sha256(img_bytes).hexdigest()
+    with ocr_cache_lock:
+        text = ocr_cache.get(key)
+    if text is None:
+        img_array = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
+        text = pytesseract.image_to_string(img_array, lang="eng", config="--psm 6")
+        with ocr_cache_lock:
+            ocr_cache.set(key, text)
+    return text
+
+
 def process_page(doc, idx):
     page = doc.load_page(idx)
     pagetext = page.get_text().strip()
@@ -128,8 +161,7 @@ def process_page(doc, idx):
             img_bytes = img_data["image"]
 
             # process images
-            img_array = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), cv2.IMREAD_COLOR)
-            img_result = pytesseract.image_to_string(img_array, lang="eng", config="--psm 6")
+            img_result = ocr_image(img_bytes)
 
             # add results
             pageimg = img_result.strip()
@@ -138,17 +170,84 @@ def process_page(doc, idx):
     return result
 
 
+def process_pdf_pages(pdf_path, start, stop):
+    """Extract the text of the pages [start, stop) of a PDF, in the PDF loader processes."""
+    with fitz.open(pdf_path) as doc:
+        return [process_page(doc, idx) for idx in range(start, stop)]
+
+
+def set_pdf_loader_workers(workers):
+    """Set the size of the PDF loader pool of this process, 1 to extract the pages in the process itself.
+
+    It is the initializer of the process pools whose workers load PDFs, so that their pools share the cores.
+    """
+    global pdf_loader_workers
+    pdf_loader_workers = workers
+
+
+def get_pdf_executor():
+    """Return the process pool extracting PDF pages, None to extract them in the current process.
+
+    The workers are spawned rather than forked, the process may run threads which hold locks when forking.
+    """
+    global pdf_executor
+    if pdf_loader_workers <= 1:
+        return None
+    if pdf_executor is None:
+        pdf_executor = ProcessPoolExecutor(
+            max_workers=pdf_loader_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return pdf_executor
+
+
+def iter_pdf_pages(pdf_path):
+    """Yield the text of the pages of a PDF in page order, each one as soon as it is extracted.
+
+    Pages are extracted by the PDF loader processes in contiguous ranges, a few ranges per process.
+    """
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+        executor = get_pdf_executor() if page_count > 1 else None
+        if executor is None:
+            for idx in range(page_count):
+                yield process_page(doc, idx)
+            return
+
+    range_size = math.ceil(page_count / (pdf_loader_workers * 4))
+    futures = [
+        executor.submit(process_pdf_pages, pdf_path, start, min(start + range_size, page_count))
+        for start in range(0, page_count, range_size)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
 def load_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    results = []
+    return "".join(iter_pdf_pages(pdf_path))
+
 
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        futures = [executor.submit(process_page, doc, i) for i in range(doc.page_count)]
-        for future in as_completed(futures):
-            results.append(future.result())
+def split_text_stream(texts, text_splitter, chunk_size):
+    """Split a stream of texts, e.g. the pages of a document, into chunks without joining them first.
 
-    combined_result = "".join(results)
-    return combined_result
+    The texts are split whenever more than a few chunks are buffered. The last chunk of each split is carried
+    over to the next one, so chunks still span the boundaries between texts.
+    """
+    buffer = ""
+    for text in texts:
+        buffer += text
+        if len(buffer) < 4 * chunk_size:
+            continue
+        chunks = text_splitter.split_text(buffer)
+        if len(chunks) > 1:
+            yield from chunks[:-1]
+            start = buffer.rfind(chunks[-1])
+            buffer = buffer[start:] if start >= 0 else chunks[-1]
+    if buffer:
+        yield from text_splitter.split_text(buffer)
 
 
 async def load_pdf_async(pdf_path):
@@ -0,0 +1,166 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import os
+from typing import List, Optional
+
+from comps import CustomLogger
+from comps.cores.common.cache import LRUCache
+from comps.cores.proto.api_protocol import EmbeddingRequest, EmbeddingResponse, EmbeddingResponseData
+
+logger = CustomLogger("opea_embedding_cache")
+logflag = os.getenv("LOGFLAG", False)
+
+
+class OpeaEmbeddingCache:
+    """A content-hash keyed cache of text embeddings in front of an embedding component.
+
+    Embeddings are looked up in an in-process LRU cache first, then in Redis if a URL is configured, and only
+    the texts missing from both are sent to the wrapped component. Keys contain the model name, so switching
+    the model never serves embeddings of the previous one.
+
+    Attributes:
+        backend: The wrapped OpeaComponent (or OpeaComponentLoader) generating the embeddings.
+        model_name (str): The name of the embedding model, the namespace of all cache keys.
+        local (LRUCache): The in-process cache tier.
+    """
+
+    def __init__(
+        self,
+        backend,
+        model_name: str,
+        max_size: int = 10000,
+        ttl: Optional[float] = None,
+        redis_url: Optional[str] = None,
+    ):
+        self.backend = backend
+        self.model_name = model_name
+        self.local = LRUCache(max_size, ttl)
+        self.redis_ttl = max(1, int(ttl)) if ttl else None
+        self.redis_hits = 0
+        self.redis = None
+        if redis_url:
+            from redis.asyncio import Redis
+
+            self.redis = Redis.from_url(redis_url)
+
+    async def invoke(self, input: EmbeddingRequest) -> EmbeddingResponse:
+        """Returns the embeddings of the input, generating only the ones not cached yet."""
+        result = (await self.invoke_batch([input]))[0]
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def invoke_batch(self, inputs: List[EmbeddingRequest]) -> list:
+        """Returns the embeddings of several inputs, generating the missing ones with one backend batch.
+
+        Returns:
+            list: One EmbeddingResponse per input, or the exception raised for it.
+        """
+        keys = [self._keys(input) for input in inputs]
+        cached = {}  # key -> embedding
+        for input_keys in keys:
+            for key in input_keys or []:
+                if key not in cached:
+                    embedding = self.local.get(key)
+                    if embedding is not None:
+                        cached[key] = embedding
+        await self._fetch_from_redis({key for input_keys in keys for key in input_keys or []} - cached.keys(), cached)
+
+        # inputs that are not plain texts are not cached and go to the backend unchanged
+        backend_requests, backend_indices = [], []
+        for i, (input, input_keys) in enumerate(zip(inputs, keys)):
+            if input_keys is None:
+                backend_requests.append(input)
+                backend_indices.append(i)
+                continue
+            missing = list(
+                dict.fromkeys(text for text, key in zip(self._texts(input), input_keys) if key not in cached)
+            )
+            if missing:
+                backend_requests.append(input.model_copy(update={"input": missing}))
+                backend_indices.append(i)
+
+        results = [None] * len(inputs)
+        backend_responses = {}
+        if backend_requests:
+            if logflag:
+                logger.info(f"Embedding cache misses for {len(backend_requests)} of {len(inputs)} inputs")
+            for i, request, response in zip(
+                backend_indices, backend_requests, await self.backend.invoke_batch(backend_requests)
+            ):
+                if isinstance(response, BaseException) or keys[i] is None:
+                    results[i] = response
+                    continue
+                backend_responses[i] = response
+                new_entries = {}
+                for text, item in zip(request.input, sorted(response.data, key=lambda item: item.index)):
+                    key = self._key(inputs[i], text)
+                    cached[key] = new_entries[key] = item.embedding
+                for key, embedding in new_entries.items():
+                    self.local.set(key, embedding)
+                await self._store_in_redis(new_entries)
+
+        for i, (input, input_keys) in enumerate(zip(inputs, keys)):
+            if results[i] is not None:
+                continue
+            response = backend_responses.get(i)
+            results[i] = EmbeddingResponse(
+                data=[EmbeddingResponseData(index=j, embedding=cached[key]) for j, key in enumerate(input_keys)],
+                model=response.model if response else input.model,
+                # usage is only known when the backend embedded every text
+                usage=response.usage if response and len(response.data) == len(input_keys) else None,
+            )
+        return results
+
+    def get_statistics(self) -> dict:
+        """Returns the cache counters, in the format of /v1/statistics."""
+        statistics = self.local.get_statistics()
+        lookups = self.local.hits + self.local.misses
+        statistics["redis_hits"] = self.redis_hits if self.redis else None
+        statistics["hit_rate"] = (self.local.hits + self.redis_hits) / lookups if lookups else None
+        return statistics
+
+    def _texts(self, input: EmbeddingRequest) -> Optional[List[str]]:
+        if isinstance(input.input, str):
+            return [input.input]
+        if isinstance(input.input, list) and all(isinstance(item, str) for item in input.input):
+            return input.input
+        return None
+
+    def _keys(self, input: EmbeddingRequest) -> Optional[List[str]]:
+        texts = self._texts(input)
+        return None if texts is None else [self._key(input, text) for text in texts]
+
+    def _key(self, input: EmbeddingRequest, text: str) -> str:
+        # request options that change the returned vectors are part of the hash
+        content = "\0".join([input.model or "", str(input.dimensions or ""), input.encoding_format or "", text])
+        return f"embedding:{self.model_name}:{hashlib.sha256(content.encode()).hexdigest()}"
+
+    async def _fetch_from_redis(self, keys: set, cached: dict):
+        if not self.redis or not keys:
+            return
+        keys = list(keys)
+        try:
+            values = await self.redis.mget(keys)
+        except Exception as e:
+            logger.error(f"Failed to read embeddings from Redis: {e}")
+            return
+        for key, value in zip(keys, values):
+            if value is not None:
+                cached[key] = json.loads(value)
+                self.local.set(key, cached[key])
+                self.redis_hits += 1
+
+    async def _store_in_redis(self, entries: dict):
+        if not self.redis or not entries:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, embedding in entries.items():
+                    pipe.set(key, json.dumps(embedding), ex=self.redis_ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to write embeddings to Redis: {e}")
@@ -1,6 +1,7 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 import json
 import os
 from typing import List, Union
@@ -17,6 +18,66 @@ logflag = os.getenv("LOGFLAG", False)
 TOKEN_URL = os.getenv("TOKEN_URL")
 CLIENTID = os.getenv("CLIENTID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+# Opt-in merging of concurrent requests into shared TEI calls
+TEI_EMBEDDING_COALESCE = os.getenv("TEI_EMBEDDING_COALESCE", "").strip().lower() in {"true", "1", "yes"}
+TEI_EMBEDDING_COALESCE_WAIT = float(os.getenv("TEI_EMBEDDING_COALESCE_WAIT", 0.005))
+# Limits of one TEI call, matching TEI's default max_client_batch_size and roughly its max_batch_tokens
+TEI_EMBEDDING_MAX_BATCH_SIZE = int(os.getenv("TEI_EMBEDDING_MAX_BATCH_SIZE", 32))
+TEI_EMBEDDING_MAX_BATCH_CHARS = int(os.getenv("TEI_EMBEDDING_MAX_BATCH_CHARS", 65536))
+
+
+class EmbeddingCoalescer:
+    """Merges the texts of concurrent requests into shared backend calls.
+
+    Texts are collected until `max_chars` characters are pending or the oldest request waited `max_wait`
+    seconds, then embedded by one call of `embed_groups` and handed back to each request.
+    """
+
+    def __init__(self, embed_groups, max_wait: float, max_chars: int):
+        self.embed_groups = embed_groups
+        self.max_wait = max_wait
+        self.max_chars = max_chars
+        self._pending = []  # [(texts, future)]
+        self._pending_chars = 0
+        self._flush_handle = None
+        self._tasks = set()
+
+    async def embed(self, texts: List[str]) -> list:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_chars += sum(len(text) for text in texts)
+        if self._pending_chars >= self.max_chars:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # requests whose caller gave up are not embedded
+        batch = [(texts, future) for texts, future in self._pending if not future.done()]
+        self._pending = []
+        self._pending_chars = 0
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            results = await self.embed_groups([texts for texts, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
 
 
 @OpeaComponentRegistry.register("OPEA_TEI_EMBEDDING")
@@ -32,6 +93,11 @@ class OpeaTEIEmbedding(OpeaComponent):
         super().__init__(name, ServiceType.EMBEDDING.name.lower(), description, config)
         self.base_url = os.getenv("TEI_EMBEDDING_ENDPOINT", "http://localhost:8080")
         self.client = self._initialize_client()
+        self.coalescer = (
+            EmbeddingCoalescer(self._embed_groups, TEI_EMBEDDING_COALESCE_WAIT, TEI_EMBEDDING_MAX_BATCH_CHARS)
+            if TEI_EMBEDDING_COALESCE
+            else None
+        )
 
         health_status = self.check_health()
         if not health_status:
@@ -58,23 +124,75 @@ class OpeaTEIEmbedding(OpeaComponent):
         Returns:
             EmbeddingResponse: The response in OpenAI embedding format, including embeddings, model, and usage information.
         """
+        texts = self._parse_texts(input)
+        if self.coalescer:
+            embeddings = await self.coalescer.embed(texts)
+        else:
+            embeddings = (await self._embed_groups([texts]))[0]
+        return self._build_response(embeddings)
+
+    async def invoke_batch(self, inputs: List[EmbeddingRequest]) -> list:
+        """Embeds the texts of several requests with as few TEI calls as possible.
+
+        Args:
+            inputs (List[EmbeddingRequest]): The requests, e.g. a batch collected by MicroService dynamic batching.
+
+        Returns:
+            list: One EmbeddingResponse per request, or the exception raised for an invalid request.
+        """
+        results = []
+        groups = []
+        for input in inputs:
+            try:
+                groups.append(self._parse_texts(input))
+                results.append(None)
+            except (TypeError, ValueError) as e:
+                results.append(e)
+        embeddings = iter(await self._embed_groups(groups))
+        return [result if result is not None else self._build_response(next(embeddings)) for result in results]
+
+    def _parse_texts(self, input: EmbeddingRequest) -> List[str]:
         # Parse input according to the EmbeddingRequest format
         if isinstance(input.input, str):
-            texts = [input.input.replace("\n", " ")]
+            return [input.input.replace("\n", " ")]
         elif isinstance(input.input, list):
             if all(isinstance(item, str) for item in input.input):
-                texts = [text.replace("\n", " ") for text in input.input]
+                return [text.replace("\n", " ") for text in input.input]
             else:
                 raise ValueError("Invalid input format: Only string or list of strings are supported.")
         else:
             raise TypeError("Unsupported input type: input must be a string or list of strings.")
-        # feature_extraction return np.ndarray
-        response = await self.client.feature_extraction(text=texts, model=f"{self.base_url}/embed")
-        # Convert np.ndarray to a list of lists (embedding)
-        data = [EmbeddingResponseData(index=i, embedding=embedding.tolist()) for i, embedding in enumerate(response)]
-        # Construct the EmbeddingResponse
-        response = EmbeddingResponse(data=data)
-        return response
+
+    def _build_response(self, embeddings: list) -> EmbeddingResponse:
+        data = [EmbeddingResponseData(index=i, embedding=embedding) for i, embedding in enumerate(embeddings)]
+        return EmbeddingResponse(data=data)
+
+    async def _embed_groups(self, groups: List[List[str]]) -> List[list]:
+        """Embeds groups of texts, each distinct text once, and returns the embeddings group by group."""
+        unique_texts = list(dict.fromkeys(text for texts in groups for text in texts))
+
+        # split into TEI calls bounded in number of texts and characters, sent concurrently
+        batches = []
+        batch_chars = 0
+        for text in unique_texts:
+            if (
+                not batches
+                or len(batches[-1]) >= TEI_EMBEDDING_MAX_BATCH_SIZE
+                or batch_chars + len(text) > TEI_EMBEDDING_MAX_BATCH_CHARS
+            ):
+                batches.append([])
+                batch_chars = 0
+            batches[-1].append(text)
+            batch_chars += len(text)
+        responses = await asyncio.gather(
+            *(self.client.feature_extraction(text=batch, model=f"{self.base_url}/embed") for batch in batches)
+        )
+
+        # feature_extraction return np.ndarray, convert it to a list of lists (embedding)
+        embedding_by_text = {}
+        for batch, response in zip(batches, responses):
+            embedding_by_text.update(zip(batch, (embedding.tolist() for embedding in response)))
+        return [[embedding_by_text[text] for text in texts] for texts in groups]
 
     def check_health(self) -> bool:
         """Checks the health of the embedding service.
@@ -4,6 +4,7 @@
 import os
 import time
 
+from integrations.cache import OpeaEmbeddingCache
 from integrations.clip import OpeaClipEmbedding
 from integrations.ovms import OpeaOVMSEmbedding
 from integrations.predictionguard import PredictionguardEmbedding
@@ -30,6 +31,26 @@ loader = OpeaComponentLoader(
     embedding_component_name,
     description=f"OPEA Embedding Component: {embedding_component_name}",
 )
+# Cache embeddings by content hash in front of the component
+if os.getenv("ENABLE_EMBEDDING_CACHE", "").strip().lower() in {"true", "1", "yes"}:
+    embedding_cache_ttl = os.getenv("EMBEDDING_CACHE_TTL")
+    embedding_backend = OpeaEmbeddingCache(
+        loader,
+        model_name=os.getenv("EMBEDDING_MODEL_ID")
+        or getattr(loader.component, "model_name", None)
+        or os.getenv("MODEL_ID")
+        or embedding_component_name,
+        max_size=int(os.getenv("EMBEDDING_CACHE_SIZE", 10000)),
+        ttl=float(embedding_cache_ttl) if embedding_cache_ttl else None,
+        redis_url=os.getenv("EMBEDDING_CACHE_REDIS_URL"),
+    )
+    statistics_dict["opea_service@embedding_cache"] = embedding_backend
+else:
+    embedding_backend = loader
+# Merge concurrent requests into batches for the component's invoke_batch
+enable_dynamic_batching = os.getenv("ENABLE_DYNAMIC_BATCHING", "").strip().lower() in {"true", "1", "yes"}
+dynamic_batching_timeout = float(os.getenv("DYNAMIC_BATCHING_TIMEOUT", 0.01))
+dynamic_batching_max_batch_size = int(os.getenv("DYNAMIC_BATCHING_MAX_BATCH_SIZE", 32))
 
 
 @register_microservice(
@@ -38,6 +59,9 @@ loader = OpeaComponentLoader(
     endpoint="/v1/embeddings",
     host="0.0.0.0",
     port=6000,
+    dynamic_batching=enable_dynamic_batching,
+    dynamic_batching_timeout=dynamic_batching_timeout,
+    dynamic_batching_max_batch_size=dynamic_batching_max_batch_size,
 )
 @opea_telemetry
 @register_statistics(names=["opea_service@embedding"])
@@ -50,7 +74,12 @@ async def embedding(input: EmbeddingRequest) -> EmbeddingResponse:
 
     try:
         # Use the loader to invoke the component
-        embedding_response = await loader.invoke(input)
+        if enable_dynamic_batching:
+            embedding_response = await opea_microservices["opea_service@embedding"].dynamic_batching_request(
+                ServiceType.EMBEDDING, input
+            )
+        else:
+            embedding_response = await embedding_backend.invoke(input)
 
         # Log the result if logging is enabled
         if logflag:
@@ -65,6 +94,10 @@ async def embedding(input: EmbeddingRequest) -> EmbeddingResponse:
         raise
 
 
+if enable_dynamic_batching:
+    opea_microservices["opea_service@embedding"].dynamic_batching_component = embedding_backend
+
+
 if __name__ == "__main__":
     opea_microservices["opea_service@embedding"].start()
     logger.info("OPEA Embedding Microservice is up and running successfully...")
@@ -6,6 +6,8 @@ from bson.objectid import ObjectId
 from integrations.mongo.config import COLLECTION_NAME
 from integrations.mongo.mongo_conn import MongoClient
 
+from comps.cores.common.bulk import insert_many_unordered
+
 
 class FeedbackStore:
 
@@ -43,6 +45,20 @@ class FeedbackStore:
             print(e)
             raise Exception(e)
 
+    async def save_feedbacks(self, feedbacks) -> list:
+        """Stores new feedback data into the storage with one unordered insert.
+
+        A feedback that fails to insert does not stop the insertion of the others.
+
+        Args:
+            feedbacks (list): The feedback data to be stored.
+
+        Returns:
+            list: For each feedback, in order, its ID or the exception that prevented storing it.
+        """
+        data = [item.model_dump(by_alias=True, mode="json", exclude={"feedback_id"}) for item in feedbacks]
+        return await insert_many_unordered(self.collection, data)
+
     async def update_feedback(self, feedback_data) -> bool:
         """Update a feedback data in the collection with given id.
 
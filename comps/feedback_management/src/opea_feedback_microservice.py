@@ -3,11 +3,12 @@
 import os
 from typing import Annotated, Optional
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from feedback_store import FeedbackStore
 from pydantic import BaseModel, Field
 
 from comps import CustomLogger
+from comps.cores.common.bulk import BulkIngestor, aiter_ndjson
 from comps.cores.mega.micro_service import opea_microservices, register_microservice
 from comps.cores.proto.api_protocol import ChatCompletionRequest
 
@@ -93,6 +94,38 @@ async def create_feedback_data(feedback: ChatFeedback):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def parse_bulk_feedback(record: dict) -> ChatFeedback:
+    feedback = ChatFeedback.model_validate(record)
+    if feedback.feedback_id is not None:
+        raise ValueError("Bulk create does not update feedback data, remove the feedback_id")
+    return feedback
+
+
+@register_microservice(
+    name="opea_service@feedback_mongo",
+    endpoint="/v1/feedback/create/bulk",
+    host="0.0.0.0",
+    input_datatype=ChatFeedback,
+    port=6016,
+)
+async def create_feedback_data_bulk(request: Request):
+    """Creates and stores feedback data from an NDJSON stream of ChatFeedback objects, with one line per feedback.
+
+    Args:
+        request (Request): The request whose body is the NDJSON stream.
+
+    Returns:
+        JSON: The number of succeeded and failed lines, and the errors of the failed lines in order: their index
+            and error.
+    """
+    feedback_store = FeedbackStore(None)
+    feedback_store.initialize_storage()
+    ingestor = BulkIngestor(feedback_store.save_feedbacks, parse_bulk_feedback)
+    response = await ingestor.ingest(aiter_ndjson(request.stream()))
+    logger.info(f"Bulk create: {ingestor.get_statistics()}")
+    return response
+
+
 @register_microservice(
     name="opea_service@feedback_mongo",
     endpoint="/v1/feedback/get",
@@ -28,6 +28,7 @@ from comps import (
     register_statistics,
     statistics_dict,
 )
+from comps.guardrails.src.guardrails.utils.scanners import scanner_cache
 
 logger = CustomLogger("opea_guardrails_microservice")
 logflag = os.getenv("LOGFLAG", False)
@@ -46,6 +47,8 @@ loader = OpeaComponentLoader(
 
 input_guardrail = OPEALLMGuardInputGuardrail(input_usvc_config)
 output_guardrail = OPEALLMGuardOutputGuardrail(output_usvc_config)
+# report the reuse of the constructed scanners in /v1/statistics
+statistics_dict["opea_service@guardrails_scanner_cache"] = scanner_cache
 
 
 @register_microservice(
@@ -66,7 +69,7 @@ async def safety_guard(input: Union[LLMParamsDoc, GeneratedDoc, TextDoc]) -> Uni
 
     try:
         if isinstance(input, LLMParamsDoc):
-            processed = input_guardrail.scan_llm_input(input)
+            processed = await input_guardrail.scan_llm_input(input)
             if logflag:
                 logger.info(f"Input guard passed: {processed}")
 
@@ -76,7 +79,7 @@ async def safety_guard(input: Union[LLMParamsDoc, GeneratedDoc, TextDoc]) -> Uni
             except Exception as e:
                 logger.error(f"Problem using input as GeneratedDoc: {e}")
                 raise HTTPException(status_code=500, detail=f"{e}") from e
-            scanned_output = output_guardrail.scan_llm_output(doc)
+            scanned_output = await output_guardrail.scan_llm_output(doc)
 
             processed = scanned_output
         else:
@@ -55,7 +55,7 @@ ENABLED_SCANNERS = [
 
 from comps import CustomLogger
 from comps.cores.mega.utils import sanitize_env
-from comps.guardrails.src.guardrails.utils.scanners import OPEABanSubstrings, OPEARegexScanner
+from comps.guardrails.src.guardrails.utils.scanners import OPEABanSubstrings, OPEARegexScanner, scanner_cache
 
 logger = CustomLogger("opea_llm_guard_input_guardrail_microservice")
 
@@ -888,7 +888,12 @@ class InputScannersConfig:
         for scanner_name, scanner_config in enabled_scanners_names_and_configs.items():
             try:
                 logger.info(f"Attempting to create scanner: {scanner_name}")
-                scanner_object = self._create_input_scanner(scanner_name, scanner_config)
+                scanner_object = scanner_cache.get_or_create(
+                    "input",
+                    scanner_name,
+                    scanner_config,
+                    lambda: self._create_input_scanner(scanner_name, scanner_config),
+                )
                 enabled_scanners_objects.append(scanner_object)
             except ValueError as e:
                 err_msg = f"A ValueError occurred during creating input scanner {scanner_name}: {e}"
@@ -2,8 +2,9 @@
 # SPDX-License-Identifier: Apache-2.0
 
 from fastapi import HTTPException
-from llm_guard import scan_output
+from llm_guard.vault import Vault
 from utils.llm_guard_output_scanners import OutputScannersConfig
+from utils.scan_engine import scan_engine, with_vault
 
 from comps import CustomLogger, GeneratedDoc
 
@@ -39,7 +40,7 @@ class OPEALLMGuardOutputGuardrail:
         """
         try:
             self._scanners_config = OutputScannersConfig(usv_config)
-            self._scanners = self._scanners_config.create_enabled_output_scanners()
+            self._scanners = scan_engine.prepare(self._scanners_config.create_enabled_output_scanners())
         except Exception as e:
             logger.exception(
                 f"An unexpected error occurred during initializing \
@@ -47,7 +48,7 @@ class OPEALLMGuardOutputGuardrail:
             )
             raise
 
-    def scan_llm_output(self, output_doc: GeneratedDoc) -> str:
+    async def scan_llm_output(self, output_doc: GeneratedDoc) -> str:
         """Scans the output from an LLM output document.
 
         Args:
@@ -64,12 +65,18 @@ class OPEALLMGuardOutputGuardrail:
             if output_doc.output_guardrail_params is not None:
                 self._scanners_config.vault = output_doc.output_guardrail_params.anonymize_vault
                 if self._scanners_config.changed(output_doc.output_guardrail_params.dict()):
-                    self._scanners = self._scanners_config.create_enabled_output_scanners()
+                    self._scanners = scan_engine.prepare(self._scanners_config.create_enabled_output_scanners())
             else:
                 logger.warning("Output guardrail params not found in input document.")
             if self._scanners:
-                sanitized_output, results_valid, results_score = scan_output(
-                    self._scanners, output_doc.prompt, output_doc.text
+                scanners = self._scanners
+                anonymize_vault = getattr(output_doc.output_guardrail_params, "anonymize_vault", None)
+                if anonymize_vault:
+                    # the Deanonymize scanner is shared by all requests, each request restores its own vault
+                    vault = Vault(tuples=anonymize_vault)
+                    scanners = [with_vault(s, vault) if type(s).__name__ == "Deanonymize" else s for s in scanners]
+                sanitized_output, results_valid, results_score = await scan_engine.scan(
+                    scanners, output_doc.text, prompt=output_doc.prompt
                 )
                 if False in results_valid.values():
                     msg = f"LLM Output {output_doc.text} is not valid, scores: {results_score}"
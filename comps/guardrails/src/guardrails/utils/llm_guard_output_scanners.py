@@ -77,7 +77,7 @@ ENABLED_SCANNERS = [
 
 from comps import CustomLogger
 from comps.cores.mega.utils import sanitize_env
-from comps.guardrails.src.guardrails.utils.scanners import OPEABanSubstrings, OPEARegexScanner
+from comps.guardrails.src.guardrails.utils.scanners import OPEABanSubstrings, OPEARegexScanner, scanner_cache
 
 logger = CustomLogger("opea_llm_guard_output_guardrail_microservice")
 
@@ -1149,7 +1149,16 @@ class OutputScannersConfig:
         for scanner_name, scanner_config in enabled_scanners_names_and_configs.items():
             try:
                 logger.info(f"Attempting to create scanner: {scanner_name}")
-                scanner_object = self._create_output_scanner(scanner_name, scanner_config, vault=self.vault)
+                if scanner_name == "deanonymize":
+                    # the vault is set per request, the scanner itself holds no model
+                    scanner_object = self._create_output_scanner(scanner_name, scanner_config, vault=self.vault)
+                else:
+                    scanner_object = scanner_cache.get_or_create(
+                        "output",
+                        scanner_name,
+                        scanner_config,
+                        lambda: self._create_output_scanner(scanner_name, scanner_config),
+                    )
                 enabled_scanners_objects.append(scanner_object)
             except ValueError as e:
                 err_msg = f"A ValueError occurred during creating output scanner {scanner_name}: {e}"
@@ -0,0 +1,275 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import copy
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from llm_guard.vault import Vault
+
+from comps import CustomLogger
+
+logger = CustomLogger("opea_llm_guard_scan_engine")
+
+# Number of threads running the scanners of all requests
+GUARDRAILS_SCAN_WORKERS = int(os.getenv("GUARDRAILS_SCAN_WORKERS", 8))
+# Stop scanning a text as soon as a model-based scanner rejects it
+GUARDRAILS_FAIL_FAST = os.getenv("GUARDRAILS_FAIL_FAST", "False").lower() in ("true", "1", "yes")
+# Maximum number of texts per transformer pipeline call, across requests
+GUARDRAILS_BATCH_SIZE = int(os.getenv("GUARDRAILS_BATCH_SIZE", 16))
+# Milliseconds a pipeline call waits for the calls of other requests to join its batch
+GUARDRAILS_BATCH_WAIT_MS = float(os.getenv("GUARDRAILS_BATCH_WAIT_MS", 5))
+
+# Scanners that only classify the text with a model. They never sanitize it, so they run concurrently on the
+# original text, while the other scanners run one after the other, each on the text sanitized by the previous one.
+PARALLEL_SCANNERS = {
+    "BanCode",
+    "BanTopics",
+    "Bias",
+    "Code",
+    "FactualConsistency",
+    "Gibberish",
+    "Language",
+    "LanguageSame",
+    "MaliciousURLs",
+    "NoRefusal",
+    "NoRefusalLight",
+    "PromptInjection",
+    "Relevance",
+    "Sentiment",
+    "Toxicity",
+}
+
+
+class _PipelineCall:
+    __slots__ = ("inputs", "done", "outputs", "error")
+
+    def __init__(self, inputs: list):
+        self.inputs = inputs
+        self.done = threading.Event()
+        self.outputs = None
+        self.error = None
+
+
+class BatchedPipeline:
+    """Wraps a transformers pipeline to run the concurrent calls of several requests as one batch.
+
+    The first caller leads: unless it is the only caller of the pipeline, it waits up to `max_wait` seconds for
+    other calls with the same arguments to queue up, or less if they already fill a batch. It then takes the calls
+    queued so far, runs them in pipeline calls of at most `max_batch_size` texts, and hands each caller its outputs.
+    Calls arriving meanwhile elect a new leader, so a leader only serves the calls queued before it took them.
+    Only calls with a list of texts are batched, other calls go straight to the pipeline.
+    """
+
+    def __init__(
+        self, pipeline, max_batch_size: int = GUARDRAILS_BATCH_SIZE, max_wait: float = GUARDRAILS_BATCH_WAIT_MS / 1000
+    ):
+        self.pipeline = pipeline
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._queued = threading.Condition(self._lock)
+        self._queues = {}  # call arguments -> pending calls
+        self._callers = 0  # calls being served, queued or running
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    def __call__(self, inputs, **kwargs):
+        if self.max_batch_size <= 1 or not isinstance(inputs, list) or not inputs:
+            return self.pipeline(inputs, **kwargs)
+
+        key = repr(sorted(kwargs.items()))
+        call = _PipelineCall(inputs)
+        with self._lock:
+            self._callers += 1
+            queue = self._queues.get(key)
+            leader = queue is None
+            if leader:
+                queue = self._queues[key] = []
+            queue.append(call)
+            self._queued.notify_all()
+
+        try:
+            if leader:
+                with self._lock:
+                    # a lone caller does not wait for calls that are not coming
+                    if self._callers > 1:
+                        self._queued.wait_for(lambda: self._queued_size(queue) >= self.max_batch_size, self.max_wait)
+                    # later calls queue up for the next leader
+                    del self._queues[key]
+                self._run_all(queue, kwargs)
+            call.done.wait()
+        finally:
+            with self._lock:
+                self._callers -= 1
+        if call.error is not None:
+            raise call.error
+        return call.outputs
+
+    @staticmethod
+    def _queued_size(queue: List[_PipelineCall]) -> int:
+        return sum(len(call.inputs) for call in queue)
+
+    def _run_all(self, queue: List[_PipelineCall], kwargs: dict):
+        batch, size = [], 0
+        for call in queue:
+            if batch and size + len(call.inputs) > self.max_batch_size:
+                self._run(batch, kwargs)
+                batch, size = [], 0
+            batch.append(call)
+            size += len(call.inputs)
+        if batch:
+            self._run(batch, kwargs)
+
+    def _run(self, batch: List[_PipelineCall], kwargs: dict):
+        texts = [text for call in batch for text in call.inputs]
+        try:
+            outputs = self.pipeline(texts, **{"batch_size": self.max_batch_size, **kwargs})
+            start = 0
+            for call in batch:
+                call.outputs = outputs[start : start + len(call.inputs)]
+                start += len(call.inputs)
+        except Exception as e:
+            for call in batch:
+                call.error = e
+        for call in batch:
+            call.done.set()
+
+
+def _pipeline_key(pipeline):
+    """Identifies the model of a pipeline and the arguments it runs with, None if it has no model."""
+    model = getattr(pipeline, "model", None)
+    name = getattr(getattr(model, "config", None), "_name_or_path", None)
+    if not name:
+        return None
+    return (
+        type(pipeline).__name__,
+        type(model).__name__,
+        name,
+        str(getattr(pipeline, "device", None)),
+        repr(getattr(pipeline, "_preprocess_params", None)),
+        repr(getattr(pipeline, "_forward_params", None)),
+        repr(getattr(pipeline, "_postprocess_params", None)),
+    )
+
+
+def with_vault(scanner, vault: Vault):
+    """Returns a copy of an Anonymize or Deanonymize scanner using `vault`, sharing the models of the original."""
+    scanner = copy.copy(scanner)
+    scanner._vault = vault
+    return scanner
+
+
+class ScannerEngine:
+    """Runs LLM Guard scanners on a worker pool.
+
+    Model-based scanners listed in PARALLEL_SCANNERS run concurrently, the others run in order on the text
+    sanitized by the previous ones, as llm_guard.scan_prompt does. The transformer pipelines of the scanners are
+    wrapped in a BatchedPipeline so that concurrent requests share pipeline calls, and scanners using the same
+    model, whose weights the scanner cache already shares, share one BatchedPipeline so that their calls are
+    batched together.
+
+    Attributes:
+        executor (ThreadPoolExecutor): The worker pool of the scanners.
+        fail_fast (bool): Whether to stop scanning a text on the first rejection of a model-based scanner.
+        pipelines (weakref.WeakValueDictionary): The pipelines in use, model and arguments -> BatchedPipeline.
+    """
+
+    def __init__(
+        self,
+        workers: int = GUARDRAILS_SCAN_WORKERS,
+        fail_fast: bool = GUARDRAILS_FAIL_FAST,
+        batch_size: int = GUARDRAILS_BATCH_SIZE,
+        batch_wait_ms: float = GUARDRAILS_BATCH_WAIT_MS,
+    ):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="guardrails_scan")
+        self.fail_fast = fail_fast
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self.pipelines = weakref.WeakValueDictionary()
+
+    def prepare(self, scanners: list) -> list:
+        """Wraps the transformer pipelines of the scanners for cross-request batching, once per scanner.
+
+        A scanner whose model is already used by another scanner gets the BatchedPipeline of the latter.
+        """
+        for scanner in scanners:
+            pipeline = getattr(scanner, "_pipeline", None)
+            if pipeline is None or isinstance(pipeline, BatchedPipeline):
+                continue
+            key = _pipeline_key(pipeline)
+            shared = self.pipelines.get(key) if key is not None else None
+            if shared is None:
+                shared = BatchedPipeline(pipeline, self.batch_size, self.batch_wait)
+                if key is not None:
+                    self.pipelines[key] = shared
+            else:
+                logger.info(f"Sharing the {key[2]} pipeline with {type(scanner).__name__} scanner")
+            scanner._pipeline = shared
+        return scanners
+
+    async def scan(self, scanners: list, text: str, prompt: Optional[str] = None):
+        """Scans a prompt, or an output when the `prompt` it answers is given.
+
+        Returns:
+            The sanitized text, and the validity and risk score of each scanner by scanner name.
+        """
+
+        def run(scanner, text):
+            start = time.perf_counter()
+            result = scanner.scan(text) if prompt is None else scanner.scan(prompt, text)
+            logger.debug(f"Scanner {type(scanner).__name__} took {time.perf_counter() - start:.3f}s")
+            return result
+
+        def chain(scanners):
+            sanitized, results = text, {}
+            for scanner in scanners:
+                sanitized, is_valid, risk_score = run(scanner, sanitized)
+                results[type(scanner).__name__] = (is_valid, risk_score)
+            return sanitized, results
+
+        loop = asyncio.get_running_loop()
+        parallel = {
+            loop.run_in_executor(self.executor, run, s, text): type(s).__name__
+            for s in scanners
+            if type(s).__name__ in PARALLEL_SCANNERS
+        }
+        sequential = [s for s in scanners if type(s).__name__ not in PARALLEL_SCANNERS]
+        chained = loop.run_in_executor(self.executor, chain, sequential) if sequential else None
+
+        sanitized, results = text, {}
+        pending = set(parallel)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    _, is_valid, risk_score = future.result()
+                    results[parallel[future]] = (is_valid, risk_score)
+                if self.fail_fast and not all(is_valid for is_valid, _ in results.values()):
+                    logger.info("A scanner rejected the text, skipping the remaining scanners.")
+                    break
+            else:
+                if chained is not None:
+                    sanitized, chained_results = await chained
+                    results.update(chained_results)
+        finally:
+            for future in [*pending, chained]:
+                if future is not None and not future.done():
+                    future.cancel()
+
+        order = {type(s).__name__: i for i, s in enumerate(scanners)}
+        results = dict(sorted(results.items(), key=lambda item: order[item[0]]))
+        return (
+            sanitized,
+            {name: is_valid for name, (is_valid, _) in results.items()},
+            {name: risk_score for name, (_, risk_score) in results.items()},
+        )
+
+
+scan_engine = ScannerEngine()
@@ -1,17 +1,29 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import dataclasses
+import json
+import os
 import re
-from collections.abc import Iterable
+import sys
+import threading
+import weakref
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
 
+from llm_guard import transformers_helpers
 from llm_guard.input_scanners import BanSubstrings, Regex
 from llm_guard.input_scanners.regex import MatchType
 from presidio_anonymizer.core.text_replace_builder import TextReplaceBuilder
 
 from comps import CustomLogger
+from comps.cores.common.cache import LRUCache
 
 logger = CustomLogger("opea_llm_guard_utils_scanners")
 
+# Number of constructed scanners kept for reuse, by the input and output guardrails together
+GUARDRAILS_SCANNER_CACHE_SIZE = int(os.getenv("GUARDRAILS_SCANNER_CACHE_SIZE", 64))
+
 
 # The bug is reported here: https://github.com/protectai/llm-guard/issues/210
 class OPEABanSubstrings(BanSubstrings):
@@ -79,3 +91,88 @@ class OPEARegexScanner(Regex):
 
         logger.warning("None of the patterns matched the text")
         return text_replace_builder.output_text, False, 1.0
+
+
+class ScannerCache:
+    """A bounded cache of constructed scanners, keyed by scanner kind, name and normalized configuration.
+
+    Constructing a model-based scanner loads its model, so a change of the guardrail params only constructs the
+    scanners whose configuration is not cached yet. The cache is shared by the input and output guardrails.
+
+    Scanners constructed by the cache also share their models: while a scanner is constructed, the LLM Guard model
+    loaders called by the constructing thread return the model already loaded by another scanner for the same model
+    and arguments, if any, so that only one copy of its weights is loaded. The loaders called by other threads, and
+    the calls whose model cannot be keyed, load the model as usual.
+    """
+
+    MODEL_LOADERS = ("get_tokenizer_and_model_for_classification", "get_tokenizer_and_model_for_ner")
+
+    def __init__(self, max_size: int = GUARDRAILS_SCANNER_CACHE_SIZE):
+        self.scanners = LRUCache(max_size)
+        self.models = weakref.WeakValueDictionary()  # loader, model and arguments -> loaded model
+        self.tokenizers = weakref.WeakKeyDictionary()  # loaded model -> its tokenizer
+        self._lock = threading.Lock()
+
+    def get_or_create(self, kind: str, scanner_name: str, scanner_config: dict, create: Callable):
+        """Returns the cached `kind` scanner for the configuration, constructing it with `create` on a miss."""
+        config = {k: v for k, v in scanner_config.items() if k not in ("enabled", "id")}
+        key = (kind, scanner_name, json.dumps(config, sort_keys=True, default=str))
+        scanner = self.scanners.get(key)
+        if scanner is None:
+            with self._lock, self._sharing_models():
+                scanner = create()
+            if scanner is not None:
+                self.scanners.set(key, scanner)
+        else:
+            logger.info(f"Reusing cached {kind} scanner: {scanner_name}")
+        return scanner
+
+    @contextmanager
+    def _sharing_models(self):
+        """Routes the model loaders imported by the LLM Guard modules through `models`, for the current thread."""
+        loaders = {name: getattr(transformers_helpers, name, None) for name in self.MODEL_LOADERS}
+        owner = threading.get_ident()
+        patched = []
+        for module in list(sys.modules.values()):
+            if not getattr(module, "__name__", "").startswith("llm_guard."):
+                continue
+            for name, load in loaders.items():
+                if load is not None and vars(module).get(name) is load:
+                    setattr(module, name, self._shared_loader(load, owner))
+                    patched.append((module, name, load))
+        try:
+            yield
+        finally:
+            for module, name, load in patched:
+                setattr(module, name, load)
+
+    def _shared_loader(self, load: Callable, owner: int) -> Callable:
+        def load_shared(model, use_onnx: bool = False):
+            if threading.get_ident() != owner:
+                return load(model=model, use_onnx=use_onnx)
+            try:
+                # the pipeline arguments do not change the loaded weights
+                fields = {
+                    f.name: getattr(model, f.name) for f in dataclasses.fields(model) if f.name != "pipeline_kwargs"
+                }
+                key = (load.__name__, json.dumps(fields, sort_keys=True, default=str), use_onnx)
+            except (TypeError, AttributeError) as e:
+                logger.warning(f"Not sharing the {getattr(model, 'path', model)} model: {e}")
+                return load(model=model, use_onnx=use_onnx)
+            loaded = self.models.get(key)
+            if loaded is None:
+                tokenizer, loaded = load(model=model, use_onnx=use_onnx)
+                self.models[key] = loaded
+                self.tokenizers[loaded] = tokenizer
+            else:
+                logger.info(f"Sharing the loaded {model.path} model")
+            return self.tokenizers[loaded], loaded
+
+        return load_shared
+
+    def get_statistics(self) -> dict:
+        """Returns the size and hit/miss counters of the cache, in the format of /v1/statistics."""
+        return self.scanners.get_statistics()
+
+
+scanner_cache = ScannerCache()
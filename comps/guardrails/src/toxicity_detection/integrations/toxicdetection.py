@@ -1,25 +1,41 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
-import asyncio
 import os
+from typing import List
 
 from transformers import pipeline
 
 from comps import CustomLogger, OpeaComponent, OpeaComponentRegistry, ServiceType, TextDoc
+from comps.cores.common.inference import BatchInference
 
 logger = CustomLogger("opea_toxicity_native")
 logflag = os.getenv("LOGFLAG", False)
 
+# Maximum number of texts per model call
+TOXICITY_BATCH_SIZE = int(os.getenv("TOXICITY_BATCH_SIZE", 32))
+# Texts are truncated to this number of tokens
+TOXICITY_MAX_LENGTH = int(os.getenv("TOXICITY_MAX_LENGTH", 512))
+
 
 @OpeaComponentRegistry.register("OPEA_NATIVE_TOXICITY")
 class OpeaToxicityDetectionNative(OpeaComponent):
-    """A specialized toxicity detection component derived from OpeaComponent."""
+    """A specialized toxicity detection component derived from OpeaComponent.
+
+    Attributes:
+        inference (BatchInference): Runs the text classification pipeline on batches from a single worker thread.
+    """
 
     def __init__(self, name: str, description: str, config: dict = None):
         super().__init__(name, ServiceType.GUARDRAIL.name.lower(), description, config)
         self.model = os.getenv("TOXICITY_DETECTION_MODEL", "Intel/toxic-prompt-roberta")
         self.toxicity_pipeline = pipeline("text-classification", model=self.model, tokenizer=self.model)
+        self.inference = BatchInference(
+            self.toxicity_pipeline,
+            max_batch_size=TOXICITY_BATCH_SIZE,
+            truncation=True,
+            max_length=TOXICITY_MAX_LENGTH,
+        )
         health_status = self.check_health()
         if not health_status:
             logger.error("OpeaToxicityDetectionNative health check failed.")
@@ -30,11 +46,23 @@ class OpeaToxicityDetectionNative(OpeaComponent):
         Args:
             input (Input TextDoc)
         """
-        toxic = await asyncio.to_thread(self.toxicity_pipeline, input.text)
-        if toxic[0]["label"].lower() == "toxic":
-            return TextDoc(text="Violated policies: toxicity, please check your input.", downstream_black_list=[".*"])
-        else:
-            return TextDoc(text=input.text)
+        return (await self.invoke_batch([input]))[0]
+
+    async def invoke_batch(self, inputs: List[TextDoc]) -> list:
+        """Invokes the toxic detection for a batch of inputs with one padded batch per length bucket.
+
+        Args:
+            inputs (List[TextDoc]): The inputs, e.g. collected by MicroService dynamic batching.
+        """
+        predictions = await self.inference.run([input.text for input in inputs])
+        return [
+            (
+                TextDoc(text="Violated policies: toxicity, please check your input.", downstream_black_list=[".*"])
+                if prediction["label"].lower() == "toxic"
+                else TextDoc(text=input.text)
+            )
+            for input, prediction in zip(inputs, predictions)
+        ]
 
     def check_health(self) -> bool:
         """Checks the health of the animation service.
@@ -37,6 +37,10 @@ loader = OpeaComponentLoader(
     name=toxicity_detection_component_name,
     description=f"OPEA Toxicity Detection Component: {toxicity_detection_component_name}",
 )
+# Merge concurrent requests into batches for the component's invoke_batch
+enable_dynamic_batching = os.getenv("ENABLE_DYNAMIC_BATCHING", "").strip().lower() in {"true", "1", "yes"}
+dynamic_batching_timeout = float(os.getenv("DYNAMIC_BATCHING_TIMEOUT", 0.01))
+dynamic_batching_max_batch_size = int(os.getenv("DYNAMIC_BATCHING_MAX_BATCH_SIZE", 32))
 
 
 @register_microservice(
@@ -47,6 +51,9 @@ loader = OpeaComponentLoader(
     port=toxicity_detection_port,
     input_datatype=TextDoc,
     output_datatype=Union[TextDoc, ScoreDoc],
+    dynamic_batching=enable_dynamic_batching,
+    dynamic_batching_timeout=dynamic_batching_timeout,
+    dynamic_batching_max_batch_size=dynamic_batching_max_batch_size,
 )
 @register_statistics(names=["opea_service@toxicity_detection"])
 async def toxicity_guard(input: TextDoc) -> Union[TextDoc, ScoreDoc]:
@@ -58,7 +65,12 @@ async def toxicity_guard(input: TextDoc) -> Union[TextDoc, ScoreDoc]:
 
     try:
         # Use the loader to invoke the component
-        toxicity_response = await loader.invoke(input)
+        if enable_dynamic_batching:
+            toxicity_response = await opea_microservices["opea_service@toxicity_detection"].dynamic_batching_request(
+                ServiceType.GUARDRAIL, input
+            )
+        else:
+            toxicity_response = await loader.invoke(input)
 
         # Log the result if logging is enabled
         if logflag:
@@ -73,6 +85,13 @@ async def toxicity_guard(input: TextDoc) -> Union[TextDoc, ScoreDoc]:
         raise
 
 
+if enable_dynamic_batching:
+    opea_microservices["opea_service@toxicity_detection"].dynamic_batching_component = loader
+# report the batches run by the native model in /v1/statistics
+if getattr(loader.component, "inference", None) is not None:
+    statistics_dict["opea_service@toxicity_detection_inference"] = loader.component.inference
+
+
 if __name__ == "__main__":
     opea_microservices["opea_service@toxicity_detection"].start()
     logger.info("OPEA Toxicity Detection Microservice is up and running successfully...")
@@ -12,6 +12,8 @@ from langchain_core.prompts import PromptTemplate
 from openai import AsyncOpenAI
 
 from comps import CustomLogger, LLMParamsDoc, OpeaComponent, OpeaComponentRegistry, SearchedDoc, ServiceType
+from comps.cores.common.context import ContextPacker, context_token_budget
+from comps.cores.common.response_cache import ResponseCache
 from comps.cores.mega.utils import ConfigError, get_access_token, load_model_configs
 from comps.cores.proto.api_protocol import ALLOWED_CHATCOMPLETION_ARGS, ALLOWED_COMPLETION_ARGS, ChatCompletionRequest
 
@@ -34,6 +36,16 @@ TOKEN_URL = os.getenv("TOKEN_URL")
 CLIENTID = os.getenv("CLIENTID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "EMPTY")
+# Response cache, the semantic tier is enabled by a similarity threshold and an embedding endpoint
+ENABLE_RESPONSE_CACHE = os.getenv("ENABLE_RESPONSE_CACHE", "False").lower() in ("true", "1", "yes")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 3600)) or None
+RESPONSE_CACHE_SIMILARITY_THRESHOLD = (
+    float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD"))
+    if os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD")
+    else None
+)
+RESPONSE_CACHE_EMBEDDING_ENDPOINT = os.getenv("RESPONSE_CACHE_EMBEDDING_ENDPOINT")
 
 # Validate and Load the models config if MODEL_CONFIGS is not null
 configs_map = {}
@@ -61,11 +73,26 @@ class OpeaTextGenService(OpeaComponent):
 
     Attributes:
         client (TGI/vLLM): An instance of the TGI/vLLM client for text generation.
+        response_cache (ResponseCache): The cache of responses, None unless ENABLE_RESPONSE_CACHE is set.
+        context_packer (ContextPacker): Packs the RAG documents into the context token budget of the model, None
+            unless a budget is configured.
     """
 
     def __init__(self, name: str, description: str, config: dict = None):
         super().__init__(name, ServiceType.LLM.name.lower(), description, config)
         self.client = self._initialize_client()
+        self.response_cache = None
+        if ENABLE_RESPONSE_CACHE:
+            self.response_cache = ResponseCache(
+                max_size=RESPONSE_CACHE_SIZE,
+                ttl=RESPONSE_CACHE_TTL,
+                similarity_threshold=RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+                embedding_endpoint=RESPONSE_CACHE_EMBEDDING_ENDPOINT,
+            )
+        self.context_packer = None
+        context_budget = context_token_budget(configs_map.get(MODEL_NAME))
+        if context_budget:
+            self.context_packer = ContextPacker(context_budget, tokenizer=MODEL_NAME)
         health_status = self.check_health()
         if not health_status:
             logger.error("OpeaTextGenService health check failed.")
@@ -101,6 +128,16 @@ class OpeaTextGenService(OpeaComponent):
             logger.error("Health check failed")
             return False
 
+    def _pack_documents(self, documents: list) -> list:
+        """Packs the RAG documents, texts or dicts with a text and an optional score, into the context budget."""
+        texts = [doc["text"] if isinstance(doc, dict) else doc for doc in documents]
+        if not self.context_packer:
+            return texts
+        scores = [doc.get("score") if isinstance(doc, dict) else None for doc in documents]
+        packed = self.context_packer.pack(texts, scores if None not in scores else None)
+        logger.debug(f"Packed {len(packed.documents)} documents in {packed.tokens} tokens")
+        return packed.documents
+
     def align_input(
         self, input: Union[LLMParamsDoc, ChatCompletionRequest, SearchedDoc], prompt_template, input_variables
     ):
@@ -115,7 +152,7 @@ class OpeaTextGenService(OpeaComponent):
             logger.debug(f"Processing SearchedDoc input from retriever microservice:\n{pformat(vars(input), indent=2)}")
             prompt = input.initial_query
             if input.retrieved_docs:
-                docs = [doc.text for doc in input.retrieved_docs]
+                docs = self._pack_documents([doc.text for doc in input.retrieved_docs])
                 logger.debug(f"Retrieved documents:\n{pformat(docs, indent=2)}")
                 prompt = ChatTemplate.generate_rag_prompt(input.initial_query, docs, MODEL_NAME)
                 logger.debug(f"Generated RAG prompt:\n{prompt}")
@@ -131,7 +168,9 @@ class OpeaTextGenService(OpeaComponent):
             prompt = input.query
             if prompt_template:
                 if sorted(input_variables) == ["context", "question"]:
-                    prompt = prompt_template.format(question=input.query, context="\n".join(input.documents))
+                    prompt = prompt_template.format(
+                        question=input.query, context="\n".join(self._pack_documents(input.documents))
+                    )
                 elif input_variables == ["question"]:
                     prompt = prompt_template.format(question=input.query)
                 else:
@@ -141,7 +180,9 @@ class OpeaTextGenService(OpeaComponent):
             else:
                 if input.documents:
                     # use rag default template
-                    prompt = ChatTemplate.generate_rag_prompt(input.query, input.documents, input.model)
+                    prompt = ChatTemplate.generate_rag_prompt(
+                        input.query, self._pack_documents(input.documents), input.model
+                    )
 
             # convert to unified OpenAI /v1/chat/completions format
             new_input = ChatCompletionRequest(
@@ -161,7 +202,9 @@ class OpeaTextGenService(OpeaComponent):
             prompt = input.messages
             if prompt_template:
                 if sorted(input_variables) == ["context", "question"]:
-                    prompt = prompt_template.format(question=input.messages, context="\n".join(input.documents))
+                    prompt = prompt_template.format(
+                        question=input.messages, context="\n".join(self._pack_documents(input.documents))
+                    )
                 elif input_variables == ["question"]:
                     prompt = prompt_template.format(question=input.messages)
                 else:
@@ -171,7 +214,9 @@ class OpeaTextGenService(OpeaComponent):
             else:
                 if input.documents:
                     # use rag default template
-                    prompt = ChatTemplate.generate_rag_prompt(input.messages, input.documents, input.model)
+                    prompt = ChatTemplate.generate_rag_prompt(
+                        input.messages, self._pack_documents(input.documents), input.model
+                    )
 
             return prompt, input
 
@@ -201,7 +246,7 @@ class OpeaTextGenService(OpeaComponent):
                 if prompt_template:
                     system_prompt = prompt_template
                     if input_variables == ["context"]:
-                        system_prompt = prompt_template.format(context="\n".join(input.documents))
+                        system_prompt = prompt_template.format(context="\n".join(self._pack_documents(input.documents)))
                     else:
                         logger.info(
                             f"[ ChatCompletionRequest ] {prompt_template} not used, only support 1 input variables ['context']"
@@ -213,7 +258,7 @@ class OpeaTextGenService(OpeaComponent):
             input_params = {**vars(input), "model": MODEL_NAME}
             filtered_params = self._filter_api_params(input_params, ALLOWED_CHATCOMPLETION_ARGS)
             logger.debug(f"Filtered chat completion parameters:\n{pformat(filtered_params, indent=2)}")
-            chat_completion = await self.client.chat.completions.create(**filtered_params)
+            create_completion = self.client.chat.completions.create
             """TODO need validate following parameters for vllm
                 logit_bias=input.logit_bias,
                 logprobs=input.logprobs,
@@ -227,27 +272,51 @@ class OpeaTextGenService(OpeaComponent):
             input_params = {**vars(input), "model": MODEL_NAME, "prompt": prompt}
             filtered_params = self._filter_api_params(input_params, ALLOWED_COMPLETION_ARGS)
             logger.debug(f"Filtered completion parameters:\n{pformat(filtered_params, indent=2)}")
-            chat_completion = await self.client.completions.create(**filtered_params)
+            create_completion = self.client.completions.create
             """TODO need validate following parameters for vllm
                 best_of=input.best_of,
                 logit_bias=input.logit_bias,
                 logprobs=input.logprobs,"""
 
+        cache_key = None
+        if self.response_cache:
+            cache_key, cached = await self.response_cache.get(filtered_params)
+            if cached is not None:
+                logger.debug("Serving the response from the response cache")
+                if input.stream:
+                    return StreamingResponse(self._replay_stream(cached), media_type="text/event-stream")
+                return cached
+
+        chat_completion = await create_completion(**filtered_params)
+
         if input.stream:
 
             async def stream_generator():
+                chunks = []
                 async for c in chat_completion:
                     logger.debug(c)
                     chunk = c.model_dump_json()
                     if chunk not in ["<|im_end|>", "<|endoftext|>"]:
+                        chunks.append(chunk)
                         yield f"data: {chunk}\n\n"
                 yield "data: [DONE]\n\n"
+                # only complete streams are cached
+                if cache_key:
+                    await self.response_cache.set(cache_key, chunks)
 
             return StreamingResponse(stream_generator(), media_type="text/event-stream")
         else:
             logger.debug(chat_completion)
+            if cache_key:
+                await self.response_cache.set(cache_key, chat_completion)
             return chat_completion
 
+    async def _replay_stream(self, chunks: list):
+        """Replays the chunks of a cached streaming response as server-sent events."""
+        for chunk in chunks:
+            yield f"data: {chunk}\n\n"
+        yield "data: [DONE]\n\n"
+
     def _filter_api_params(self, input_params: dict, allowed_args: tuple) -> dict:
         """Filters input parameters to only include allowed non-None arguments.
 
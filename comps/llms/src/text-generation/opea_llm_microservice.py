@@ -40,6 +40,12 @@ else:
 
 # Initialize OpeaComponentLoader
 loader = OpeaComponentLoader(llm_component_name, description=f"OPEA LLM Component: {llm_component_name}")
+# report the hits of the response cache in /v1/statistics
+if getattr(loader.component, "response_cache", None) is not None:
+    statistics_dict["opea_service@llm_response_cache"] = loader.component.response_cache
+# report the tokens of the packed RAG contexts in /v1/statistics
+if getattr(loader.component, "context_packer", None) is not None:
+    statistics_dict["opea_service@llm_context_packer"] = loader.component.context_packer
 
 
 @register_microservice(
@@ -3,10 +3,12 @@
 import os
 from typing import Optional
 
+from fastapi import Request
 from prompt_store import PromptStore
 from pydantic import BaseModel
 
 from comps import CustomLogger
+from comps.cores.common.bulk import BulkIngestor, aiter_ndjson
 from comps.cores.mega.micro_service import opea_microservices, register_microservice
 
 logger = CustomLogger("prompt_registry")
@@ -69,6 +71,31 @@ async def create_prompt(prompt: PromptCreate):
         return None
 
 
+@register_microservice(
+    name="opea_service@prompt",
+    endpoint="/v1/prompt/create/bulk",
+    host="0.0.0.0",
+    input_datatype=PromptCreate,
+    port=6018,
+)
+async def create_prompt_bulk(request: Request):
+    """Creates and stores prompts from an NDJSON stream of PromptCreate objects, with one line per prompt.
+
+    Args:
+        request (Request): The request whose body is the NDJSON stream.
+
+    Returns:
+        JSON: The number of succeeded and failed lines, and the errors of the failed lines in order: their index
+            and error.
+    """
+    prompt_store = PromptStore(None)
+    prompt_store.initialize_storage()
+    ingestor = BulkIngestor(prompt_store.save_prompts, PromptCreate.model_validate)
+    response = await ingestor.ingest(aiter_ndjson(request.stream()))
+    logger.info(f"Bulk create: {ingestor.get_statistics()}")
+    return response
+
+
 @register_microservice(
     name="opea_service@prompt",
     endpoint="/v1/prompt/get",
@@ -7,6 +7,8 @@ from bson.objectid import ObjectId
 from integrations.mongo.config import COLLECTION_NAME
 from integrations.mongo.mongo_conn import MongoClient
 
+from comps.cores.common.bulk import insert_many_unordered
+
 
 class PromptStore:
 
@@ -44,6 +46,20 @@ class PromptStore:
             print(e)
             raise Exception(e)
 
+    async def save_prompts(self, prompts) -> list:
+        """Stores new prompts into the storage with one unordered insert.
+
+        A prompt that fails to insert does not stop the insertion of the others.
+
+        Args:
+            prompts (list): The prompts to be stored.
+
+        Returns:
+            list: For each prompt, in order, its ID or the exception that prevented storing it.
+        """
+        data = [item.model_dump(by_alias=True, mode="json", exclude={"id"}) for item in prompts]
+        return await insert_many_unordered(self.collection, data)
+
     async def get_all_prompt_of_user(self) -> list[dict]:
         """Retrieves all prompts of a user from the collection.
 
@@ -1,6 +1,8 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import hashlib
+import os
 import re
 from typing import List, Set, Union
 
@@ -13,43 +15,40 @@ from comps import (
     ServiceType,
     TextDoc,
 )
+from comps.cores.common.cache import LRUCache
+from comps.cores.common.context import ContextPacker, context_token_budget
+from comps.cores.mega.utils import load_model_configs
 from comps.prompt_template.src.integrations.utils.conversation_history_handler import ConversationHistoryHandler
 from comps.prompt_template.src.integrations.utils.templates import template_system_english as default_system_template
 from comps.prompt_template.src.integrations.utils.templates import template_user_english as default_user_template
 
 logger = CustomLogger("opea_prompt_template")
 
+# The reranked documents are packed into the context token budget of the model, see context_token_budget
+MODEL_NAME = os.getenv("LLM_MODEL_ID")
+MODEL_CONFIGS = os.getenv("MODEL_CONFIGS")
+# The number of distinct request templates kept compiled
+PROMPT_TEMPLATE_CACHE_SIZE = int(os.getenv("PROMPT_TEMPLATE_CACHE_SIZE", 256))
+# The placeholders of the default templates
+DEFAULT_PLACEHOLDERS = {"user_prompt", "reranked_docs"}
 
-@OpeaComponentRegistry.register("OPEA_PROMPT_TEMPLATE")
-class OPEAPromptTemplateGenerator(OpeaComponent):
-    def __init__(self, name: str, description: str, config: dict = {}):
-        super().__init__(name, ServiceType.PROMPT_TEMPLATE.name.lower(), description, config)
-        self._if_conv_history_in_prompt: bool = False
-        self._conversation_history_placeholder: str = "conversation_history"
-        self.ch_handler = ConversationHistoryHandler()
 
-        try:
-            self._validate(default_system_template, default_user_template)
-            self.system_prompt_template = default_system_template
-            self.user_prompt_template = default_user_template
-        except ValueError as e:
-            logger.error(f"Default prompt template validation failed, err={e}")
-            raise
+class CompiledPromptTemplate:
+    """A validated pair of system and user prompt templates.
 
-        logger.info("OPEAPromptTemplateGenerator initialized with default templates.")
+    Templates are compiled once and shared by all the requests using them, so they are never mutated.
 
-    def _validate(
-        self,
-        system_prompt_template: str,
-        user_prompt_template: str,
-        placeholders: Set[str] = {"user_prompt", "reranked_docs"},
-    ) -> None:
-        """Validate system and user prompt templates.
+    Attributes:
+        system_prompt_template (str): System prompt template string.
+        user_prompt_template (str): User prompt template string.
+        placeholders (Set[str]): The placeholders the request data must provide, without conversation history.
+        conversation_history (bool): Whether the templates contain the conversation history placeholder.
+    """
 
-        Args:
-            system_prompt_template: System prompt template string.
-            user_prompt_template: User prompt template string.
-            placeholders: Required placeholders set.
+    __slots__ = ("system_prompt_template", "user_prompt_template", "placeholders", "conversation_history")
+
+    def __init__(self, system_prompt_template: str, user_prompt_template: str, conversation_history_placeholder: str):
+        """Validate system and user prompt templates.
 
         Raises:
             ValueError: For various validation failures.
@@ -63,65 +62,42 @@ class OPEAPromptTemplateGenerator(OpeaComponent):
         if not system_placeholders and not user_placeholders:
             raise ValueError("Prompt templates do not contain any placeholders.")
 
-        if not placeholders:
-            raise ValueError("Expected placeholders set cannot be empty.")
-
         duplicates = system_placeholders.intersection(user_placeholders)
         if duplicates:
             raise ValueError(f"System and user prompt templates share placeholders: {duplicates}")
 
         combined_placeholders = system_placeholders.union(user_placeholders)
-
-        missing = placeholders - combined_placeholders
-        if missing:
-            raise ValueError(f"Prompt templates missing required placeholders: {missing}")
-
-        extras = combined_placeholders - placeholders
-        extras_no_conv = extras - {self._conversation_history_placeholder}
-        if extras_no_conv:
-            raise ValueError(f"Prompt templates contain unexpected placeholders: {extras_no_conv}")
-
-        if self._conversation_history_placeholder in extras:
-            self._if_conv_history_in_prompt = True
-        else:
+        self.system_prompt_template = system_prompt_template
+        self.user_prompt_template = user_prompt_template
+        self.placeholders = combined_placeholders - {conversation_history_placeholder}
+        self.conversation_history = conversation_history_placeholder in combined_placeholders
+        if not self.conversation_history:
             logger.warning(
                 "Placeholder {conversation_history} missing. LLM will not remember previous answers."
                 " Add {conversation_history} placeholder if conversation history is desired."
             )
-            self._if_conv_history_in_prompt = False
 
-    def _changed(
-        self,
-        new_system_prompt_template: str,
-        new_user_prompt_template: str,
-        placeholders: Set[str],
-    ) -> bool:
-        """Check if new templates differ and validate them.
+    def check(self, placeholders: Set[str]) -> None:
+        """Check the templates contain exactly the expected placeholders.
 
         Args:
-            new_system_prompt_template: New system prompt template.
-            new_user_prompt_template: New user prompt template.
-            placeholders: Expected placeholders set.
+            placeholders: Required placeholders set.
 
-        Returns:
-            True if templates changed and valid, False otherwise.
+        Raises:
+            ValueError: If placeholders are missing or unexpected.
         """
-        if not new_system_prompt_template.strip() and not new_user_prompt_template.strip():
-            logger.info("Empty new prompt templates, no change.")
-            return False
+        if not placeholders:
+            raise ValueError("Expected placeholders set cannot be empty.")
 
-        if new_system_prompt_template == getattr(
-            self, "system_prompt_template", None
-        ) and new_user_prompt_template == getattr(self, "user_prompt_template", None):
-            logger.info("Prompt templates unchanged.")
-            return False
+        missing = placeholders - self.placeholders
+        if missing:
+            raise ValueError(f"Prompt templates missing required placeholders: {missing}")
 
-        self._validate(new_system_prompt_template, new_user_prompt_template, placeholders)
-        self.system_prompt_template = new_system_prompt_template
-        self.user_prompt_template = new_user_prompt_template
-        return True
+        extras = self.placeholders - placeholders
+        if extras:
+            raise ValueError(f"Prompt templates contain unexpected placeholders: {extras}")
 
-    def _get_prompt(self, **kwargs) -> tuple[str, str]:
+    def format(self, **kwargs) -> tuple[str, str]:
         """Generate formatted prompts with provided kwargs.
 
         Returns:
@@ -131,6 +107,56 @@ class OPEAPromptTemplateGenerator(OpeaComponent):
         user_prompt = self.user_prompt_template.format(**kwargs).strip()
         return system_prompt, user_prompt
 
+
+@OpeaComponentRegistry.register("OPEA_PROMPT_TEMPLATE")
+class OPEAPromptTemplateGenerator(OpeaComponent):
+    def __init__(self, name: str, description: str, config: dict = {}):
+        super().__init__(name, ServiceType.PROMPT_TEMPLATE.name.lower(), description, config)
+        self._conversation_history_placeholder: str = "conversation_history"
+        self.ch_handler = ConversationHistoryHandler()
+        # compiled request templates, hash of the templates -> CompiledPromptTemplate
+        self.templates = LRUCache(PROMPT_TEMPLATE_CACHE_SIZE)
+        self.context_packer = None
+        model_config = load_model_configs(MODEL_CONFIGS).get(MODEL_NAME) if MODEL_CONFIGS else None
+        context_budget = context_token_budget(model_config)
+        if context_budget:
+            self.context_packer = ContextPacker(context_budget, tokenizer=MODEL_NAME)
+
+        try:
+            self.default_template = self._compile(default_system_template, default_user_template)
+            self.default_template.check(DEFAULT_PLACEHOLDERS)
+        except ValueError as e:
+            logger.error(f"Default prompt template validation failed, err={e}")
+            raise
+
+        logger.info("OPEAPromptTemplateGenerator initialized with default templates.")
+
+    def _compile(self, system_prompt_template: str, user_prompt_template: str) -> CompiledPromptTemplate:
+        return CompiledPromptTemplate(
+            system_prompt_template, user_prompt_template, self._conversation_history_placeholder
+        )
+
+    def _get_template(self, system_prompt_template: str, user_prompt_template: str) -> CompiledPromptTemplate:
+        """Resolve the compiled templates of a request, compiling and caching them on first use.
+
+        Args:
+            system_prompt_template: System prompt template string.
+            user_prompt_template: User prompt template string.
+
+        Returns:
+            The compiled templates.
+
+        Raises:
+            ValueError: If the templates are invalid.
+        """
+        key = hashlib.sha256(f"{system_prompt_template}\0{user_prompt_template}".encode()).hexdigest()
+        template = self.templates.get(key)
+        if template is None:
+            template = self._compile(system_prompt_template, user_prompt_template)
+            self.templates.set(key, template)
+            logger.debug(f"Compiled prompt templates {key}")
+        return template
+
     def _parse_reranked_docs(self, reranked_docs: List[Union[dict, TextDoc]]) -> str:
         """Format reranked documents into string.
 
@@ -138,9 +164,10 @@ class OPEAPromptTemplateGenerator(OpeaComponent):
             reranked_docs: List of document dicts or TextDoc instances.
 
         Returns:
-            Formatted string with sources and sections.
+            Formatted string with sources and sections, packed into the context token budget if one is configured.
         """
         formatted_docs = []
+        scores = []
         for doc in reranked_docs:
             metadata = None
             text = None
@@ -148,9 +175,11 @@ class OPEAPromptTemplateGenerator(OpeaComponent):
             if isinstance(doc, dict):
                 metadata = doc.get("metadata")
                 text = doc.get("text")
+                scores.append(doc.get("score"))
             elif isinstance(doc, TextDoc):
                 metadata = getattr(doc, "metadata", None)
                 text = getattr(doc, "text", None)
+                scores.append(getattr(doc, "score", None))
             else:
                 logger.error(f"Unsupported document type: {type(doc)}")
                 raise ValueError(f"Unsupported document type: {type(doc)}")
@@ -168,6 +197,10 @@ class OPEAPromptTemplateGenerator(OpeaComponent):
 
             formatted_docs.append(f"[File: {file_info}{header_part}]\n{text or ''}")
 
+        if self.context_packer:
+            packed = self.context_packer.pack(formatted_docs, scores if None not in scores else None)
+            logger.debug(f"Packed {len(packed.documents)}/{len(formatted_docs)} documents in {packed.tokens} tokens")
+            formatted_docs = packed.documents
         return "\n\n".join(formatted_docs)
 
     async def invoke(self, input: PromptTemplateInput) -> LLMParamsDoc:
@@ -182,19 +215,14 @@ class OPEAPromptTemplateGenerator(OpeaComponent):
         keys = set(input.data.keys())
         logger.debug(f"Input data keys: {keys}")
 
-        if input.system_prompt_template and input.user_prompt_template:
-            if self._changed(input.system_prompt_template, input.user_prompt_template, keys):
-                logger.info("Prompt templates updated.")
-                logger.debug(f"System template:\n{self.system_prompt_template}")
-                logger.debug(f"User template:\n{self.user_prompt_template}")
+        template = self.default_template
+        system_prompt_template, user_prompt_template = input.system_prompt_template, input.user_prompt_template
+        if system_prompt_template and user_prompt_template:
+            if system_prompt_template.strip() or user_prompt_template.strip():
+                template = self._get_template(system_prompt_template, user_prompt_template)
+                template.check(keys)
             else:
-                logger.debug("Prompt templates not updated.")
-                expected_sys = extract_placeholders_from_template(self.system_prompt_template)
-                expected_user = extract_placeholders_from_template(self.user_prompt_template)
-                expected = expected_sys.union(expected_user) - {self._conversation_history_placeholder}
-                if keys != expected:
-                    logger.error(f"Input keys {keys} do not match expected {expected}")
-                    raise ValueError(f"Input keys {keys} do not match expected {expected}")
+                logger.info("Empty prompt templates, using the default templates.")
 
         prompt_data = {}
         for k, v in input.data.items():
@@ -204,14 +232,14 @@ class OPEAPromptTemplateGenerator(OpeaComponent):
                 prompt_data[k] = extract_text_from_nested_dict(v)
             logger.debug(f"Extracted text for key '{k}': {prompt_data[k]}")
 
-        if self._if_conv_history_in_prompt:
+        if template.conversation_history:
             params = {}
             prompt_data[self._conversation_history_placeholder] = self.ch_handler.parse_conversation_history(
                 input.conversation_history, input.conversation_history_parse_type, params
             )
 
         try:
-            system_prompt, user_prompt = self._get_prompt(**prompt_data)
+            system_prompt, user_prompt = template.format(**prompt_data)
         except KeyError as e:
             logger.error(f"Missing key in prompt data: {e}")
             raise
@@ -230,10 +258,11 @@ class OPEAPromptTemplateGenerator(OpeaComponent):
             bool: True if healthy, False otherwise.
         """
         try:
-            if not self.system_prompt_template or not self.user_prompt_template:
+            template = self.default_template
+            if not template.system_prompt_template or not template.user_prompt_template:
                 logger.error("System or user prompt template is empty.")
                 return False
-            self._validate(self.system_prompt_template, self.user_prompt_template)
+            template.check(DEFAULT_PLACEHOLDERS)
             return True
         except Exception as e:
             logger.error(f"Prompt template health check failed: {e}")
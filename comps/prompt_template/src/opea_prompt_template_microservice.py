@@ -67,6 +67,11 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"Failed to initialize component: {e}")
         exit(1)
+    # report the hits of the compiled template cache in /v1/statistics
+    statistics_dict["opea_service@prompt_template_cache"] = component_loader.component.templates
+    # report the tokens of the packed reranked documents in /v1/statistics
+    if getattr(component_loader.component, "context_packer", None) is not None:
+        statistics_dict["opea_service@prompt_template_context_packer"] = component_loader.component.context_packer
 
     logger.info("Prompt template service started.")
     opea_microservices["opea_service@prompt_template"].start()
@@ -28,6 +28,10 @@ logflag = os.getenv("LOGFLAG", False)
 rerank_component_name = os.getenv("RERANK_COMPONENT_NAME", "OPEA_TEI_RERANKING")
 # Initialize OpeaComponentLoader
 loader = OpeaComponentLoader(rerank_component_name, description=f"OPEA RERANK Component: {rerank_component_name}")
+# Merge concurrent requests into batches for the component's invoke_batch
+enable_dynamic_batching = os.getenv("ENABLE_DYNAMIC_BATCHING", "").strip().lower() in {"true", "1", "yes"}
+dynamic_batching_timeout = float(os.getenv("DYNAMIC_BATCHING_TIMEOUT", 0.01))
+dynamic_batching_max_batch_size = int(os.getenv("DYNAMIC_BATCHING_MAX_BATCH_SIZE", 32))
 
 
 @register_microservice(
@@ -36,6 +40,9 @@ loader = OpeaComponentLoader(rerank_component_name, description=f"OPEA RERANK Co
     endpoint="/v1/reranking",
     host="0.0.0.0",
     port=8000,
+    dynamic_batching=enable_dynamic_batching,
+    dynamic_batching_timeout=dynamic_batching_timeout,
+    dynamic_batching_max_batch_size=dynamic_batching_max_batch_size,
 )
 @opea_telemetry
 @register_statistics(names=["opea_service@reranking"])
@@ -50,7 +57,12 @@ async def reranking(
 
     try:
         # Use the loader to invoke the component
-        reranking_response = await loader.invoke(input)
+        if enable_dynamic_batching:
+            reranking_response = await opea_microservices["opea_service@reranking"].dynamic_batching_request(
+                ServiceType.RERANK, input
+            )
+        else:
+            reranking_response = await loader.invoke(input)
 
         # Log the result if logging is enabled
         if logflag:
@@ -65,6 +77,10 @@ async def reranking(
         raise
 
 
+if enable_dynamic_batching:
+    opea_microservices["opea_service@reranking"].dynamic_batching_component = loader
+
+
 if __name__ == "__main__":
     opea_microservices["opea_service@reranking"].start()
     logger.info("OPEA Reranking Microservice is starting...")
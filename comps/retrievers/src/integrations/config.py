@@ -118,6 +118,11 @@ REDIS_URL = format_redis_conn_from_env()
 REDIS_SCHEMA = os.getenv("REDIS_SCHEMA", "redis_schema_multi.yml")
 schema_path = os.path.join(parent_dir, REDIS_SCHEMA)
 INDEX_SCHEMA = schema_path
+# Connections shared by the searches of all indexes, handles and emptiness checks cached per index
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 64))
+REDIS_INDEX_CACHE_SIZE = int(os.getenv("REDIS_INDEX_CACHE_SIZE", 128))
+REDIS_INDEX_CHECK_TTL = float(os.getenv("REDIS_INDEX_CHECK_TTL", 5))
+REDIS_SEARCH_THREADS = int(os.getenv("REDIS_SEARCH_THREADS", 8))
 
 
 #######################################################
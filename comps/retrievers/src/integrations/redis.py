@@ -5,12 +5,16 @@
 import asyncio
 import os
 from concurrent.futures import ThreadPoolExecutor
-from typing import Union
+from typing import List, Optional, Union
 
+import numpy as np
+import redis
 from fastapi import HTTPException
 from langchain.vectorstores import Redis
 from langchain_community.embeddings import HuggingFaceInferenceAPIEmbeddings
+from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEmbeddings
+from redis import asyncio as aioredis
 
 from comps import (
     CustomLogger,
@@ -21,6 +25,7 @@ from comps import (
     SearchedDoc,
     ServiceType,
 )
+from comps.cores.common.cache import LRUCache
 from comps.cores.proto.api_protocol import ChatCompletionRequest, EmbeddingResponse, RetrievalRequest, RetrievalResponse
 
 from .config import (
@@ -30,13 +35,17 @@ from .config import (
     HF_TOKEN,
     INDEX_NAME,
     INDEX_SCHEMA,
+    REDIS_INDEX_CACHE_SIZE,
+    REDIS_INDEX_CHECK_TTL,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_SEARCH_THREADS,
     REDIS_URL,
     TEI_EMBEDDING_ENDPOINT,
 )
 
 logger = CustomLogger("redis_retrievers")
 logflag = os.getenv("LOGFLAG", False)
-executor = ThreadPoolExecutor()
+executor = ThreadPoolExecutor(max_workers=REDIS_SEARCH_THREADS)
 
 
 async def run_in_thread(func, *args, **kwargs):
@@ -48,14 +57,30 @@ async def run_in_thread(func, *args, **kwargs):
 class OpeaRedisRetriever(OpeaComponent):
     """A specialized retriever component derived from OpeaComponent for redis retriever services.
 
+    Similarity searches are sent as raw FT.SEARCH queries through a shared async connection pool, one pipeline
+    for all the query vectors of a request. The LangChain vector store of each index is only used for its schema
+    and for the search types embedding the query text.
+
     Attributes:
         client (redis.Redis): An instance of the redis client for vector database operations.
+        async_client (redis.asyncio.Redis): The async client running the similarity searches.
+        vector_stores (LRUCache): The LangChain vector store of the most recently searched indexes.
+        index_has_docs (LRUCache): Whether the recently searched indexes hold documents, for a few seconds.
     """
 
     def __init__(self, name: str, description: str, config: dict = None):
         super().__init__(name, ServiceType.RETRIEVER.name.lower(), description, config)
         self.embeddings = asyncio.run(self._initialize_embedder())
+        # connection pools shared by all the indexes
+        self.connection_pool = redis.BlockingConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+        self.async_client = aioredis.Redis(
+            connection_pool=aioredis.BlockingConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS)
+        )
+        self.vector_stores = LRUCache(REDIS_INDEX_CACHE_SIZE)
+        self.index_has_docs = LRUCache(REDIS_INDEX_CACHE_SIZE, ttl=REDIS_INDEX_CHECK_TTL)
         self.client = asyncio.run(self._initialize_client())
+        if self.client:
+            self.vector_stores.set(INDEX_NAME, self.client)
         health_status = self.check_health()
         if not health_status:
             logger.error("OpeaRedisRetriever health check failed.")
@@ -107,8 +132,11 @@ class OpeaRedisRetriever(OpeaComponent):
                     embedding=self.embeddings, index_name=index_name, index_schema=INDEX_SCHEMA, redis_url=REDIS_URL
                 )
             else:
-                logger.info(f"generate redis instance with index_name:{INDEX_NAME}")
+                logger.info(f"generate redis instance with index_name:{index_name}")
                 client = Redis(embedding=self.embeddings, index_name=index_name, redis_url=REDIS_URL)
+            # use the shared connection pool instead of a connection per index
+            client.client.close()
+            client.client = redis.Redis(connection_pool=self.connection_pool)
             return client
         except Exception as e:
             logger.error(f"fail to initialize redis client: {e}")
@@ -145,23 +173,16 @@ class OpeaRedisRetriever(OpeaComponent):
         if logflag:
             logger.info(input)
 
-        client = self.client
-        if isinstance(input, EmbedDoc) and input.index_name and input.index_name != INDEX_NAME:
-            client = asyncio.run(self._initialize_client(index_name=input.index_name))
-
-        # check if the Redis index has data
-        try:
-            keys_exist = client.client.dbsize() > 0
-
-        except Exception as e:
-            logger.error(f"Redis key check failed: {e}")
-            keys_exist = False
+        index_name = INDEX_NAME
+        if isinstance(input, EmbedDoc) and input.index_name:
+            index_name = input.index_name
 
-        if not keys_exist:
+        if not await self._index_has_docs(index_name):
             if logflag:
                 logger.info("No data in Redis index, return []")
             search_res = []
         else:
+            client = await self._get_vector_store(index_name)
             if isinstance(input, EmbedDoc) or isinstance(input, EmbedMultimodalDoc):
                 embedding_data_input = input.embedding
             else:
@@ -174,19 +195,14 @@ class OpeaRedisRetriever(OpeaComponent):
 
             # if the Redis index has data, perform the search
             if input.search_type == "similarity":
-                search_res = await run_in_thread(
-                    client.similarity_search_by_vector, embedding=embedding_data_input, k=input.k
-                )
+                search_res = await self._search_by_vectors(client, embedding_data_input, k=input.k)
             elif input.search_type == "similarity_distance_threshold":
                 if input.distance_threshold is None:
                     raise ValueError(
                         "distance_threshold must be provided for " + "similarity_distance_threshold retriever"
                     )
-                search_res = await run_in_thread(
-                    client.similarity_search_by_vector,
-                    embedding=input.embedding,
-                    k=input.k,
-                    distance_threshold=input.distance_threshold,
+                search_res = await self._search_by_vectors(
+                    client, embedding_data_input, k=input.k, distance_threshold=input.distance_threshold
                 )
             elif input.search_type == "similarity_score_threshold":
                 docs_and_similarities = await run_in_thread(
@@ -211,3 +227,95 @@ class OpeaRedisRetriever(OpeaComponent):
             logger.info(search_res)
 
         return search_res
+
+    async def _get_vector_store(self, index_name: str) -> Redis:
+        """Returns the LangChain vector store of an index, created on its first search."""
+        client = self.vector_stores.get(index_name)
+        if client is None:
+            client = await run_in_thread(lambda: asyncio.run(self._initialize_client(index_name=index_name)))
+            if client is None:
+                raise HTTPException(status_code=500, detail=f"Fail to initialize redis client of index {index_name}.")
+            self.vector_stores.set(index_name, client)
+        return client
+
+    async def _index_has_docs(self, index_name: str) -> bool:
+        """Checks whether an index holds documents, the answer is cached for REDIS_INDEX_CHECK_TTL seconds."""
+        has_docs = self.index_has_docs.get(index_name)
+        if has_docs is None:
+            try:
+                info = await self.async_client.ft(index_name).info()
+                has_docs = int(info.get("num_docs", 0)) > 0
+            except redis.ResponseError as e:
+                # the index does not exist (yet)
+                if logflag:
+                    logger.info(f"Redis index {index_name} check failed: {e}")
+                has_docs = False
+            except Exception as e:
+                logger.error(f"Redis key check failed: {e}")
+                return False
+            self.index_has_docs.set(index_name, has_docs)
+        return has_docs
+
+    async def _search_by_vectors(
+        self, client: Redis, embedding: list, k: int, distance_threshold: Optional[float] = None
+    ) -> List[Document]:
+        """Searches the nearest documents of one or several query vectors.
+
+        The FT.SEARCH queries of all the vectors are sent in one pipeline. With several vectors, the documents
+        found for any of them are merged by distance and the k nearest are returned.
+        """
+        vectors = embedding if embedding and isinstance(embedding[0], list) else [embedding]
+        schema = client._schema
+        vector_key = schema.content_vector_key
+        if distance_threshold is not None:
+            query = f"@{vector_key}:[VECTOR_RANGE $distance_threshold $vector]=>{{$yield_distance_as: distance}}"
+        else:
+            query = f"(*)=>[KNN {k} @{vector_key} $vector AS distance]"
+        return_fields = [schema.content_key, "distance", *schema.metadata_keys]
+
+        async with self.async_client.pipeline(transaction=False) as pipe:
+            for vector in vectors:
+                params = ["vector", np.array(vector).astype(schema.vector_dtype).tobytes()]
+                if distance_threshold is not None:
+                    params += ["distance_threshold", distance_threshold]
+                pipe.execute_command(
+                    "FT.SEARCH",
+                    client.index_name,
+                    query,
+                    "PARAMS",
+                    len(params),
+                    *params,
+                    "RETURN",
+                    len(return_fields),
+                    *return_fields,
+                    "SORTBY",
+                    "distance",
+                    "ASC",
+                    "LIMIT",
+                    0,
+                    k,
+                    "DIALECT",
+                    2,
+                )
+            responses = await pipe.execute()
+
+        results = {}  # document id -> (distance, document)
+        for response in responses:
+            for doc_id, fields in zip(response[1::2], response[2::2]):
+                doc_id = doc_id.decode() if isinstance(doc_id, bytes) else doc_id
+                values = {
+                    (key.decode() if isinstance(key, bytes) else key): (
+                        value.decode(errors="replace") if isinstance(value, bytes) else value
+                    )
+                    for key, value in zip(fields[::2], fields[1::2])
+                }
+                distance = float(values.get("distance", 0))
+                if doc_id in results and results[doc_id][0] <= distance:
+                    continue
+                metadata = {"id": doc_id}
+                metadata.update({key: values.get(key) for key in schema.metadata_keys})
+                results[doc_id] = (
+                    distance,
+                    Document(page_content=values.get(schema.content_key, ""), metadata=metadata),
+                )
+        return [doc for _, doc in sorted(results.values(), key=lambda result: result[0])[:k]]
@@ -1,7 +1,9 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 from abc import ABC, abstractmethod
+from typing import List
 
 
 class BaseController(ABC):
@@ -12,3 +14,7 @@ class BaseController(ABC):
     def route(self, messages, **kwargs):
         """Determines the appropriate routing based on input messages."""
         pass
+
+    async def aroute_batch(self, batch: List[list]) -> List[str]:
+        """Determines the routing of a batch of message lists, by default one by one off the event loop."""
+        return await asyncio.to_thread(lambda: [self.route(messages) for messages in batch])
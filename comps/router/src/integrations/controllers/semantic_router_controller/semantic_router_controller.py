@@ -1,21 +1,32 @@
 # Copyright (C) 2025 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import hashlib
 import logging
 import os
+import tempfile
+from typing import List, Optional
+
+import numpy as np
 
 # from decorators import log_latency
 from dotenv import load_dotenv
-from semantic_router import Route
 from semantic_router.encoders import HuggingFaceEncoder, OpenAIEncoder
-from semantic_router.routers import SemanticRouter
 
+from comps.cores.common.cache import LRUCache
+from comps.cores.common.inference import BatchInference
 from comps.cores.telemetry.opea_telemetry import opea_telemetry
 from comps.router.src.integrations.controllers.base_controller import BaseController
 
 load_dotenv()
 hf_token = os.getenv("HF_TOKEN", "")
 openai_api_key = os.getenv("OPENAI_API_KEY", "")
+# Number of route decisions kept for recurring queries
+ROUTER_CACHE_SIZE = int(os.getenv("ROUTER_CACHE_SIZE", 10000))
+# Maximum number of queries per encoder call
+ROUTER_ENCODER_BATCH_SIZE = int(os.getenv("ROUTER_ENCODER_BATCH_SIZE", 32))
+# Directory of the utterance embeddings kept across restarts and config reloads, empty to disable
+ROUTER_EMBEDDING_CACHE_DIR = os.getenv("ROUTER_EMBEDDING_CACHE_DIR", "")
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,7 +34,61 @@ logging.basicConfig(
 )
 
 
+class EmbeddingDiskCache:
+    """Stores the embedding of each utterance in a .npy file named after the hash of the encoder and the utterance.
+
+    Changing the routes only encodes the new utterances, and a restarted router loads the others from disk instead
+    of encoding them again.
+    """
+
+    def __init__(self, directory: str, namespace: str):
+        self.directory = directory
+        self.namespace = namespace
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, utterance: str) -> str:
+        key = hashlib.sha256(f"{self.namespace}\0{utterance}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.npy")
+
+    def get(self, utterance: str) -> Optional[np.ndarray]:
+        try:
+            return np.load(self.path(utterance))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring the unreadable cached embedding of '{utterance}': {e}")
+            return None
+
+    def set(self, utterance: str, embedding: np.ndarray):
+        # write to a temporary file first, so that concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, embedding)
+            os.replace(tmp_path, self.path(utterance))
+        except Exception as e:
+            logging.warning(f"Failed to cache the embedding of '{utterance}': {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
 class SemanticRouterController(BaseController):
+    """Routes a query to the route whose utterances are the most similar to it.
+
+    The utterances of each route are encoded once and averaged into a centroid, the centroids form one contiguous
+    matrix, so a batch of queries is scored with a single matrix product. Queries are encoded in batches from a
+    single encoder worker, and the decisions are cached, so a recurring query costs no encoder forward.
+
+    Attributes:
+        route_names (List[str]): The names of the routes, the rows of `centroids`.
+        centroids (np.ndarray): The unit centroids of the utterance embeddings of each route.
+        score_threshold (float): The minimum similarity of a route, the first route is chosen below it.
+        decisions (LRUCache): The cache of the route decisions, query -> route name.
+        inference (BatchInference): Runs the encoder on batches of queries from a single worker thread.
+        embedding_cache (EmbeddingDiskCache): The utterance embeddings on disk, None if ROUTER_EMBEDDING_CACHE_DIR
+            is not set.
+    """
+
     def __init__(self, config, api_key=None, model_map=None):
         self.config = config
         self.model_map = model_map or {}
@@ -53,17 +118,92 @@ class SemanticRouterController(BaseController):
             os.environ["OPENAI_API_KEY"] = api_key
             self.encoder = OpenAIEncoder(model=model_name)
 
+        self.score_threshold = float(
+            config.get("score_threshold", getattr(self.encoder, "score_threshold", None) or 0.0)
+        )
+        self.decisions = LRUCache(ROUTER_CACHE_SIZE)
+        self.inference = BatchInference(self._encode, max_batch_size=ROUTER_ENCODER_BATCH_SIZE)
+        self.embedding_cache = (
+            EmbeddingDiskCache(ROUTER_EMBEDDING_CACHE_DIR, f"{provider}:{model_name}")
+            if ROUTER_EMBEDDING_CACHE_DIR
+            else None
+        )
+
         # build your routing layer
         self._build_route_layer()
 
+    def _encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Returns the unit embeddings of the texts, one row per text, the encoder embeds them in one call."""
+        embeddings = np.asarray(self.encoder(texts), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms == 0, 1, norms)
+
     def _build_route_layer(self):
         # Build routes from the local controller config
         routes = self.config.get("routes", [])
-        route_list = [Route(name=route["name"], utterances=route["utterances"]) for route in routes]
-
-        # Reinitialize SemanticRouter to clear previous embeddings when switching models
-        self.route_layer = SemanticRouter(encoder=self.encoder, routes=route_list)
-        logging.info("[DEBUG] Successfully re-initialized SemanticRouter with fresh embeddings.")
+        self.route_names = [route["name"] for route in routes]
+        self.decisions.clear()
+        if not routes:
+            self.centroids = np.zeros((0, 0), dtype=np.float32)
+            return
+
+        utterances = [utterance for route in routes for utterance in route["utterances"]]
+        embeddings = self._encode_utterances(utterances)
+        offsets = np.cumsum([0] + [len(route["utterances"]) for route in routes])
+        centroids = np.stack([embeddings[start:end].mean(axis=0) for start, end in zip(offsets[:-1], offsets[1:])])
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        centroids /= np.where(norms == 0, 1, norms)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        logging.info(f"[DEBUG] Successfully encoded the centroids of {len(routes)} routes.")
+
+    def _encode_utterances(self, utterances: List[str]) -> np.ndarray:
+        """Returns the unit embeddings of the utterances, only encoding those missing from the disk cache."""
+        if self.embedding_cache is None:
+            return np.stack(self.inference(utterances))
+
+        embeddings = [self.embedding_cache.get(utterance) for utterance in utterances]
+        missing = list({utterance: None for utterance, embedding in zip(utterances, embeddings) if embedding is None})
+        if missing:
+            encoded = dict(zip(missing, self.inference(missing)))
+            for utterance, embedding in encoded.items():
+                self.embedding_cache.set(utterance, embedding)
+            embeddings = [
+                encoded[utterance] if embedding is None else embedding
+                for utterance, embedding in zip(utterances, embeddings)
+            ]
+        logging.info(f"Encoded {len(missing)} utterances, loaded {len(utterances) - len(missing)} from the cache.")
+        return np.stack(embeddings)
+
+    def _decide(self, embeddings: np.ndarray) -> List[str]:
+        """Returns the route name of each query embedding."""
+        if not self.route_names:
+            raise ValueError("No routes available in the configuration.")
+        scores = embeddings @ self.centroids.T
+        best = scores.argmax(axis=1)
+        return [
+            self.route_names[i] if scores[row, i] >= self.score_threshold else self.route_names[0]
+            for row, i in enumerate(best)
+        ]
+
+    def _endpoints(self, queries: List[str], decisions: dict) -> List[str]:
+        endpoints = []
+        for query in queries:
+            endpoint_key = decisions[query]
+            # Lookup the endpoint in the model_map
+            model_entry = self.model_map.get(endpoint_key)
+            if model_entry is None:
+                raise ValueError(f"Inference endpoint '{endpoint_key}' not found in global model_map.")
+            endpoints.append(model_entry["endpoint"])
+        return endpoints
+
+    def _cached_decisions(self, queries: List[str]):
+        decisions = {query: self.decisions.get(query) for query in queries}
+        return decisions, [query for query, name in decisions.items() if name is None]
+
+    def _store_decisions(self, decisions: dict, queries: List[str], embeddings: list):
+        for query, name in zip(queries, self._decide(np.stack(embeddings))):
+            decisions[query] = name
+            self.decisions.set(query, name)
 
     @opea_telemetry
     def route(self, messages):
@@ -72,21 +212,19 @@ class SemanticRouterController(BaseController):
         It looks up the model_map to retrieve the nested endpoint value.
         """
         query = messages[0]["content"]
-
-        route_choice = self.route_layer(query)
-        endpoint_key = route_choice.name
-
-        if not endpoint_key:
-            routes = self.config.get("routes", [])
-            if routes:
-                endpoint_key = routes[0]["name"]
-            else:
-                raise ValueError("No routes available in the configuration.")
-
-        # Lookup the endpoint in the model_map
-        model_entry = self.model_map.get(endpoint_key)
-        if model_entry is None:
-            raise ValueError(f"Inference endpoint '{endpoint_key}' not found in global model_map.")
-
-        # Return the endpoint from the model map
-        return model_entry["endpoint"]
+        decisions, missing = self._cached_decisions([query])
+        if missing:
+            self._store_decisions(decisions, missing, self.inference(missing))
+        return self._endpoints([query], decisions)[0]
+
+    async def aroute_batch(self, batch: List[list]) -> List[str]:
+        """Routes a batch of message lists with one encoder call for the queries whose decision is not cached."""
+        queries = [messages[0]["content"] for messages in batch]
+        decisions, missing = self._cached_decisions(queries)
+        if missing:
+            self._store_decisions(decisions, missing, await self.inference.run(missing))
+        return self._endpoints(queries, decisions)
+
+    def get_statistics(self) -> dict:
+        """Returns the decision cache and encoder counters, in the format of /v1/statistics."""
+        return {"decisions": self.decisions.get_statistics(), "encoder": self.inference.get_statistics()}
@@ -2,6 +2,8 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import os
+import threading
+import time
 
 import yaml
 
@@ -11,6 +13,7 @@ from comps import (
     TextDoc,
     opea_microservices,
     register_microservice,
+    statistics_dict,
 )
 from comps.cores.proto.api_protocol import RouteEndpointDoc
 from comps.router.src.integrations.controllers.controller_factory import ControllerFactory
@@ -20,44 +23,114 @@ logger = CustomLogger("opea_router_microservice")
 logflag = os.getenv("LOGFLAG", False)
 
 CONFIG_PATH = os.getenv("CONFIG_PATH")
+# Merge concurrent queries into batches for the controller's aroute_batch
+enable_dynamic_batching = os.getenv("ENABLE_DYNAMIC_BATCHING", "").strip().lower() in {"true", "1", "yes"}
+dynamic_batching_timeout = float(os.getenv("DYNAMIC_BATCHING_TIMEOUT", 0.005))
+dynamic_batching_max_batch_size = int(os.getenv("DYNAMIC_BATCHING_MAX_BATCH_SIZE", 32))
+# Seconds between checks of the config files for changes, 0 to load them only at startup
+config_watch_interval = float(os.getenv("ROUTER_CONFIG_WATCH_INTERVAL", 0))
 
 _config_data = {}
 _controller_factory = None
 _controller = None
 
 
-def _load_config():
-    global _config_data, _controller_factory, _controller
-
+def _read_config() -> dict:
     try:
         with open(CONFIG_PATH, "r") as f:
-            new_data = yaml.safe_load(f) or {}
+            return yaml.safe_load(f) or {}
     except Exception as e:
         logger.error(f"Failed to load config: {e}")
         raise RuntimeError(f"Failed to load config: {e}")
 
-    _config_data = new_data
-    logger.info(f"[Router] Loaded config data from: {CONFIG_PATH}")
 
-    if _controller_factory is None:
-        _controller_factory = ControllerFactory()
-
-    model_map = _config_data.get("model_map", {})
-    controller_type = os.getenv("CONTROLLER_TYPE") or _config_data.get("controller_type", "routellm")
+def _controller_config_path(config_data: dict) -> str:
+    controller_type = os.getenv("CONTROLLER_TYPE") or config_data.get("controller_type", "routellm")
 
     # look up the correct controller-config path
     try:
-        controller_config_path = _config_data["controller_config_paths"][controller_type]
+        return config_data["controller_config_paths"][controller_type]
     except KeyError:
         raise RuntimeError(f"No config path for controller_type='{controller_type}' in global config")
 
-    _controller = _controller_factory.factory(controller_config=controller_config_path, model_map=model_map)
 
-    logger.info("[Router] Controller re-initialized successfully.")
+def _load_config():
+    """Builds a controller from the config files, then swaps it in for the current one.
+
+    The new controller is fully built, with its routes encoded, before the swap, which is a single assignment:
+    requests already holding the previous controller finish on it, the following ones use the new one.
+    """
+    global _config_data, _controller_factory, _controller
+
+    start = time.perf_counter()
+    config_data = _read_config()
+    logger.info(f"[Router] Loaded config data from: {CONFIG_PATH}")
+
+    if _controller_factory is None:
+        _controller_factory = ControllerFactory()
+
+    model_map = config_data.get("model_map", {})
+    controller = _controller_factory.factory(
+        controller_config=_controller_config_path(config_data), model_map=model_map
+    )
 
+    _config_data, _controller = config_data, controller
+    # report the cached route decisions in /v1/statistics
+    if hasattr(controller, "get_statistics"):
+        statistics_dict["opea_service@router_decisions"] = controller
+    else:
+        statistics_dict.pop("opea_service@router_decisions", None)
 
-# Initial config load at startup
-_load_config()
+    logger.info(f"[Router] Controller re-initialized successfully in {time.perf_counter() - start:.1f}s.")
+
+
+def _config_signature() -> tuple:
+    """Returns the modification time and size of the config files, to tell when they change."""
+    paths = [CONFIG_PATH]
+    try:
+        paths.append(_controller_config_path(_config_data))
+    except RuntimeError:
+        pass
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def _watch_config(interval: float):
+    """Reloads the controller when the config files change, from a background thread off the request path."""
+    signature = _config_signature()
+    while True:
+        time.sleep(interval)
+        current = _config_signature()
+        if current == signature:
+            continue
+        signature = current
+        logger.info("[Router] Config changed, building a new controller.")
+        try:
+            _load_config()
+        except Exception as e:
+            logger.error(f"[Router] Failed to reload the config, keeping the current controller: {e}")
+
+
+class _ControllerBatch:
+    """Serves MicroService dynamic batching, each request on the controller it was queued with."""
+
+    async def invoke_batch(self, inputs: list) -> list:
+        # a config reload may swap the controller between two requests of a batch
+        groups = {}  # controller id -> (controller, indices of its requests)
+        for i, (controller, _) in enumerate(inputs):
+            groups.setdefault(id(controller), (controller, []))[1].append(i)
+        results = [None] * len(inputs)
+        for controller, indices in groups.values():
+            endpoints = await controller.aroute_batch([inputs[i][1] for i in indices])
+            for i, endpoint in zip(indices, endpoints):
+                results[i] = endpoint
+        return results
 
 
 @register_microservice(
@@ -68,20 +141,30 @@ _load_config()
     port=6000,
     input_datatype=TextDoc,
     output_datatype=RouteEndpointDoc,
+    dynamic_batching=enable_dynamic_batching,
+    dynamic_batching_timeout=dynamic_batching_timeout,
+    dynamic_batching_max_batch_size=dynamic_batching_max_batch_size,
 )
-def route_microservice(input: TextDoc) -> RouteEndpointDoc:
+async def route_microservice(input: TextDoc) -> RouteEndpointDoc:
     """Microservice that decides which model endpoint is best for the given text input.
 
     Returns only the route URL (does not forward).
     """
-    if not _controller:
+    # a config reload may swap the controller, this request finishes on the one it started with
+    controller = _controller
+    if not controller:
         raise RuntimeError("Controller is not initialized — config load failed?")
 
     query_content = input.text
     messages = [{"content": query_content}]
 
     try:
-        endpoint = _controller.route(messages)
+        if enable_dynamic_batching:
+            endpoint = await opea_microservices["opea_service@router"].dynamic_batching_request(
+                ServiceType.LLM, (controller, messages)
+            )
+        else:
+            endpoint = (await controller.aroute_batch([messages]))[0]
         if not endpoint:
             raise ValueError("No suitable model endpoint found.")
         return RouteEndpointDoc(url=endpoint)
@@ -91,6 +174,16 @@ def route_microservice(input: TextDoc) -> RouteEndpointDoc:
         raise
 
 
+if enable_dynamic_batching:
+    opea_microservices["opea_service@router"].dynamic_batching_component = _ControllerBatch()
+
+
 if __name__ == "__main__":
     logger.info("OPEA Router Microservice is starting...")
+    # Initial config load at startup, not on import, so the module can be imported without a config
+    _load_config()
+    if config_watch_interval > 0:
+        threading.Thread(
+            target=_watch_config, args=(config_watch_interval,), name="router_config_watcher", daemon=True
+        ).start()
     opea_microservices["opea_service@router"].start()
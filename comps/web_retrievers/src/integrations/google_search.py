@@ -1,13 +1,17 @@
 # Copyright (C) 2024 Intel Corporation
 # SPDX-License-Identifier: Apache-2.0
 
+import asyncio
 import os
 import time
+from typing import Dict, List, Optional, Tuple
 
+import aiohttp
+import numpy as np
+from bs4 import BeautifulSoup
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import AsyncHtmlLoader
 from langchain_community.document_transformers import Html2TextTransformer
+from langchain_core.documents import Document
 from langchain_google_community import GoogleSearchAPIWrapper
 from langchain_huggingface import HuggingFaceEndpointEmbeddings
 
@@ -21,21 +25,82 @@ from comps import (
     TextDoc,
     statistics_dict,
 )
+from comps.cores.common.cache import LRUCache
 
 logger = CustomLogger("opea_google_search")
 logflag = os.getenv("LOGFLAG", False)
 
+# Maximum number of pages fetched concurrently, across requests, and from one host
+WEB_RETRIEVER_FETCH_CONCURRENCY = int(os.getenv("WEB_RETRIEVER_FETCH_CONCURRENCY", 32))
+WEB_RETRIEVER_FETCH_PER_HOST = int(os.getenv("WEB_RETRIEVER_FETCH_PER_HOST", 4))
+# Seconds to fetch one page
+WEB_RETRIEVER_FETCH_TIMEOUT = float(os.getenv("WEB_RETRIEVER_FETCH_TIMEOUT", 15))
+# Seconds the parsed chunks and embeddings of a page are kept, 0 to fetch the pages of every request again
+WEB_RETRIEVER_CACHE_TTL = float(os.getenv("WEB_RETRIEVER_CACHE_TTL", 3600))
+# Maximum number of cached pages
+WEB_RETRIEVER_CACHE_SIZE = int(os.getenv("WEB_RETRIEVER_CACHE_SIZE", 1024))
+# Number of chunks per request to the embedding service
+EMBED_BATCH_SIZE = 32
+
+HEADERS = {
+    "User-Agent": os.getenv(
+        "USER_AGENT",
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+}
+
+# The chunks of a page and their embeddings, one row per chunk
+Page = Tuple[List[Document], np.ndarray]
+
+
+def build_metadata(soup: BeautifulSoup, url: str) -> dict:
+    """Builds the metadata of a page, as AsyncHtmlLoader does."""
+    metadata = {"source": url}
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", "No description found.")
+    if html := soup.find("html"):
+        metadata["language"] = html.get("lang", "No language found.")
+    return metadata
+
+
+def top_k_similar(embeddings: np.ndarray, query: List[float], k: int) -> List[int]:
+    """Returns the rows of `embeddings` most similar to the query by cosine similarity, most similar first."""
+    if len(embeddings) == 0 or k <= 0:
+        return []
+    query = np.asarray(query, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query)
+    scores = embeddings @ query / np.where(norms == 0, 1, norms)
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])].tolist()
+
 
 @OpeaComponentRegistry.register("OPEA_GOOGLE_SEARCH")
 class OpeaGoogleSearch(OpeaComponent):
-    """A specialized Web Retrieval component derived from OpeaComponent for Google web retriever services."""
+    """A specialized Web Retrieval component derived from OpeaComponent for Google web retriever services.
+
+    Each request ranks the chunks of its own search results in memory, so concurrent requests do not see each
+    other's documents. The pages are fetched concurrently over a shared connection pool, with at most
+    WEB_RETRIEVER_FETCH_PER_HOST connections to one host, parsed on a worker thread, and their chunks and
+    embeddings are cached by URL for WEB_RETRIEVER_CACHE_TTL seconds. Concurrent requests for the same URL share
+    one fetch.
+    """
 
     def __init__(self, name: str, description: str, config: dict = None):
         self.google_api_key = os.environ.get("GOOGLE_API_KEY")
         self.google_cse_id = os.environ.get("GOOGLE_CSE_ID")
         self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=50)
-        # Create vectorstore
         self.tei_embedding_endpoint = os.getenv("TEI_EMBEDDING_ENDPOINT")
+        # only used from the event loop
+        self.page_cache = (
+            LRUCache(WEB_RETRIEVER_CACHE_SIZE, ttl=WEB_RETRIEVER_CACHE_TTL) if WEB_RETRIEVER_CACHE_TTL > 0 else None
+        )
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
         health_status = self.check_health()
         if not health_status:
             logger.error("OpeaGoogleSearch health check failed.")
@@ -46,25 +111,72 @@ class OpeaGoogleSearch(OpeaComponent):
         result = self.search.results(query, num_search_result)
         return result
 
-    def dump_docs(self, docs):
-        batch_size = 32
-        for i in range(0, len(docs), batch_size):
-            self.vector_db.add_documents(docs[i : i + batch_size])
-
-    def retrieve_htmls(self, all_urls):
-        loader = AsyncHtmlLoader(all_urls, ignore_load_errors=True, trust_env=True)
-        docs = loader.load()
-        return docs
-
-    def parse_htmls(self, docs):
-        if logflag:
-            logger.info("Indexing new urls...")
+    def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=WEB_RETRIEVER_FETCH_CONCURRENCY, limit_per_host=WEB_RETRIEVER_FETCH_PER_HOST, ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=HEADERS,
+                timeout=aiohttp.ClientTimeout(total=WEB_RETRIEVER_FETCH_TIMEOUT),
+                trust_env=True,
+            )
+        return self._session
 
-        html2text = Html2TextTransformer()
-        docs = list(html2text.transform_documents(docs))
-        docs = self.text_splitter.split_documents(docs)
+    async def retrieve_html(self, url: str) -> Optional[str]:
+        """Fetches a page, returns None if it cannot be loaded."""
+        try:
+            async with self.get_session().get(url) as resp:
+                resp.raise_for_status()
+                return await resp.text(errors="replace")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Failed to load {url}: {e}")
+            return None
+
+    def parse_html(self, url: str, html: str) -> List[Document]:
+        """Converts a page to text chunks, with the metadata of the page."""
+        metadata = build_metadata(BeautifulSoup(html, "html.parser"), url)
+        docs = Html2TextTransformer().transform_documents([Document(page_content=html, metadata=metadata)])
+        return self.text_splitter.split_documents(list(docs))
+
+    async def embed_chunks(self, chunks: List[Document]) -> np.ndarray:
+        texts = [chunk.page_content for chunk in chunks]
+        batches = await asyncio.gather(
+            *(
+                self.embeddings.aembed_documents(texts[i : i + EMBED_BATCH_SIZE])
+                for i in range(0, len(texts), EMBED_BATCH_SIZE)
+            )
+        )
+        return np.asarray([vector for batch in batches for vector in batch], dtype=np.float32)
 
-        return docs
+    async def _build_page(self, url: str) -> Optional[Page]:
+        html = await self.retrieve_html(url)
+        if html is None:
+            return None
+        try:
+            # parsing and splitting are CPU bound, keep them off the event loop
+            chunks = await asyncio.to_thread(self.parse_html, url, html)
+            page = (chunks, await self.embed_chunks(chunks) if chunks else np.empty((0, 0), dtype=np.float32))
+        except Exception as e:
+            logger.warning(f"Failed to index {url}: {e}")
+            return None
+        if self.page_cache is not None:
+            self.page_cache.set(url, page)
+        return page
+
+    async def load_page(self, url: str) -> Optional[Page]:
+        """Returns the chunks and embeddings of a page from the cache, or loads them."""
+        page = self.page_cache.get(url) if self.page_cache is not None else None
+        if page is not None:
+            return page
+        task = self._loading.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._build_page(url))
+            self._loading[url] = task
+            task.add_done_callback(lambda _: self._loading.pop(url, None))
+        # a request that goes away does not cancel the load shared with other requests
+        return await asyncio.shield(task)
 
     async def invoke(self, input: EmbedDoc) -> SearchedDoc:
         """Involve the Google search service to retrieve the documents related to the prompt."""
@@ -76,28 +188,36 @@ class OpeaGoogleSearch(OpeaComponent):
         embedding = input.embedding
 
         # Google Search the results, parse the htmls
-        search_results = self.get_urls(query=query, num_search_result=input.k)
+        search_results = await asyncio.to_thread(self.get_urls, query=query, num_search_result=input.k)
         urls_to_look = []
         for res in search_results:
             if res.get("link", None):
                 urls_to_look.append(res["link"])
-        urls = list(set(urls_to_look))
+        urls = list(dict.fromkeys(urls_to_look))
         if logflag:
             logger.info(f"urls: {urls}")
-        docs = self.retrieve_htmls(urls)
-        docs = self.parse_htmls(docs)
+        pages = await asyncio.gather(*(self.load_page(url) for url in urls))
+
+        # Remove duplicated docs, and index the chunks of this request only
+        seen = set()
+        docs, rows = [], []
+        for page in pages:
+            if page is None:
+                continue
+            chunks, vectors = page
+            for chunk, vector in zip(chunks, vectors):
+                key = (chunk.page_content, tuple(sorted(chunk.metadata.items())))
+                if key not in seen:
+                    seen.add(key)
+                    docs.append(chunk)
+                    rows.append(vector)
         if logflag:
             logger.info(docs)
-        # Remove duplicated docs
-        unique_documents_dict = {(doc.page_content, tuple(sorted(doc.metadata.items()))): doc for doc in docs}
-        unique_documents = list(unique_documents_dict.values())
         statistics_dict["opea_service@search"].append_latency(time.time() - start, None)
 
-        # dump to vector_db
-        self.dump_docs(unique_documents)
-
         # Do the retrieval
-        search_res = await self.vector_db.asimilarity_search_by_vector(embedding=embedding, k=input.k)
+        index = np.stack(rows) if rows else np.empty((0, len(embedding)), dtype=np.float32)
+        search_res = [docs[i] for i in top_k_similar(index, embedding, input.k)]
 
         searched_docs = []
 
@@ -112,9 +232,6 @@ class OpeaGoogleSearch(OpeaComponent):
         result = SearchedDoc(retrieved_docs=searched_docs, initial_query=query)
         statistics_dict["opea_service@web_retriever"].append_latency(time.time() - start, None)
 
-        # For Now history is banned
-        if self.vector_db.get()["ids"]:
-            self.vector_db.delete(self.vector_db.get()["ids"])
         if logflag:
             logger.info(result)
         return result
@@ -129,11 +246,7 @@ class OpeaGoogleSearch(OpeaComponent):
             self.search = GoogleSearchAPIWrapper(
                 google_api_key=self.google_api_key, google_cse_id=self.google_cse_id, k=10
             )
-            # vectordb_persistent_directory = os.getenv("VECTORDB_PERSISTENT_DIR", "/home/user/chroma_db_oai")
-            self.vector_db = Chroma(
-                embedding_function=HuggingFaceEndpointEmbeddings(model=self.tei_embedding_endpoint),
-                # persist_directory=vectordb_persistent_directory
-            )
+            self.embeddings = HuggingFaceEndpointEmbeddings(model=self.tei_embedding_endpoint)
         except Exception as e:
             logger.error(e)
             return False
@@ -0,0 +1,124 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+
+from comps.cores.common.bulk import BulkIngestor, aiter_ndjson, insert_many_unordered
+
+
+async def chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def parse(record):
+    if "text" not in record:
+        raise ValueError("text is required")
+    return record["text"]
+
+
+class TestBulkIngestor(unittest.IsolatedAsyncioTestCase):
+    async def test_ndjson_lines(self):
+        data = b'{"text": "a"}\n\n{"text": "b"}\r\n{"text": "c"}'
+        lines = [line async for line in aiter_ndjson(chunks(data, 4))]
+        self.assertEqual([json.loads(line) for line in lines], [{"text": "a"}, {"text": "b"}, {"text": "c"}])
+
+    async def test_per_item_results(self):
+        batches = []
+
+        async def save_batch(texts):
+            batches.append(texts)
+            return [ValueError("duplicate") if text == "dup" else f"id-{text}" for text in texts]
+
+        records = [{"text": "a"}, {"other": 1}, "not json", {"text": "dup"}, {"text": "b"}]
+        lines = [json.dumps(record) if record != "not json" else record for record in records]
+        ingestor = BulkIngestor(save_batch, parse, batch_size=2, concurrency=2)
+
+        async def stream():
+            for line in lines:
+                yield line
+
+        results = sorted([result async for result in ingestor.run(stream())], key=lambda result: result["index"])
+        self.assertEqual([result["status"] for result in results], ["ok", "error", "error", "error", "ok"])
+        self.assertEqual(results[0]["id"], "id-a")
+        self.assertEqual(results[3]["error"], "duplicate")
+        self.assertEqual(batches, [["a", "dup"], ["b"]])
+        self.assertEqual(ingestor.get_statistics(), {"succeeded": 2, "failed": 3})
+
+    async def test_bounded_concurrency(self):
+        running = 0
+        peak = 0
+
+        async def save_batch(records):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return list(records)
+
+        async def stream():
+            for i in range(50):
+                yield json.dumps(i)
+
+        ingestor = BulkIngestor(save_batch, batch_size=5, concurrency=3)
+        results = [result async for result in ingestor.run(stream())]
+        self.assertEqual(sorted(result["id"] for result in results), list(range(50)))
+        self.assertEqual(peak, 3)
+
+    async def test_ingest_errors_in_order(self):
+        async def save_batch(records):
+            await asyncio.sleep(0.01 if records[0] == 0 else 0)
+            return [ValueError(f"odd {record}") if record % 2 else f"id-{record}" for record in records]
+
+        async def stream():
+            for i in range(6):
+                yield json.dumps(i)
+
+        response = await BulkIngestor(save_batch, batch_size=2).ingest(stream())
+        self.assertEqual(response["succeeded"], 3)
+        self.assertEqual(response["failed"], 3)
+        # only the failed records are kept
+        self.assertEqual([result["index"] for result in response["errors"]], [1, 3, 5])
+        self.assertEqual(response["errors"][0]["error"], "odd 1")
+
+    async def test_failed_batch(self):
+        async def save_batch(records):
+            raise ConnectionError("database unavailable")
+
+        async def stream():
+            yield "1"
+            yield "2"
+
+        results = [result async for result in BulkIngestor(save_batch).run(stream())]
+        self.assertEqual([result["error"] for result in results], ["database unavailable"] * 2)
+        with self.assertRaises(ValueError):
+            BulkIngestor(save_batch, concurrency=0)
+
+
+class TestInsertManyUnordered(unittest.IsolatedAsyncioTestCase):
+    async def test_per_document_results(self):
+        ids = [ObjectId(), ObjectId()]
+
+        async def insert_many(documents, ordered):
+            self.assertFalse(ordered)
+            documents[0]["_id"], documents[2]["_id"] = ids
+            raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "duplicate key"}]})
+
+        collection = AsyncMock()
+        collection.insert_many.side_effect = insert_many
+        result = await insert_many_unordered(collection, [{"a": 1}, {"a": 2}, {"a": 3}])
+        self.assertEqual(result[0], str(ids[0]))
+        self.assertEqual(str(result[1]), "duplicate key")
+        self.assertEqual(result[2], str(ids[1]))
+        self.assertEqual(await insert_many_unordered(collection, []), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import time
+import unittest
+
+from comps.cores.common.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+
+        # "b" is the least recently used entry
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl(self):
+        cache = LRUCache(max_size=2, ttl=0.05)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=10)
+        self.assertIn("a", cache)
+        time.sleep(0.1)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.get("a", "missing"), "missing")
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_items(self):
+        cache = LRUCache(max_size=4)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=0.05)
+        cache.set("c", 3)
+        cache.get("a")
+        self.assertEqual(cache.items(), [("b", 2), ("c", 3), ("a", 1)])
+        time.sleep(0.1)
+        self.assertEqual(cache.items(), [("c", 3), ("a", 1)])
+        self.assertEqual(cache.hits, 1)
+
+    def test_statistics(self):
+        cache = LRUCache(max_size=4)
+        self.assertIsNone(cache.get_statistics()["hit_rate"])
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+        self.assertEqual(cache.pop("a"), 1)
+        self.assertEqual(cache.get_statistics(), {"size": 0, "max_size": 4, "hits": 1, "misses": 1, "hit_rate": 0.5})
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            LRUCache(max_size=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -107,6 +107,27 @@ class TestOpeaComponentLoader(unittest.TestCase):
         # Check the result
         self.assertEqual(result, "Service accessed")
 
+    def test_invoke_batch(self):
+        class MockComponent(OpeaComponent):
+            def check_health(self) -> bool:
+                return True
+
+            async def invoke(self, input):
+                if input < 0:
+                    raise ValueError("negative input")
+                return input * 2
+
+        OpeaComponentRegistry.register("MockBatchComponent")(MockComponent)
+        loader = OpeaComponentLoader("MockBatchComponent", type="embedding", description="Test component")
+        OpeaComponentRegistry.unregister("MockBatchComponent")
+
+        results = asyncio.run(loader.invoke_batch([1, -1, 3]))
+
+        # a failing input only fails its own result
+        self.assertEqual(results[0], 2)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], 6)
+
     def test_invoke_unregistered_component(self):
         # Attempt to load a component that is not registered
         with self.assertRaises(KeyError):
@@ -0,0 +1,64 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import unittest
+from unittest import mock
+
+from comps.cores.common.context import ContextPacker, PackedContext, context_token_budget
+
+
+class TestContextPacker(unittest.TestCase):
+    def test_pack_all(self):
+        packer = ContextPacker(max_tokens=100)
+        result = packer.pack(["Deep learning is a subfield of machine learning.", "It uses neural networks."])
+        self.assertEqual(
+            result,
+            PackedContext(
+                ["Deep learning is a subfield of machine learning.", "It uses neural networks."], 14, False, 0
+            ),
+        )
+
+    def test_pack_by_score(self):
+        packer = ContextPacker(max_tokens=4)
+        result = packer.pack(["one two three", "four five six"], scores=[0.1, 0.9])
+        self.assertEqual(result.documents, ["four five six"])
+        self.assertEqual(result.tokens, 3)
+        self.assertEqual(result.dropped, 1)
+        self.assertFalse(result.trimmed)
+
+    def test_trim_at_sentence_boundary(self):
+        packer = ContextPacker(max_tokens=10)
+        documents = ["First doc fits.", "One sentence here. Another one is cut off here. And a third."]
+        result = packer.pack(documents)
+        self.assertEqual(result.documents, ["First doc fits.", "One sentence here."])
+        self.assertEqual(result.tokens, 8)
+        self.assertTrue(result.trimmed)
+        self.assertEqual(result.dropped, 0)
+
+        # without a sentence boundary within the budget, the document is left out
+        result = packer.pack(["A very long sentence that does not end within the budget at all."])
+        self.assertEqual(result, PackedContext([], 0, False, 1))
+
+    def test_tokenize_once(self):
+        packer = ContextPacker(max_tokens=100)
+        packer.pack(["a b c", "d e f"])
+        packer.pack(["a b c", "g h i"])
+        statistics = packer.get_statistics()
+        self.assertEqual(statistics["requests"], 2)
+        self.assertEqual(statistics["average_tokens"], 6)
+        self.assertEqual(statistics["token_cache"]["size"], 3)
+        self.assertEqual(statistics["token_cache"]["hits"], 1)
+
+    def test_budget(self):
+        with mock.patch.dict(os.environ, {"RAG_CONTEXT_TOKENS": "512"}):
+            self.assertEqual(context_token_budget({"maxContextTokens": 2048}), 2048)
+            self.assertEqual(context_token_budget({"maxToken": 1024}), 512)
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(context_token_budget(None))
+        with self.assertRaises(ValueError):
+            ContextPacker(max_tokens=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
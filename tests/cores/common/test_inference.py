@@ -0,0 +1,64 @@
+# Copyright (C) 2024 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import threading
+import unittest
+
+from comps.cores.common.inference import BatchInference
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+        self.threads = set()
+
+    def __call__(self, texts, **kwargs):
+        self.calls.append((list(texts), kwargs))
+        self.threads.add(threading.current_thread().name)
+        return [{"label": "toxic" if "bad" in text else "not_toxic", "length": len(text)} for text in texts]
+
+
+class TestBatchInference(unittest.TestCase):
+    def test_length_buckets(self):
+        model = FakeModel()
+        inference = BatchInference(model, max_batch_size=2, truncation=True)
+        texts = ["a long bad text", "hi", "medium text", "yo"]
+        results = inference(texts)
+
+        self.assertEqual([r["length"] for r in results], [len(text) for text in texts])
+        self.assertEqual(results[0]["label"], "toxic")
+        # the shortest texts are batched together
+        self.assertEqual(model.calls[0], (["hi", "yo"], {"batch_size": 2, "truncation": True}))
+        self.assertEqual(model.calls[1][0], ["medium text", "a long bad text"])
+        self.assertEqual(inference.get_statistics(), {"batches": 2, "texts": 4, "average_batch_size": 2})
+
+    def test_batch_size(self):
+        model = FakeModel()
+        inference = BatchInference(model, max_batch_size=4)
+        inference([f"text {i}" for i in range(6)])
+
+        # a pipeline given a list without batch_size runs the texts one by one
+        self.assertEqual([kwargs["batch_size"] for _, kwargs in model.calls], [4, 2])
+
+    def test_run_on_worker(self):
+        model = FakeModel()
+        inference = BatchInference(model, max_batch_size=8)
+
+        async def run():
+            return await asyncio.gather(*(inference.run([f"text {i}", "bad"]) for i in range(4)), inference.run([]))
+
+        results = asyncio.run(run())
+        self.assertEqual(len(results), 5)
+        self.assertEqual(results[-1], [])
+        self.assertEqual(results[2][1]["label"], "toxic")
+        self.assertEqual(len(model.threads), 1)
+
+    def test_mismatched_results(self):
+        inference = BatchInference(lambda texts, **kwargs: texts[:1])
+        with self.assertRaises(ValueError):
+            inference(["a", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import unittest
+
+from comps.cores.common.response_cache import ResponseCache
+
+
+class FakeEmbeddings:
+    """Embeds a text as its vector in VECTORS, counting the calls."""
+
+    VECTORS = {
+        "What is OPEA?": [1.0, 0.0, 0.0],
+        "what is opea": [0.99, 0.14, 0.0],
+        "How do I deploy it?": [0.0, 1.0, 0.0],
+    }
+
+    def __init__(self):
+        self.calls = 0
+
+    async def feature_extraction(self, text):
+        self.calls += 1
+        if text not in self.VECTORS:
+            raise ConnectionError("embedding endpoint unavailable")
+        return self.VECTORS[text]
+
+
+def chat_params(content, **params):
+    return {
+        "model": "m",
+        "messages": [{"role": "system", "content": "Be brief."}, {"role": "user", "content": content}],
+    } | params
+
+
+def semantic_cache(threshold=0.95, **kwargs):
+    cache = ResponseCache(similarity_threshold=threshold, embedding_endpoint="http://embedding:6000", **kwargs)
+    cache.embedding_client = FakeEmbeddings()
+    return cache
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+    async def test_exact_hit_and_miss(self):
+        cache = ResponseCache(max_size=4)
+        key, response = await cache.get(chat_params("What is OPEA?"))
+        self.assertIsNone(response)
+        await cache.set(key, "answer")
+
+        # surrounding whitespace is normalized away, other parameters are not
+        self.assertEqual((await cache.get(chat_params("  What is OPEA?\n")))[1], "answer")
+        self.assertIsNone((await cache.get(chat_params("What is OPEA?", temperature=0.5)))[1])
+        self.assertIsNone(cache.embedding_client)
+        self.assertEqual(
+            cache.get_statistics(),
+            {"size": 1, "max_size": 4, "hits": 1, "misses": 2, "hit_rate": 1 / 3, "semantic_hits": None},
+        )
+
+    async def test_ttl(self):
+        cache = ResponseCache(ttl=0.05)
+        key, _ = await cache.get({"model": "m", "prompt": "hi"})
+        await cache.set(key, "hello")
+        self.assertEqual((await cache.get({"model": "m", "prompt": "hi"}))[1], "hello")
+        await asyncio.sleep(0.1)
+        self.assertIsNone((await cache.get({"model": "m", "prompt": "hi"}))[1])
+
+    async def test_stream_replay(self):
+        cache = ResponseCache()
+        chunks = ['{"choices": [{"delta": {"content": "OPEA is"}}]}', '{"choices": [{"delta": {"content": " a"}}]}']
+        key, _ = await cache.get(chat_params("What is OPEA?", stream=True))
+        await cache.set(key, chunks)
+
+        # a streaming request replays the chunks of the cached stream in order
+        self.assertEqual((await cache.get(chat_params("What is OPEA?", stream=True)))[1], chunks)
+        # a non-streaming request does not get the chunks of a stream
+        self.assertIsNone((await cache.get(chat_params("What is OPEA?", stream=False)))[1])
+
+    async def test_semantic_hit(self):
+        cache = semantic_cache()
+        key, response = await cache.get(chat_params("What is OPEA?"))
+        self.assertIsNone(response)
+        self.assertIsNotNone(key.embedding)
+        await cache.set(key, "answer")
+
+        # cosine similarity of about 0.99
+        self.assertEqual((await cache.get(chat_params("what is opea")))[1], "answer")
+        self.assertEqual(cache.semantic_hits, 1)
+        self.assertEqual(cache.get_statistics()["semantic_hits"], 1)
+
+    async def test_semantic_threshold(self):
+        cache = semantic_cache(threshold=0.995)
+        key, _ = await cache.get(chat_params("What is OPEA?"))
+        await cache.set(key, "answer")
+
+        self.assertIsNone((await cache.get(chat_params("what is opea")))[1])
+        self.assertIsNone((await cache.get(chat_params("How do I deploy it?")))[1])
+        self.assertEqual(cache.semantic_hits, 0)
+
+    async def test_semantic_other_parameters(self):
+        cache = semantic_cache()
+        key, _ = await cache.get(chat_params("What is OPEA?"))
+        await cache.set(key, "answer")
+
+        # a similar query with other parameters is a miss
+        self.assertIsNone((await cache.get(chat_params("what is opea", max_tokens=10)))[1])
+        # an exact hit does not embed the query
+        calls = cache.embedding_client.calls
+        self.assertEqual((await cache.get(chat_params("What is OPEA?")))[1], "answer")
+        self.assertEqual(cache.embedding_client.calls, calls)
+
+    async def test_semantic_embedding_failure(self):
+        cache = semantic_cache()
+        key, response = await cache.get(chat_params("unknown text"))
+        self.assertIsNone(response)
+        self.assertIsNone(key.embedding)
+        await cache.set(key, "answer")
+
+        # the response is still cached in the exact tier
+        self.assertEqual((await cache.get(chat_params("unknown text")))[1], "answer")
+        self.assertEqual(len(cache.semantic), 0)
+
+    async def test_semantic_ttl(self):
+        cache = semantic_cache(ttl=0.05)
+        key, _ = await cache.get(chat_params("What is OPEA?"))
+        await cache.set(key, "answer")
+        await asyncio.sleep(0.1)
+        self.assertIsNone((await cache.get(chat_params("what is opea")))[1])
+
+    def test_semantic_tier_needs_endpoint(self):
+        self.assertIsNone(ResponseCache(similarity_threshold=0.9).similarity_threshold)
+        self.assertEqual(semantic_cache().similarity_threshold, 0.95)
+
+
+if __name__ == "__main__":
+    unittest.main()
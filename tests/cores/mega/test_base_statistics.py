@@ -8,6 +8,7 @@ import time
 import unittest
 
 import requests
+from prometheus_client import generate_latest
 
 from comps import (
     ServiceOrchestrator,
@@ -17,7 +18,7 @@ from comps import (
     register_statistics,
     statistics_dict,
 )
-from comps.cores.mega.base_statistics import collect_all_statistics
+from comps.cores.mega.base_statistics import BaseStatistics, QuantileSketch, SlidingWindowSketch, collect_all_statistics
 
 SVC1 = "opea_service@s1_add"
 SVC2 = "open_service@test"
@@ -92,6 +93,44 @@ class TestBaseStatisticsLocal(unittest.TestCase):
         avg = res[SVC2]["average_latency"]
         self.assertEqual(int(avg), int(p50))
         self.assertEqual(int(p50), 2)
+        self.assertEqual(res[SVC2]["count"], 3)
+        self.assertEqual(res[SVC2]["windows"]["1m"]["count"], 3)
+        self.assertEqual(int(res[SVC2]["windows"]["1h"]["p50_latency"]), 2)
+
+    def test_sketch_accuracy(self):
+        sketch = QuantileSketch(relative_accuracy=0.01, exact_samples=128)
+        values = [i / 1000 for i in range(1, 100001)]
+        for value in values:
+            sketch.add(value)
+        self.assertIsNone(sketch.samples)
+        self.assertLess(len(sketch.buckets), 2048)
+        for q in (0.5, 0.9, 0.95, 0.99, 0.999):
+            expected = values[int(q * (len(values) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q), expected, delta=expected * 0.01)
+        self.assertAlmostEqual(sketch.average(), sum(values) / len(values))
+
+    def test_sliding_window(self):
+        window = SlidingWindowSketch(length=60, slots=6)
+        window.add(1.0, now=0)
+        window.add(2.0, now=30)
+        self.assertEqual(window.snapshot(now=55).count, 2)
+        self.assertEqual(window.snapshot(now=65).count, 1)
+        self.assertEqual(window.snapshot(now=95).count, 0)
+
+    def test_prometheus_export(self):
+        stats = BaseStatistics()
+        statistics_dict["opea_service@prometheus"] = stats
+        try:
+            stats.append_latency(0.5, 0.1)
+            response = generate_latest().decode()
+            self.assertIn('opea_service_requests_total{service="opea_service@prometheus"} 1.0', response)
+            self.assertIn(
+                'opea_service_latency_seconds{metric="latency_first_token",quantile="0.99",'
+                'service="opea_service@prometheus",window="1m"} 0.1',
+                response,
+            )
+        finally:
+            del statistics_dict["opea_service@prometheus"]
 
 
 if __name__ == "__main__":
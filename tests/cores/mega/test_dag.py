@@ -4,7 +4,7 @@
 import unittest
 from collections import OrderedDict
 
-from comps.cores.mega.dag import DAG
+from comps.cores.mega.dag import DAG, ExecutionPlan, RuntimeGraph
 
 
 class TestDAG(unittest.TestCase):
@@ -39,6 +39,43 @@ class TestDAG(unittest.TestCase):
         dag2.delete_node("c")
         self.assertEqual(dag2.graph, OrderedDict([("a", {"d"}), ("b", set()), ("d", set())]))
 
+    def test_add_edge_rejects_cycle(self):
+        dag = DAG()
+        dag.from_dict({"a": ["b"], "b": ["c"], "c": []})
+        with self.assertRaises(Exception):
+            dag.add_edge("c", "a")
+        with self.assertRaises(Exception):
+            dag.add_edge("b", "b")
+        self.assertEqual(dag.graph, OrderedDict([("a", {"b"}), ("b", {"c"}), ("c", set())]))
+
+    def test_runtime_graph(self):
+        dag = DAG()
+        dag.from_dict({"a": ["b", "c"], "b": ["d"], "c": ["d"], "d": []})
+        plan = ExecutionPlan(dag.graph)
+        self.assertEqual(plan.ind_nodes, ("a",))
+        self.assertEqual(plan.in_degree, {"a": 0, "b": 1, "c": 1, "d": 2})
+        self.assertEqual(sorted(plan.predecessors["d"]), ["b", "c"])
+        self.assertEqual(plan.topological_order[0], "a")
+        self.assertEqual(plan.topological_order[-1], "d")
+
+        runtime_graph = RuntimeGraph(plan)
+        self.assertEqual(runtime_graph.graph, dag.graph)
+        runtime_graph.delete_edge("a", "b")
+        self.assertEqual(sorted(runtime_graph.downstream("a")), ["c"])
+        self.assertEqual(runtime_graph.predecessors("b"), [])
+        self.assertEqual(sorted(runtime_graph.ind_nodes()), ["a", "b"])
+        self.assertEqual(runtime_graph.all_downstreams("a"), ["c", "d"])
+        runtime_graph.delete_node("b")
+        self.assertEqual(runtime_graph.predecessors("d"), ["c"])
+        self.assertEqual(runtime_graph.all_leaves(), ["d"])
+        self.assertEqual(runtime_graph.size(), 3)
+        with self.assertRaises(KeyError):
+            runtime_graph.delete_edge("a", "b")
+
+        # the plan and other runtime graphs are not affected by pruning
+        self.assertEqual(RuntimeGraph(plan).graph, dag.graph)
+        self.assertEqual(plan.in_degree["d"], 2)
+
 
 if __name__ == "__main__":
     unittest.main()
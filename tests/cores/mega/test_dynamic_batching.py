@@ -3,12 +3,13 @@
 
 import asyncio
 import multiprocessing
+import time
 import unittest
 from enum import Enum
 
 import aiohttp
 
-from comps import ServiceType, TextDoc, opea_microservices, register_microservice
+from comps import OpeaComponent, ServiceType, TextDoc, opea_microservices, register_microservice
 
 
 async def dynamic_batching_infer(service_type: Enum, batch: list[dict]):
@@ -60,6 +61,35 @@ async def add2(request: TextDoc) -> dict:
     return result
 
 
+class UpperComponent(OpeaComponent):
+    def check_health(self) -> bool:
+        return True
+
+    async def invoke(self, input: TextDoc):
+        return {"result": input.text.upper()}
+
+    async def invoke_batch(self, inputs: list):
+        # a full batch is flushed right away, long before dynamic_batching_timeout
+        assert len(inputs) == 2
+        return await super().invoke_batch(inputs)
+
+
+@register_microservice(
+    name="s2",
+    host="0.0.0.0",
+    port=8081,
+    endpoint="/v1/upper",
+    dynamic_batching=True,
+    dynamic_batching_timeout=30,
+    dynamic_batching_max_batch_size=2,
+)
+async def upper(request: TextDoc) -> dict:
+    return await opea_microservices["s2"].dynamic_batching_request(ServiceType.EMBEDDING, request)
+
+
+opea_microservices["s2"].dynamic_batching_component = UpperComponent("upper", "embedding", "Upper case the text")
+
+
 async def fetch(session, url, data):
     async with session.post(url, json=data) as response:
         # Await the response and return the JSON data
@@ -67,13 +97,19 @@ async def fetch(session, url, data):
 
 
 class TestMicroService(unittest.IsolatedAsyncioTestCase):
-    def setUp(self):
-        self.process1 = multiprocessing.Process(target=opea_microservices["s1"].start, daemon=False, name="s1")
-        self.process1.start()
-
-    def tearDown(self):
+    @classmethod
+    def setUpClass(cls):
+        cls.process1 = multiprocessing.Process(target=opea_microservices["s1"].start, daemon=False, name="s1")
+        cls.process1.start()
+        cls.process2 = multiprocessing.Process(target=opea_microservices["s2"].start, daemon=False, name="s2")
+        cls.process2.start()
+
+    @classmethod
+    def tearDownClass(cls):
         opea_microservices["s1"].stop()
-        self.process1.terminate()
+        opea_microservices["s2"].stop()
+        cls.process1.terminate()
+        cls.process2.terminate()
 
     async def test_dynamic_batching(self):
         url1 = "http://localhost:8080/v1/add1"
@@ -89,6 +125,19 @@ class TestMicroService(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(response1["result"], "processed: Hello, ")
         self.assertEqual(response2["result"], "processed: OPEA Project!")
 
+    async def test_dynamic_batching_flush_when_full(self):
+        url = "http://localhost:8081/v1/upper"
+
+        start = time.monotonic()
+        async with aiohttp.ClientSession() as session:
+            response1, response2 = await asyncio.gather(
+                fetch(session, url, {"text": "Hello, "}), fetch(session, url, {"text": "OPEA Project!"})
+            )
+
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(response1["result"], "HELLO, ")
+        self.assertEqual(response2["result"], "OPEA PROJECT!")
+
 
 if __name__ == "__main__":
     unittest.main()
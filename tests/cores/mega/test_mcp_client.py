@@ -2,9 +2,13 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import asyncio
+import time
 import unittest
+from contextlib import asynccontextmanager
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import anyio
+
 from comps.cores.mcp.client import OpeaMCPClient
 from comps.cores.mcp.config import (
     OpeaMCPConfig,
@@ -142,6 +146,168 @@ class TestOpeaMCPToolsManager(unittest.IsolatedAsyncioTestCase):
         with self.assertRaises(ValueError):
             await self.manager.execute_tool("t", {})
 
+    @staticmethod
+    def fake_client(tool_names, connect_delay=0.0, connect_error=None):
+        client = MagicMock(spec=OpeaMCPClient)
+        tools = []
+        for name in tool_names:
+            tool = MagicMock()
+            tool.name = name
+            tool.to_param.return_value = {"function": {"name": name}}
+            tools.append(tool)
+
+        async def connect(*args, **kwargs):
+            await asyncio.sleep(connect_delay)
+            if connect_error is not None:
+                raise connect_error
+            client.tools = tools
+
+        client.tools = []
+        client.connect_via_sse = AsyncMock(side_effect=connect)
+        client.connect_via_stdio = AsyncMock(side_effect=connect)
+        client.disconnect = AsyncMock()
+        client.invoke_tool = AsyncMock(
+            side_effect=lambda name, params: MagicMock(model_dump=lambda mode: {"tool": name, **params})
+        )
+        return client
+
+    @patch("comps.cores.mcp.manager.OpeaMCPClient")
+    async def test_initialize_clients_concurrently(self, MockClient):
+        servers = [OpeaMCPSSEServerConfig(url=f"http://s{i}") for i in range(3)] + [self.stdio]
+        MockClient.side_effect = [
+            self.fake_client(["t0"], connect_delay=0.2),
+            self.fake_client(["t1"], connect_delay=0.2),
+            self.fake_client(["t2"], connect_delay=0.2, connect_error=ConnectionError("refused")),
+            self.fake_client(["t3"], connect_delay=5),
+        ]
+        manager = OpeaMCPToolsManager(self.config, connect_timeout=0.5)
+        start = time.monotonic()
+        clients = await manager._initialize_clients(servers)
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual(len(clients), 2)
+        self.assertEqual(manager.pending_servers, servers[2:])
+
+    async def test_tool_index(self):
+        first, second = self.fake_client(["a", "b"]), self.fake_client(["b", "c"])
+        await first.connect_via_sse()
+        await second.connect_via_sse()
+        self.manager.clients = [first, second]
+        self.assertEqual(self.manager.tool_index, {"a": first, "b": first, "c": second})
+
+        results = await self.manager.execute_tools([("a", {"x": 1}), ("c", {}), ("d", {})])
+        self.assertEqual(results[:2], ['{"tool": "a", "x": 1}', '{"tool": "c"}'])
+        self.assertIsInstance(results[2], ValueError)
+
+    @patch("comps.cores.mcp.manager.OpeaMCPClient")
+    async def test_reconnect_in_background(self, MockClient):
+        config = OpeaMCPConfig(sse_servers=[self.sse])
+        broken = self.fake_client(["t", "u"])
+        broken.invoke_tool = AsyncMock(side_effect=anyio.ClosedResourceError())
+        MockClient.side_effect = [
+            self.fake_client(["t"], connect_error=ConnectionError("refused")),
+            broken,
+            self.fake_client(["t", "u"]),
+        ]
+        manager = await OpeaMCPToolsManager.create(config, max_backoff=0.01)
+        self.assertEqual(manager.clients, [])
+        for _ in range(100):
+            if manager.clients:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(manager.clients, [broken])
+
+        # the session drops during a call, the server is reconnected in the background
+        with self.assertRaises(anyio.ClosedResourceError):
+            await manager.t()
+        self.assertEqual(manager.tool_index, {})
+        broken.disconnect.assert_awaited()
+        for _ in range(100):
+            if manager.clients:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(await manager.u(), '{"tool": "u"}')
+        self.assertEqual(await manager.t(), '{"tool": "t"}')
+        await manager.__aexit__(None, None, None)
+
+    @patch("comps.cores.mcp.client.ClientSession")
+    async def test_drop_client_keeps_other_sessions(self, mock_session):
+        open_transports = set()
+
+        @asynccontextmanager
+        async def fake_sse_client(url, headers=None, timeout=None):
+            open_transports.add(url)
+            try:
+                yield ("reader", "writer")
+            finally:
+                open_transports.discard(url)
+
+        config = OpeaMCPConfig(
+            sse_servers=[OpeaMCPSSEServerConfig(url="http://a"), OpeaMCPSSEServerConfig(url="http://b")]
+        )
+        with patch("comps.cores.mcp.client.sse_client", fake_sse_client), patch.object(
+            OpeaMCPClient, "_initialize_tools", new_callable=AsyncMock
+        ):
+            manager = await OpeaMCPToolsManager.create(config, max_backoff=60)
+            first, second = manager.clients
+            self.assertIsNot(first.exit_stack, second.exit_stack)
+            self.assertEqual(open_transports, {"http://a", "http://b"})
+
+            await manager._drop_client(first)
+            self.assertEqual(open_transports, {"http://b"})
+            self.assertEqual(manager.clients, [second])
+            self.assertIsNotNone(second.session)
+            await manager.__aexit__(None, None, None)
+        self.assertEqual(open_transports, set())
+
+    @patch("comps.cores.mcp.client.ClientSession")
+    async def test_transport_task_groups(self, mock_session):
+        open_transports = set()
+
+        @asynccontextmanager
+        async def task_group_sse_client(url, headers=None, timeout=None):
+            # like mcp.client.sse.sse_client, the transport runs its reader in an anyio task group
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(anyio.sleep_forever)
+                open_transports.add(url)
+                try:
+                    yield ("reader", "writer")
+                finally:
+                    open_transports.discard(url)
+                    tg.cancel_scope.cancel()
+
+        async def slow_initialize_tools(client):
+            if any(url.endswith("slow") for url in open_transports):
+                await asyncio.sleep(5)
+
+        config = OpeaMCPConfig(
+            sse_servers=[
+                OpeaMCPSSEServerConfig(url="http://a"),
+                OpeaMCPSSEServerConfig(url="http://b"),
+                OpeaMCPSSEServerConfig(url="http://slow"),
+            ]
+        )
+        with patch("comps.cores.mcp.client.sse_client", task_group_sse_client), patch.object(
+            OpeaMCPClient, "_initialize_tools", slow_initialize_tools
+        ), self.assertLogs("comps-mcp-client", level="INFO") as client_logs, self.assertLogs(
+            "comps-mcp-manager", level="INFO"
+        ) as manager_logs:
+            manager = OpeaMCPToolsManager(config, connect_timeout=0.2, max_backoff=60)
+            manager.clients = await manager._initialize_clients(config.sse_servers)
+            # the timed out server closed its transport
+            self.assertEqual(manager.pending_servers, [config.sse_servers[2]])
+            self.assertEqual(open_transports, {"http://a", "http://b"})
+            first, second = manager.clients
+
+            # the task groups are exited by the tasks that entered them, on a drop and on exit
+            await manager._drop_client(first)
+            self.assertEqual(open_transports, {"http://b"})
+            manager.pending_servers = []
+            manager._reconnect_task.cancel()
+            await manager.__aexit__(None, None, None)
+        self.assertEqual(open_transports, set())
+        self.assertEqual(manager._client_tasks, {})
+        self.assertFalse([line for line in client_logs.output + manager_logs.output if "cancel scope" in line])
+
     async def test_context_manager(self):
         dummy_client = MagicMock()
         dummy_client.disconnect = AsyncMock()
@@ -48,10 +48,25 @@ class TestServiceOrchestrator(unittest.IsolatedAsyncioTestCase):
         cls.process1.terminate()
         cls.process2.terminate()
 
+    async def asyncTearDown(self):
+        await self.service_builder.close()
+
     async def test_schedule(self):
         result_dict, _ = await self.service_builder.schedule(initial_inputs={"text": "hello, "})
         self.assertEqual(result_dict[self.s2.name]["text"], "hello, opea project!")
 
+    async def test_session_reused(self):
+        session = self.service_builder.get_session()
+        for _ in range(3):
+            result_dict, _ = await self.service_builder.schedule(initial_inputs={"text": "hello, "})
+            self.assertEqual(result_dict[self.s2.name]["text"], "hello, opea project!")
+        self.assertIs(self.service_builder.get_session(), session)
+        self.assertFalse(session.closed)
+
+        await self.service_builder.close()
+        self.assertTrue(session.closed)
+        self.assertIsNot(self.service_builder.get_session(), session)
+
 
 if __name__ == "__main__":
     unittest.main()
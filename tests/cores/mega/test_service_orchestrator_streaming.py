@@ -105,6 +105,19 @@ class TestServiceOrchestratorStreaming(unittest.IsolatedAsyncioTestCase):
             self.assertTrue(name in metrics)
             self.assertEqual(metrics[name], value)
 
+    async def test_schedule_sync_align_generator(self):
+        class UpperOrchestrator(ServiceOrchestrator):
+            def align_generator(self, gen, **kwargs):
+                for chunk in gen:
+                    yield chunk.decode("utf-8").upper()
+
+        service_builder = UpperOrchestrator()
+        service_builder.add(self.s0)
+        result_dict, _ = await service_builder.schedule(initial_inputs={"text": "hello, "})
+        response = result_dict["s0/MicroService"]
+        chunks = [k async for k in response.__reduce__()[2]["body_iterator"]]
+        self.assertEqual("".join(chunks), " OPEA IS GREAT. I THINK  SO.")
+
     def test_extract_chunk_str(self):
         res = self.service_builder.extract_chunk_str("data: [DONE]\n\n")
         self.assertEqual(res, "")
@@ -0,0 +1,243 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import HTTPException
+
+from comps import DocPath
+from comps.cores.proto.api_protocol import RedisDataprepRequest
+from comps.dataprep.src.integrations import redis as redis_dataprep
+
+
+class FakeVectorStore:
+    """Returns a key per text, recording the texts of each add_texts call."""
+
+    calls = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def add_texts(self, texts, embeddings, batch_size):
+        FakeVectorStore.calls.append(list(texts))
+        return [f"doc:{text}" for text in texts]
+
+
+class FakeEmbedder:
+    def embed_documents(self, texts):
+        return [[float(len(text))] for text in texts]
+
+
+class TestIngestionProgress(unittest.TestCase):
+    def test_statistics(self):
+        progress = redis_dataprep.IngestionProgress()
+        self.assertIsNone(progress.get_statistics()["parse_throughput"])
+
+        with patch.object(redis_dataprep.time, "monotonic", side_effect=[10.0, 14.0]):
+            progress.start(3)
+            # a concurrent ingestion does not count the wall time twice
+            progress.start(2)
+            progress.record("parse", 5)
+            progress.record("embed", 40)
+            progress.chunks_total += 40
+            progress.record("write", 40)
+            progress.files_done += 5
+            progress.stop()
+            progress.stop()
+        statistics = progress.get_statistics()
+
+        self.assertEqual(
+            statistics,
+            {
+                "running": 0,
+                "files_total": 5,
+                "files_done": 5,
+                "chunks_total": 40,
+                "parse_processed": 5,
+                "parse_throughput": 5 / 4,
+                "embed_processed": 40,
+                "embed_throughput": 10.0,
+                "write_processed": 40,
+                "write_throughput": 10.0,
+            },
+        )
+
+    def test_running_ingestion(self):
+        progress = redis_dataprep.IngestionProgress()
+        with patch.object(redis_dataprep.time, "monotonic", side_effect=[0.0, 2.0]):
+            progress.start(1)
+            progress.record("parse", 1)
+            statistics = progress.get_statistics()
+        self.assertEqual(statistics["running"], 1)
+        self.assertEqual(statistics["parse_throughput"], 0.5)
+
+
+class TestIngestDocuments(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        FakeVectorStore.calls = []
+        self.stored = []
+
+        async def store_by_id(client, key, value, ingest_index_name):
+            self.stored.append((key, value, ingest_index_name))
+            return True
+
+        async def split_document(doc_path):
+            # chunk_size is the number of chunks of the fake documents, the larger ones are parsed last
+            await asyncio.sleep(0.01 * doc_path.chunk_size)
+            return [f"{doc_path.path}-{i}" for i in range(doc_path.chunk_size)]
+
+        self.progress = redis_dataprep.IngestionProgress()
+        patches = [
+            patch.object(redis_dataprep.aioredis, "from_url", AsyncMock(return_value=MagicMock())),
+            patch.object(redis_dataprep, "check_index_existance", AsyncMock(return_value=True)),
+            patch.object(redis_dataprep, "store_by_id", store_by_id),
+            patch.object(redis_dataprep, "split_document", split_document),
+            patch.object(redis_dataprep, "Redis", FakeVectorStore),
+            patch.object(redis_dataprep, "ingestion_progress", self.progress),
+            patch.object(redis_dataprep, "INGEST_PARSE_WORKERS", 0),
+            patch.object(redis_dataprep, "INGEST_EMBED_BATCH_SIZE", 2),
+            patch.object(redis_dataprep, "INGEST_WRITE_BATCH_SIZE", 3),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def test_keys_by_document(self):
+        # two documents with the same file name in different folders, and a document without chunks
+        doc_paths = [
+            DocPath(path="a/report.txt", chunk_size=5),
+            DocPath(path="b/report.txt", chunk_size=3),
+            DocPath(path="c/empty.txt", chunk_size=0),
+        ]
+        await redis_dataprep.ingest_documents_to_redis(doc_paths, FakeEmbedder(), "my_index")
+
+        # each document stores the keys of its own chunks, in chunk order, once all its batches are written
+        self.assertEqual(
+            sorted(self.stored),
+            [
+                ("my_index_empty.txt", "", "my_index"),
+                ("my_index_report.txt", "#".join(f"doc:a/report.txt-{i}" for i in range(5)), "my_index"),
+                ("my_index_report.txt", "#".join(f"doc:b/report.txt-{i}" for i in range(3)), "my_index"),
+            ],
+        )
+        # the batches embedded meanwhile are written together, up to the write batch size
+        self.assertEqual(
+            sorted(text for texts in FakeVectorStore.calls for text in texts),
+            sorted([f"a/report.txt-{i}" for i in range(5)] + [f"b/report.txt-{i}" for i in range(3)]),
+        )
+        self.assertTrue(all(len(texts) <= 4 for texts in FakeVectorStore.calls))
+
+        statistics = self.progress.get_statistics()
+        self.assertEqual(statistics["running"], 0)
+        self.assertEqual((statistics["files_total"], statistics["files_done"]), (3, 3))
+        self.assertEqual(statistics["chunks_total"], 8)
+        self.assertEqual(
+            (statistics["parse_processed"], statistics["embed_processed"], statistics["write_processed"]), (3, 8, 8)
+        )
+
+    async def test_default_index(self):
+        await redis_dataprep.ingest_data_to_redis(DocPath(path="a/notes.txt", chunk_size=1), FakeEmbedder(), None)
+        self.assertEqual(
+            self.stored,
+            [(f"{redis_dataprep.INDEX_NAME}_notes.txt", "doc:a/notes.txt-0", redis_dataprep.INDEX_NAME)],
+        )
+
+    async def test_parse_error(self):
+        async def split_document(doc_path):
+            raise ValueError(f"cannot parse {doc_path.path}")
+
+        with patch.object(redis_dataprep, "split_document", split_document):
+            with self.assertRaises(ValueError):
+                await redis_dataprep.ingest_documents_to_redis([DocPath(path="a/bad.txt")], FakeEmbedder(), None)
+        self.assertEqual(self.stored, [])
+        self.assertEqual(self.progress.running, 0)
+
+
+def dataprep_request(files=None, link_list=None):
+    return RedisDataprepRequest(
+        files=files,
+        link_list=link_list,
+        chunk_size=1500,
+        chunk_overlap=100,
+        process_table=False,
+        table_strategy="fast",
+        index_name="my_index",
+    )
+
+
+def make_dataprep(existing=()):
+    """A Redis dataprep component whose key index holds the files in `existing`."""
+    dataprep = redis_dataprep.OpeaRedisDataprep.__new__(redis_dataprep.OpeaRedisDataprep)
+    dataprep.key_index_client = MagicMock()
+    dataprep.embedder = FakeEmbedder()
+
+    async def load_document(doc_id):
+        return SimpleNamespace(id=doc_id, key_ids="doc:1" if doc_id in existing else None)
+
+    dataprep.key_index_client.load_document = AsyncMock(side_effect=load_document)
+    return dataprep
+
+
+class TestDuplicateChecks(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patches = [
+            patch.object(redis_dataprep, "ingest_documents_to_redis", AsyncMock(return_value=True)),
+            patch.object(redis_dataprep, "save_content_to_local_disk", AsyncMock()),
+            patch.object(redis_dataprep, "parse_html_new", MagicMock(return_value="content")),
+        ]
+        self.ingest, _, _ = [p.start() for p in patches]
+        for p in patches:
+            self.addCleanup(p.stop)
+
+    async def test_files_checked_together(self):
+        dataprep = make_dataprep()
+        files = [SimpleNamespace(filename=name) for name in ("a.txt", "b.txt", "c.txt")]
+        await dataprep.ingest_files(dataprep_request(files=files))
+
+        # one lookup per file, all of them before ingesting
+        looked_up = [call.args[0] for call in dataprep.key_index_client.load_document.await_args_list]
+        self.assertEqual(looked_up, ["file:my_index_a.txt", "file:my_index_b.txt", "file:my_index_c.txt"])
+        doc_paths = self.ingest.await_args.args[0]
+        self.assertEqual([doc_path.path for doc_path in doc_paths], [f"./uploaded_files/{f.filename}" for f in files])
+
+    async def test_existing_file(self):
+        dataprep = make_dataprep(existing={"file:my_index_b.txt"})
+        files = [SimpleNamespace(filename=name) for name in ("a.txt", "b.txt")]
+        with self.assertRaises(HTTPException) as cm:
+            await dataprep.ingest_files(dataprep_request(files=files))
+        self.assertEqual(cm.exception.status_code, 400)
+        self.assertIn("b.txt", cm.exception.detail)
+        self.ingest.assert_not_awaited()
+
+    async def test_duplicate_file_in_request(self):
+        dataprep = make_dataprep()
+        files = [SimpleNamespace(filename=name) for name in ("a.txt", "b.txt", "a.txt")]
+        with self.assertRaises(HTTPException) as cm:
+            await dataprep.ingest_files(dataprep_request(files=files))
+        self.assertEqual(cm.exception.status_code, 400)
+        self.assertIn("a.txt", cm.exception.detail)
+        self.ingest.assert_not_awaited()
+
+    async def test_duplicate_link_in_request(self):
+        dataprep = make_dataprep()
+        links = ["https://example.com/a", "https://example.com/a"]
+        with self.assertRaises(HTTPException) as cm:
+            await dataprep.ingest_files(dataprep_request(link_list=json.dumps(links)))
+        self.assertEqual(cm.exception.status_code, 400)
+        self.ingest.assert_not_awaited()
+
+    async def test_links_checked_together(self):
+        dataprep = make_dataprep()
+        links = ["https://example.com/a", "https://example.com/b"]
+        await dataprep.ingest_files(dataprep_request(link_list=json.dumps(links)))
+
+        self.assertEqual(dataprep.key_index_client.load_document.await_count, 2)
+        self.assertEqual(len(self.ingest.await_args.args[0]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import tempfile
+import unittest
+
+import fitz
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from comps.dataprep.src import utils
+
+
+def words(page, count):
+    return " ".join(f"p{page}w{i}" for i in range(count)) + " "
+
+
+class TestSplitTextStream(unittest.TestCase):
+    def setUp(self):
+        self.splitter = RecursiveCharacterTextSplitter(chunk_size=20, chunk_overlap=0)
+
+    def test_chunks_in_order_across_texts(self):
+        pages = [words(page, 15) for page in range(4)]
+        chunks = list(utils.split_text_stream(pages, self.splitter, 20))
+
+        self.assertTrue(all(len(chunk) <= 20 for chunk in chunks))
+        self.assertEqual(" ".join(chunks), "".join(pages).strip())
+        # the last words of a page and the first ones of the next page share a chunk
+        self.assertIn("p0w14 p1w0 p1w1 p1w2", chunks)
+
+    def test_short_texts(self):
+        pages = ["Hello. ", "World."]
+        chunks = list(utils.split_text_stream(pages, self.splitter, 20))
+        self.assertEqual(chunks, self.splitter.split_text("".join(pages)))
+        self.assertEqual(list(utils.split_text_stream([], self.splitter, 20)), [])
+
+    def test_streams_before_the_last_text(self):
+        read = []
+
+        def pages():
+            for page in range(4):
+                read.append(page)
+                yield words(page, 15)
+
+        chunks = utils.split_text_stream(pages(), self.splitter, 20)
+        self.assertEqual(next(chunks), "p0w0 p0w1 p0w2 p0w3")
+        self.assertLess(len(read), 4)
+
+
+class TestIterPdfPages(unittest.TestCase):
+    PAGES = 9
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.pdf_path = os.path.join(cls.tmpdir.name, "pages.pdf")
+        with fitz.open() as doc:
+            for idx in range(cls.PAGES):
+                doc.new_page().insert_text((72, 72), f"This is page {idx}.")
+            doc.save(cls.pdf_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+
+    def tearDown(self):
+        if utils.pdf_executor is not None:
+            utils.pdf_executor.shutdown()
+            utils.pdf_executor = None
+        utils.set_pdf_loader_workers(utils.PDF_LOADER_WORKERS)
+
+    def test_in_process(self):
+        utils.set_pdf_loader_workers(1)
+        self.assertIsNone(utils.get_pdf_executor())
+        pages = list(utils.iter_pdf_pages(self.pdf_path))
+        self.assertEqual(pages, [f"This is page {idx}." for idx in range(self.PAGES)])
+
+    def test_process_pool_keeps_page_order(self):
+        # 2 workers extract ranges of 2 pages, the last range is shorter
+        utils.set_pdf_loader_workers(2)
+        self.assertIsNotNone(utils.get_pdf_executor())
+        pages = list(utils.iter_pdf_pages(self.pdf_path))
+        self.assertEqual(pages, [f"This is page {idx}." for idx in range(self.PAGES)])
+        self.assertEqual(utils.load_pdf(self.pdf_path), "".join(pages))
+
+
+if __name__ == "__main__":
+    unittest.main()
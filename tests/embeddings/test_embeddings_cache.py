@@ -0,0 +1,196 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import json
+import unittest
+
+from comps.cores.proto.api_protocol import EmbeddingRequest, EmbeddingResponse, EmbeddingResponseData
+from comps.embeddings.src.integrations import cache as cache_module
+from comps.embeddings.src.integrations.cache import OpeaEmbeddingCache
+
+
+def embedding(text):
+    return [float(len(text)), float(ord(text[0]))]
+
+
+class FakeBackend:
+    """Embeds a text as [its length, its first character code], recording the texts of each request."""
+
+    def __init__(self):
+        self.requests = []
+
+    async def invoke_batch(self, inputs):
+        self.requests.append([input.input for input in inputs])
+        responses = []
+        for input in inputs:
+            if not isinstance(input.input, list) or not all(isinstance(text, str) for text in input.input):
+                responses.append(ValueError("Invalid input format"))
+                continue
+            data = [EmbeddingResponseData(index=i, embedding=embedding(text)) for i, text in enumerate(input.input)]
+            responses.append(EmbeddingResponse(data=data, model="backend-model"))
+        return responses
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.redis.writes.append((key, ex))
+        self.redis.data[key] = value
+
+    async def execute(self):
+        if self.redis.error is not None:
+            raise self.redis.error
+
+
+class FakeRedis:
+    def __init__(self, data=None, error=None):
+        self.data = dict(data or {})
+        self.error = error
+        self.writes = []
+
+    async def mget(self, keys):
+        if self.error is not None:
+            raise self.error
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+def make_cache(redis=None, **kwargs):
+    cache = OpeaEmbeddingCache(FakeBackend(), "bge-base", **kwargs)
+    cache.redis = redis
+    return cache
+
+
+def response_embeddings(response):
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class TestKeys(unittest.TestCase):
+    def test_content_hash(self):
+        cache = make_cache()
+        key = cache._key(EmbeddingRequest(input="hello"), "hello")
+        # the request options and the text, separated by NUL characters
+        digest = hashlib.sha256(b"\0\0float\0hello").hexdigest()
+        self.assertEqual(key, f"embedding:bge-base:{digest}")
+
+    def test_options_change_the_key(self):
+        cache = make_cache()
+        keys = {
+            cache._key(EmbeddingRequest(input="hello"), "hello"),
+            cache._key(EmbeddingRequest(input="hello", dimensions=256), "hello"),
+            cache._key(EmbeddingRequest(input="hello", model="other"), "hello"),
+            cache._key(EmbeddingRequest(input="hello"), "world"),
+        }
+        self.assertEqual(len(keys), 4)
+        # the model of the service namespaces the keys
+        other_model = OpeaEmbeddingCache(FakeBackend(), "bge-large")
+        self.assertNotEqual(
+            other_model._key(EmbeddingRequest(input="hello"), "hello"),
+            cache._key(EmbeddingRequest(input="hello"), "hello"),
+        )
+
+    def test_only_texts_are_keyed(self):
+        cache = make_cache()
+        self.assertEqual(len(cache._keys(EmbeddingRequest(input=["a", "b"]))), 2)
+        self.assertIsNone(cache._keys(EmbeddingRequest(input=[1, 2])))
+
+
+class TestLocalCache(unittest.IsolatedAsyncioTestCase):
+    async def test_partial_hits(self):
+        cache = make_cache()
+        await cache.invoke(EmbeddingRequest(input=["apple", "banana"]))
+        response = await cache.invoke(EmbeddingRequest(input=["banana", "cherry", "apple", "cherry"]))
+
+        # only the missing text goes to the backend, once
+        self.assertEqual(cache.backend.requests, [[["apple", "banana"]], [["cherry"]]])
+        self.assertEqual([item.index for item in response.data], [0, 1, 2, 3])
+        self.assertEqual(response_embeddings(response), [embedding(t) for t in ("banana", "cherry", "apple", "cherry")])
+        # usage is only known when the backend embedded every text
+        self.assertIsNone(response.usage)
+        self.assertEqual(response.model, "backend-model")
+
+    async def test_full_hit(self):
+        cache = make_cache()
+        await cache.invoke(EmbeddingRequest(input="apple"))
+        response = await cache.invoke(EmbeddingRequest(input="apple"))
+
+        self.assertEqual(len(cache.backend.requests), 1)
+        self.assertEqual(response_embeddings(response), [embedding("apple")])
+        statistics = cache.get_statistics()
+        self.assertEqual(statistics["hit_rate"], 0.5)
+        self.assertIsNone(statistics["redis_hits"])
+
+    async def test_batch_shares_one_backend_call(self):
+        cache = make_cache()
+        await cache.invoke(EmbeddingRequest(input="apple"))
+        results = await cache.invoke_batch(
+            [
+                EmbeddingRequest(input=["apple", "banana"]),
+                EmbeddingRequest(input=[1, 2]),
+                EmbeddingRequest(input="apple"),
+                EmbeddingRequest(input="cherry"),
+            ]
+        )
+
+        self.assertEqual(cache.backend.requests[1], [["banana"], [1, 2], ["cherry"]])
+        self.assertEqual(response_embeddings(results[0]), [embedding("apple"), embedding("banana")])
+        # inputs which are not texts get the backend answer unchanged
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(response_embeddings(results[2]), [embedding("apple")])
+        self.assertEqual(response_embeddings(results[3]), [embedding("cherry")])
+
+    async def test_backend_error_is_raised(self):
+        cache = make_cache()
+        with self.assertRaises(ValueError):
+            await cache.invoke(EmbeddingRequest(input=[1, 2]))
+
+
+class TestRedisTier(unittest.IsolatedAsyncioTestCase):
+    async def test_redis_hits(self):
+        cache = make_cache(FakeRedis())
+        key = cache._key(EmbeddingRequest(input="apple"), "apple")
+        cache.redis.data[key] = json.dumps([9.0, 9.0])
+
+        response = await cache.invoke(EmbeddingRequest(input=["apple", "banana"]))
+
+        self.assertEqual(cache.backend.requests, [[["banana"]]])
+        self.assertEqual(response_embeddings(response), [[9.0, 9.0], embedding("banana")])
+        self.assertEqual(cache.redis_hits, 1)
+        # the Redis hits fill the local tier, the generated embeddings are stored in both tiers
+        self.assertEqual(cache.local.get(key), [9.0, 9.0])
+        banana = cache._key(EmbeddingRequest(input="banana"), "banana")
+        self.assertEqual(json.loads(cache.redis.data[banana]), embedding("banana"))
+
+        await cache.invoke(EmbeddingRequest(input="apple"))
+        self.assertEqual(cache.redis_hits, 1)
+
+    async def test_ttl(self):
+        cache = make_cache(FakeRedis(), ttl=0.5)
+        await cache.invoke(EmbeddingRequest(input="apple"))
+        self.assertEqual([ex for _, ex in cache.redis.writes], [1])
+
+    async def test_redis_errors_fall_back_to_the_backend(self):
+        cache = make_cache(FakeRedis(error=ConnectionError("refused")))
+        with self.assertLogs(cache_module.logger.logger, level="ERROR"):
+            response = await cache.invoke(EmbeddingRequest(input=["apple", "banana"]))
+
+        self.assertEqual(cache.backend.requests, [[["apple", "banana"]]])
+        self.assertEqual(response_embeddings(response), [embedding("apple"), embedding("banana")])
+        # the local tier still serves the texts
+        await cache.invoke(EmbeddingRequest(input="apple"))
+        self.assertEqual(len(cache.backend.requests), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
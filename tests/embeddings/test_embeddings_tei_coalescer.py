@@ -0,0 +1,128 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from comps.cores.proto.api_protocol import EmbeddingRequest
+from comps.embeddings.src.integrations import tei
+from comps.embeddings.src.integrations.tei import EmbeddingCoalescer, OpeaTEIEmbedding
+
+
+class FakeTEIClient:
+    """Embeds a text as [its length, its first character code], recording the texts of each call."""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.error = error
+
+    async def feature_extraction(self, text, model):
+        self.calls.append(list(text))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return np.array([embedding(t) for t in text])
+
+
+def embedding(text):
+    return [float(len(text)), float(ord(text[0]))]
+
+
+def make_embedding(client, coalesce_wait=None, max_chars=65536):
+    # the component is built without connecting to TEI
+    component = OpeaTEIEmbedding.__new__(OpeaTEIEmbedding)
+    component.base_url = "http://tei"
+    component.client = client
+    component.coalescer = (
+        EmbeddingCoalescer(component._embed_groups, coalesce_wait, max_chars) if coalesce_wait is not None else None
+    )
+    return component
+
+
+class TestEmbeddingCoalescer(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_callers_share_a_call(self):
+        client = FakeTEIClient()
+        component = make_embedding(client, coalesce_wait=0.05)
+        requests = [["apple", "banana"], ["cherry"], ["banana", "date", "apple"]]
+
+        responses = await asyncio.gather(*(component.invoke(EmbeddingRequest(input=texts)) for texts in requests))
+
+        # one TEI call, each distinct text once
+        self.assertEqual(client.calls, [["apple", "banana", "cherry", "date"]])
+        # each caller gets the rows of its own texts, in order
+        for texts, response in zip(requests, responses):
+            self.assertEqual([data.index for data in response.data], list(range(len(texts))))
+            self.assertEqual([data.embedding for data in response.data], [embedding(text) for text in texts])
+
+    async def test_flush_on_max_chars(self):
+        client = FakeTEIClient()
+        coalescer = EmbeddingCoalescer(make_embedding(client)._embed_groups, max_wait=10, max_chars=10)
+
+        # the pending texts reach max_chars, they are embedded without waiting for max_wait
+        results = await asyncio.wait_for(asyncio.gather(coalescer.embed(["hello"]), coalescer.embed(["world"])), 1)
+        self.assertEqual(results, [[embedding("hello")], [embedding("world")]])
+        self.assertEqual(client.calls, [["hello", "world"]])
+
+    async def test_separate_windows(self):
+        client = FakeTEIClient()
+        coalescer = EmbeddingCoalescer(make_embedding(client)._embed_groups, max_wait=0.01, max_chars=65536)
+        await coalescer.embed(["first"])
+        await coalescer.embed(["second"])
+        self.assertEqual(client.calls, [["first"], ["second"]])
+
+    async def test_error_reaches_every_caller(self):
+        client = FakeTEIClient(error=ConnectionError("TEI is down"))
+        coalescer = EmbeddingCoalescer(make_embedding(client)._embed_groups, max_wait=0.01, max_chars=65536)
+        results = await asyncio.gather(coalescer.embed(["a"]), coalescer.embed(["b"]), return_exceptions=True)
+        self.assertEqual([type(result) for result in results], [ConnectionError, ConnectionError])
+        self.assertEqual(len(client.calls), 1)
+
+    async def test_cancelled_caller_is_not_embedded(self):
+        client = FakeTEIClient()
+        coalescer = EmbeddingCoalescer(make_embedding(client)._embed_groups, max_wait=0.05, max_chars=65536)
+        cancelled = asyncio.create_task(coalescer.embed(["gone"]))
+        kept = asyncio.create_task(coalescer.embed(["kept"]))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        self.assertEqual(await kept, [embedding("kept")])
+        self.assertEqual(client.calls, [["kept"]])
+
+
+class TestEmbedGroups(unittest.IsolatedAsyncioTestCase):
+    async def test_batches_bounded_by_size_and_chars(self):
+        client = FakeTEIClient()
+        component = make_embedding(client)
+        with patch.object(tei, "TEI_EMBEDDING_MAX_BATCH_SIZE", 2), patch.object(
+            tei, "TEI_EMBEDDING_MAX_BATCH_CHARS", 8
+        ):
+            groups = await component._embed_groups([["aa", "bbb", "cc"], ["dddddd", "aa"], ["e"]])
+
+        self.assertEqual(client.calls, [["aa", "bbb"], ["cc", "dddddd"], ["e"]])
+        self.assertEqual(
+            groups,
+            [
+                [embedding("aa"), embedding("bbb"), embedding("cc")],
+                [embedding("dddddd"), embedding("aa")],
+                [embedding("e")],
+            ],
+        )
+
+    async def test_invoke_batch(self):
+        client = FakeTEIClient()
+        component = make_embedding(client)
+        responses = await component.invoke_batch(
+            [EmbeddingRequest(input="one"), EmbeddingRequest(input=[2, 3]), EmbeddingRequest(input=["three"])]
+        )
+
+        self.assertEqual(client.calls, [["one", "three"]])
+        self.assertEqual(responses[0].data[0].embedding, embedding("one"))
+        self.assertIsInstance(responses[1], ValueError)
+        self.assertEqual(responses[2].data[0].embedding, embedding("three"))
+
+
+if __name__ == "__main__":
+    unittest.main()
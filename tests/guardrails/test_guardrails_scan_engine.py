@@ -0,0 +1,225 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+from comps.guardrails.src.guardrails.utils.scan_engine import BatchedPipeline, ScannerEngine, _PipelineCall
+
+
+class FakePipeline:
+    """Upper-cases its texts, recording the texts and arguments of each call."""
+
+    def __init__(self, gate=None, error=None, name="model"):
+        self.calls = []
+        self.gate = gate
+        self.error = error
+        self.model = SimpleNamespace(config=SimpleNamespace(_name_or_path=name))
+        self.device = "cpu"
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append((inputs, kwargs))
+        if self.gate is not None and len(self.calls) == 1:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        if not isinstance(inputs, list):
+            return inputs.upper()
+        return [text.upper() for text in inputs]
+
+
+def call_in_thread(pipeline, inputs, results, **kwargs):
+    def run():
+        try:
+            results[inputs[0]] = pipeline(inputs, **kwargs)
+        except Exception as e:
+            results[inputs[0]] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class TestBatchedPipeline(unittest.TestCase):
+    def test_lone_caller(self):
+        pipeline = FakePipeline()
+        batched = BatchedPipeline(pipeline, max_batch_size=4, max_wait=5)
+        start = time.monotonic()
+        self.assertEqual(batched(["a", "b"], truncation=True), ["A", "B"])
+        # a lone caller does not wait for other calls
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(pipeline.calls, [(["a", "b"], {"batch_size": 4, "truncation": True})])
+        # texts which are not a list go straight to the pipeline
+        self.assertEqual(batched("c"), "C")
+        self.assertEqual(pipeline.calls[-1], ("c", {}))
+
+    def test_concurrent_calls_share_a_batch(self):
+        gate = threading.Event()
+        pipeline = FakePipeline(gate=gate)
+        batched = BatchedPipeline(pipeline, max_batch_size=4, max_wait=5)
+        results = {}
+
+        # the first call runs alone, and blocks in the pipeline
+        threads = [call_in_thread(batched, ["first"], results)]
+        wait_until(lambda: len(pipeline.calls) == 1)
+        # the calls arriving meanwhile elect a new leader, which waits until they fill a batch
+        threads += [call_in_thread(batched, [f"t{i}"], results) for i in range(3)]
+        threads.append(call_in_thread(batched, ["u0", "u1"], results))
+        wait_until(lambda: len(pipeline.calls) >= 2)
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(pipeline.calls[0][0], ["first"])
+        # the leader takes the queued calls, the texts of a pipeline call do not exceed the batch size
+        self.assertEqual(
+            sorted(text for inputs, _ in pipeline.calls[1:] for text in inputs), ["t0", "t1", "t2", "u0", "u1"]
+        )
+        self.assertTrue(all(len(inputs) <= 4 for inputs, _ in pipeline.calls))
+        # each caller gets the outputs of its own texts, in order
+        self.assertEqual(results, {"first": ["FIRST"], "t0": ["T0"], "t1": ["T1"], "t2": ["T2"], "u0": ["U0", "U1"]})
+        self.assertEqual(batched._callers, 0)
+        self.assertEqual(batched._queues, {})
+
+    def test_arguments_are_not_mixed(self):
+        gate = threading.Event()
+        pipeline = FakePipeline(gate=gate)
+        batched = BatchedPipeline(pipeline, max_batch_size=2, max_wait=5)
+        results = {}
+
+        threads = [call_in_thread(batched, ["first"], results)]
+        wait_until(lambda: len(pipeline.calls) == 1)
+        threads += [
+            call_in_thread(batched, ["a0"], results, top_k=1),
+            call_in_thread(batched, ["b0"], results, top_k=2),
+            call_in_thread(batched, ["a1"], results, top_k=1),
+            call_in_thread(batched, ["b1"], results, top_k=2),
+        ]
+        wait_until(lambda: len(pipeline.calls) >= 3)
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        batches = {kwargs["top_k"]: sorted(inputs) for inputs, kwargs in pipeline.calls[1:]}
+        self.assertEqual(batches, {1: ["a0", "a1"], 2: ["b0", "b1"]})
+
+    def test_run_all_splits_batches(self):
+        pipeline = FakePipeline()
+        batched = BatchedPipeline(pipeline, max_batch_size=4)
+        calls = [_PipelineCall(["a", "b", "c"]), _PipelineCall(["d", "e"]), _PipelineCall(["f", "g"])]
+        batched._run_all(calls, {})
+
+        self.assertEqual([inputs for inputs, _ in pipeline.calls], [["a", "b", "c"], ["d", "e", "f", "g"]])
+        self.assertEqual([call.outputs for call in calls], [["A", "B", "C"], ["D", "E"], ["F", "G"]])
+        self.assertTrue(all(call.done.is_set() for call in calls))
+
+    def test_error_reaches_every_caller(self):
+        gate = threading.Event()
+        pipeline = FakePipeline(gate=gate, error=RuntimeError("out of memory"))
+        batched = BatchedPipeline(pipeline, max_batch_size=2, max_wait=5)
+        results = {}
+
+        threads = [call_in_thread(batched, ["first"], results)]
+        wait_until(lambda: len(pipeline.calls) == 1)
+        threads += [call_in_thread(batched, [text], results) for text in ("a", "b")]
+        wait_until(lambda: len(pipeline.calls) >= 2)
+        gate.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(set(results), {"first", "a", "b"})
+        self.assertTrue(all(isinstance(error, RuntimeError) for error in results.values()))
+        # the pipeline is usable after the error
+        pipeline.error = None
+        self.assertEqual(batched(["c"]), ["C"])
+        self.assertEqual(batched._callers, 0)
+
+
+class FakeScanner:
+    def __init__(self, valid=True, replace=None, delay=0.0, pipeline=None):
+        self.valid = valid
+        self.replace = replace
+        self.delay = delay
+        self.scanned = []
+        if pipeline is not None:
+            self._pipeline = pipeline
+
+    def scan(self, prompt, output=None):
+        text = prompt if output is None else output
+        self.scanned.append(text)
+        time.sleep(self.delay)
+        if self.replace:
+            text = text.replace(*self.replace)
+        return text, self.valid, 0.0 if self.valid else 1.0
+
+
+def scanner(name, **kwargs):
+    return type(name, (FakeScanner,), {})(**kwargs)
+
+
+class TestScannerEngine(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = ScannerEngine(workers=4, batch_size=4, batch_wait_ms=1)
+
+    def tearDown(self):
+        self.engine.executor.shutdown()
+
+    def test_prepare_shares_pipelines(self):
+        pipeline = FakePipeline(name="toxic-model")
+        toxicity = scanner("Toxicity", pipeline=pipeline)
+        bias = scanner("Bias", pipeline=FakePipeline(name="toxic-model"))
+        gibberish = scanner("Gibberish", pipeline=FakePipeline(name="gibberish-model"))
+        self.engine.prepare([toxicity, bias, gibberish, scanner("Secrets")])
+
+        self.assertIsInstance(toxicity._pipeline, BatchedPipeline)
+        self.assertIs(toxicity._pipeline.pipeline, pipeline)
+        self.assertIs(bias._pipeline, toxicity._pipeline)
+        self.assertIsNot(gibberish._pipeline, toxicity._pipeline)
+        # a scanner is wrapped once
+        wrapped = toxicity._pipeline
+        self.engine.prepare([toxicity])
+        self.assertIs(toxicity._pipeline, wrapped)
+
+    async def test_scan(self):
+        secrets = scanner("Secrets", replace=("key", "[REDACTED]"))
+        regex = scanner("Regex", replace=("token", "[REDACTED]"))
+        toxicity = scanner("Toxicity")
+        sanitized, valid, scores = await self.engine.scan([toxicity, secrets, regex], "a key and a token")
+
+        self.assertEqual(sanitized, "a [REDACTED] and a [REDACTED]")
+        # the sequential scanners see the text sanitized by the previous ones, the parallel ones the original text
+        self.assertEqual(regex.scanned, ["a [REDACTED] and a token"])
+        self.assertEqual(toxicity.scanned, ["a key and a token"])
+        self.assertEqual(list(valid), ["Toxicity", "Secrets", "Regex"])
+        self.assertEqual(scores, {"Toxicity": 0.0, "Secrets": 0.0, "Regex": 0.0})
+
+    async def test_scan_output(self):
+        relevance = scanner("Relevance")
+        await self.engine.scan([relevance], "the answer", prompt="the question")
+        self.assertEqual(relevance.scanned, ["the answer"])
+
+    async def test_fail_fast(self):
+        self.engine.fail_fast = True
+        slow = scanner("Sentiment", delay=0.5)
+        sanitized, valid, _ = await self.engine.scan([scanner("Toxicity", valid=False), slow], "text")
+
+        self.assertEqual(sanitized, "text")
+        self.assertEqual(valid, {"Toxicity": False})
+
+    async def test_scanner_error(self):
+        broken = scanner("Toxicity")
+        broken.scan = lambda prompt, output=None: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            await self.engine.scan([broken, scanner("Secrets")], "text")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import dataclasses
+import sys
+import threading
+import types
+import unittest
+from unittest.mock import patch
+
+from llm_guard import transformers_helpers
+
+from comps.guardrails.src.guardrails.utils.scanners import ScannerCache
+
+LOADER = "get_tokenizer_and_model_for_classification"
+
+
+@dataclasses.dataclass
+class Model:
+    path: str
+    pipeline_kwargs: dict = dataclasses.field(default_factory=dict)
+
+
+class LoadedModel:
+    def __init__(self, path):
+        self.path = path
+
+
+class FakeScanner:
+    """Loads its model like the LLM Guard scanners, through the loader imported by its module."""
+
+    def __init__(self, module, model):
+        self.tokenizer, self.model = getattr(module, LOADER)(model=model, use_onnx=False)
+
+
+class TestScannerCache(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+
+        def load(model, use_onnx=False):
+            self.loads.append(model.path)
+            return f"tokenizer of {model.path}", LoadedModel(model.path)
+
+        load.__name__ = LOADER
+        self.load = load
+        # a scanner module which imported the loader, as the LLM Guard scanner modules do
+        self.module = types.ModuleType("llm_guard.input_scanners.fake")
+        setattr(self.module, LOADER, load)
+        patches = [
+            patch.object(transformers_helpers, LOADER, load),
+            patch.dict(sys.modules, {self.module.__name__: self.module}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.cache = ScannerCache(max_size=2)
+
+    def scanner(self, path, **pipeline_kwargs):
+        return lambda: FakeScanner(self.module, Model(path, pipeline_kwargs))
+
+    def test_reuse_by_configuration(self):
+        first = self.cache.get_or_create("input", "toxicity", {"enabled": True, "threshold": 0.5}, self.scanner("a"))
+        # the enabled flag and the id are not part of the configuration
+        again = self.cache.get_or_create("input", "toxicity", {"threshold": 0.5, "id": 3}, self.scanner("a"))
+        other = self.cache.get_or_create("input", "toxicity", {"threshold": 0.7}, self.scanner("a"))
+        output = self.cache.get_or_create("output", "toxicity", {"threshold": 0.5}, self.scanner("a"))
+
+        self.assertIs(again, first)
+        self.assertIsNot(other, first)
+        self.assertIsNot(output, first)
+        self.assertEqual(self.cache.get_statistics()["hits"], 1)
+
+    def test_eviction(self):
+        first = self.cache.get_or_create("input", "a", {}, self.scanner("a"))
+        self.cache.get_or_create("input", "b", {}, self.scanner("b"))
+        self.cache.get_or_create("input", "c", {}, self.scanner("c"))
+        self.assertIsNot(self.cache.get_or_create("input", "a", {}, self.scanner("a")), first)
+
+    def test_scanners_share_models(self):
+        first = self.cache.get_or_create("input", "toxicity", {"threshold": 0.5}, self.scanner("a"))
+        # the pipeline arguments do not change the loaded weights
+        second = self.cache.get_or_create("output", "toxicity", {"threshold": 0.7}, self.scanner("a", batch_size=8))
+        third = self.cache.get_or_create("input", "gibberish", {}, self.scanner("b"))
+
+        self.assertEqual(self.loads, ["a", "b"])
+        self.assertIs(second.model, first.model)
+        self.assertEqual(second.tokenizer, "tokenizer of a")
+        self.assertIsNot(third.model, first.model)
+        # the loader is restored once the scanners are constructed
+        self.assertIs(getattr(self.module, LOADER), self.load)
+
+    def test_loader_restored_on_error(self):
+        def fail():
+            FakeScanner(self.module, Model("a"))
+            raise ValueError("bad configuration")
+
+        with self.assertRaises(ValueError):
+            self.cache.get_or_create("input", "toxicity", {}, fail)
+        self.assertIs(getattr(self.module, LOADER), self.load)
+
+    def test_fallback_for_other_threads(self):
+        other_thread_models = []
+
+        def create():
+            # another thread loading a model while a scanner is constructed loads it as usual
+            thread = threading.Thread(target=lambda: other_thread_models.append(FakeScanner(self.module, Model("a"))))
+            thread.start()
+            thread.join()
+            return FakeScanner(self.module, Model("a"))
+
+        scanner = self.cache.get_or_create("input", "toxicity", {}, create)
+        self.assertEqual(self.loads, ["a", "a"])
+        self.assertIsNot(other_thread_models[0].model, scanner.model)
+        self.assertEqual(len(self.cache.models), 1)
+
+    def test_fallback_for_unkeyed_models(self):
+        def create():
+            return FakeScanner(self.module, types.SimpleNamespace(path="a"))
+
+        first = self.cache.get_or_create("input", "a", {}, create)
+        second = self.cache.get_or_create("input", "b", {}, create)
+        self.assertEqual(self.loads, ["a", "a"])
+        self.assertIsNot(first.model, second.model)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import numpy as np
+import redis
+
+from comps.cores.common.cache import LRUCache
+from comps.retrievers.src.integrations.redis import OpeaRedisRetriever
+
+
+class FakePipeline:
+    """Records the commands of a pipeline and replies with the given raw replies."""
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def execute_command(self, *args):
+        self.commands.append(args)
+
+    async def execute(self):
+        return self.replies[: len(self.commands)]
+
+
+def search_reply(*docs):
+    """The raw reply of FT.SEARCH: the total, then the id and the flat field list of each document."""
+    reply = [len(docs)]
+    for doc_id, content, distance, source in docs:
+        reply += [doc_id.encode(), [b"content", content.encode(), b"distance", distance, b"source", source.encode()]]
+    return reply
+
+
+def make_retriever(replies=(), info=None):
+    # the component is built without connecting to Redis or to the embedding service
+    retriever = OpeaRedisRetriever.__new__(OpeaRedisRetriever)
+    retriever.pipeline = FakePipeline(list(replies))
+    retriever.async_client = MagicMock()
+    retriever.async_client.pipeline.return_value = retriever.pipeline
+    retriever.async_client.ft.return_value.info = info or AsyncMock(return_value={"num_docs": "0"})
+    retriever.index_has_docs = LRUCache(4, ttl=60)
+    return retriever
+
+
+def vector_store():
+    schema = SimpleNamespace(
+        content_vector_key="content_vector",
+        content_key="content",
+        metadata_keys=["source"],
+        vector_dtype=np.float32,
+    )
+    return SimpleNamespace(index_name="rag-redis", _schema=schema)
+
+
+class TestSearchByVectors(unittest.IsolatedAsyncioTestCase):
+    async def test_knn_query(self):
+        retriever = make_retriever(
+            [search_reply(("doc:1", "first", b"0.1", "a.pdf"), ("doc:2", "second", b"0.3", "b.pdf"))]
+        )
+        docs = await retriever._search_by_vectors(vector_store(), [0.5, 0.25], k=2)
+
+        (command,) = retriever.pipeline.commands
+        self.assertEqual(
+            command,
+            (
+                "FT.SEARCH",
+                "rag-redis",
+                "(*)=>[KNN 2 @content_vector $vector AS distance]",
+                "PARAMS",
+                2,
+                "vector",
+                np.array([0.5, 0.25], dtype=np.float32).tobytes(),
+                "RETURN",
+                3,
+                "content",
+                "distance",
+                "source",
+                "SORTBY",
+                "distance",
+                "ASC",
+                "LIMIT",
+                0,
+                2,
+                "DIALECT",
+                2,
+            ),
+        )
+        self.assertEqual([doc.page_content for doc in docs], ["first", "second"])
+        self.assertEqual(docs[0].metadata, {"id": "doc:1", "source": "a.pdf"})
+
+    async def test_distance_threshold_query(self):
+        retriever = make_retriever([search_reply()])
+        # a threshold of 0 is a range query too
+        docs = await retriever._search_by_vectors(vector_store(), [0.5, 0.25], k=4, distance_threshold=0.0)
+
+        (command,) = retriever.pipeline.commands
+        self.assertEqual(
+            command[2], "@content_vector:[VECTOR_RANGE $distance_threshold $vector]=>{$yield_distance_as: distance}"
+        )
+        self.assertEqual(command[3:5], ("PARAMS", 4))
+        self.assertEqual(command[7:9], ("distance_threshold", 0.0))
+        self.assertEqual(docs, [])
+
+    async def test_several_vectors_in_one_pipeline(self):
+        retriever = make_retriever(
+            [
+                search_reply(("doc:1", "first", b"0.4", "a.pdf"), ("doc:2", "second", b"0.2", "b.pdf")),
+                search_reply(("doc:1", "first", b"0.1", "a.pdf"), ("doc:3", "third", b"0.3", "c.pdf")),
+            ]
+        )
+        docs = await retriever._search_by_vectors(vector_store(), [[0.5, 0.25], [0.25, 0.5]], k=2)
+
+        self.assertEqual(len(retriever.pipeline.commands), 2)
+        # the documents are merged by their smallest distance, the k nearest are returned
+        self.assertEqual([doc.metadata["id"] for doc in docs], ["doc:1", "doc:2"])
+
+
+class TestIndexHasDocs(unittest.IsolatedAsyncioTestCase):
+    async def test_parses_and_caches_ft_info(self):
+        info = AsyncMock(return_value={"index_name": "rag-redis", "num_docs": "3"})
+        retriever = make_retriever(info=info)
+        self.assertTrue(await retriever._index_has_docs("rag-redis"))
+        self.assertTrue(await retriever._index_has_docs("rag-redis"))
+        info.assert_awaited_once()
+        retriever.async_client.ft.assert_called_with("rag-redis")
+
+    async def test_empty_index(self):
+        retriever = make_retriever(info=AsyncMock(return_value={"num_docs": 0}))
+        self.assertFalse(await retriever._index_has_docs("rag-redis"))
+
+    async def test_missing_index(self):
+        info = AsyncMock(side_effect=redis.ResponseError("Unknown index name"))
+        retriever = make_retriever(info=info)
+        self.assertFalse(await retriever._index_has_docs("rag-redis"))
+        # the answer is cached
+        self.assertFalse(await retriever._index_has_docs("rag-redis"))
+        info.assert_awaited_once()
+
+    async def test_connection_error_is_not_cached(self):
+        info = AsyncMock(side_effect=[redis.ConnectionError("refused"), {"num_docs": "1"}])
+        retriever = make_retriever(info=info)
+        self.assertFalse(await retriever._index_has_docs("rag-redis"))
+        self.assertTrue(await retriever._index_has_docs("rag-redis"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import yaml
+
+from comps import TextDoc
+from comps.router.src import opea_router_microservice as router
+
+
+class FakeController:
+    """Routes every query to its version, waiting for `gate` when one is given."""
+
+    def __init__(self, version, gate=None):
+        self.version = version
+        self.gate = gate
+        self.batches = []
+
+    async def aroute_batch(self, batch):
+        self.batches.append([messages[0]["content"] for messages in batch])
+        if self.gate is not None:
+            await self.gate.wait()
+        return [f"http://v{self.version}" for _ in batch]
+
+
+class FakeControllerFactory:
+    """Builds a FakeController from the version in the controller config file."""
+
+    def __init__(self):
+        self.gates = {}
+
+    def factory(self, controller_config, model_map):
+        with open(controller_config) as f:
+            config = yaml.safe_load(f)
+        if "version" not in config:
+            raise ValueError("no version in the controller config")
+        return FakeController(config["version"], self.gates.get(config["version"]))
+
+
+class TestConfigReload(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.config_path = os.path.join(self.directory.name, "config.yaml")
+        self.controller_config_path = os.path.join(self.directory.name, "semantic_router.yaml")
+        with open(self.config_path, "w") as f:
+            yaml.safe_dump(
+                {
+                    "controller_type": "semantic_router",
+                    "controller_config_paths": {"semantic_router": self.controller_config_path},
+                },
+                f,
+            )
+        self.write_controller_config(version=1)
+
+        self.factory = FakeControllerFactory()
+        patches = [
+            patch.object(router, "CONFIG_PATH", self.config_path),
+            patch.object(router, "_controller_factory", self.factory),
+            patch.object(router, "_controller", None),
+            patch.object(router, "_config_data", {}),
+            patch.dict(os.environ, {"CONTROLLER_TYPE": ""}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def write_controller_config(self, **config):
+        with open(self.controller_config_path, "w") as f:
+            yaml.safe_dump(config, f)
+
+    async def test_swap_while_a_batch_is_in_flight(self):
+        gate = asyncio.Event()
+        self.factory.gates[1] = gate
+        router._load_config()
+        first = router._controller
+
+        # a request blocks in the first controller while the config changes
+        in_flight = asyncio.create_task(router.route_microservice(TextDoc(text="before")))
+        while not first.batches:
+            await asyncio.sleep(0)
+        self.write_controller_config(version=2)
+        await asyncio.to_thread(router._load_config)
+
+        # the following requests use the new controller right away
+        response = await asyncio.wait_for(router.route_microservice(TextDoc(text="after")), 5)
+        self.assertEqual(response.url, "http://v2")
+        self.assertFalse(in_flight.done())
+
+        # the request in flight finishes on the controller it started with
+        gate.set()
+        self.assertEqual((await in_flight).url, "http://v1")
+        self.assertEqual(first.batches, [["before"]])
+        self.assertEqual(router._controller.batches, [["after"]])
+
+    async def test_dynamic_batch_across_a_swap(self):
+        gate = asyncio.Event()
+        self.factory.gates[1] = gate
+        router._load_config()
+        first = router._controller
+        self.write_controller_config(version=2)
+        router._load_config()
+        second = router._controller
+
+        # a batch collected across the swap holds requests queued with either controller
+        batch = router._ControllerBatch().invoke_batch(
+            [(first, [{"content": "a"}]), (second, [{"content": "b"}]), (first, [{"content": "c"}])]
+        )
+        task = asyncio.create_task(batch)
+        while not first.batches:
+            await asyncio.sleep(0)
+        gate.set()
+
+        self.assertEqual(await asyncio.wait_for(task, 5), ["http://v1", "http://v2", "http://v1"])
+        self.assertEqual(first.batches, [["a", "c"]])
+        self.assertEqual(second.batches, [["b"]])
+
+    def test_watch_config(self):
+        router._load_config()
+        first = router._controller
+
+        class StopWatching(Exception):
+            pass
+
+        # each sleep of the watcher applies the next change to the config files
+        changes = [
+            lambda: None,
+            lambda: self.write_controller_config(version=2, utterances=["changed"]),
+            lambda: self.write_controller_config(broken=True),
+        ]
+
+        def sleep(interval):
+            if not changes:
+                raise StopWatching()
+            changes.pop(0)()
+
+        with patch.object(router.time, "sleep", sleep), self.assertRaises(StopWatching):
+            router._watch_config(1)
+
+        # the changed config was loaded, the broken one kept the controller in place
+        self.assertIsNot(router._controller, first)
+        self.assertEqual(router._controller.version, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from comps.router.src.integrations.controllers.semantic_router_controller import semantic_router_controller as src
+from comps.router.src.integrations.controllers.semantic_router_controller.semantic_router_controller import (
+    EmbeddingDiskCache,
+    SemanticRouterController,
+)
+
+VECTORS = {
+    # the utterances of the "general" route average to [0.707, 0.707]
+    "hello": [1.0, 0.0],
+    "how are you": [0.0, 1.0],
+    # the "code" route is close to [1, 0]
+    "write a function": [0.9, -0.1],
+    "fix this bug": [0.9, -0.1],
+    "refactor": [0.9, -0.1],
+    # queries
+    "hi": [1.0, 0.0],
+    "thanks": [0.0, 1.0],
+    "compile": [0.6, -0.8],
+    "silence": [0.0, 0.0],
+}
+
+MODEL_MAP = {"general": {"endpoint": "http://general"}, "code": {"endpoint": "http://code"}}
+
+
+class FakeEncoder:
+    """Embeds the texts of VECTORS, recording the texts of each call."""
+
+    score_threshold = None
+    calls = []
+
+    def __init__(self, name, **kwargs):
+        self.name = name
+
+    def __call__(self, texts):
+        FakeEncoder.calls.append(list(texts))
+        return [VECTORS[text] for text in texts]
+
+
+def router_config(routes=None, **kwargs):
+    if routes is None:
+        routes = [
+            {"name": "general", "utterances": ["hello", "how are you"]},
+            {"name": "code", "utterances": ["write a function", "fix this bug"]},
+        ]
+    return {
+        "embedding_provider": "huggingface",
+        "embedding_models": {"huggingface": "fake-model"},
+        "routes": routes,
+        **kwargs,
+    }
+
+
+def messages(query):
+    return [{"content": query}]
+
+
+class TestSemanticRouterController(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        FakeEncoder.calls = []
+        patches = [
+            patch.object(src, "HuggingFaceEncoder", FakeEncoder),
+            patch.object(src, "ROUTER_EMBEDDING_CACHE_DIR", ""),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_mean_centroids(self):
+        controller = SemanticRouterController(router_config(), model_map=MODEL_MAP)
+
+        self.assertEqual(controller.route_names, ["general", "code"])
+        np.testing.assert_allclose(
+            controller.centroids, [[0.70710677, 0.70710677], [0.99388373, -0.11043153]], rtol=1e-6
+        )
+        self.assertTrue(controller.centroids.flags["C_CONTIGUOUS"])
+        # "hi" is one of the "general" utterances, yet closer to the mean of the "code" utterances
+        self.assertEqual(controller.route(messages("hi")), "http://code")
+        self.assertEqual(controller.route(messages("thanks")), "http://general")
+
+    async def test_batch_decisions(self):
+        controller = SemanticRouterController(router_config(), model_map=MODEL_MAP)
+        FakeEncoder.calls = []
+
+        endpoints = await controller.aroute_batch([messages("thanks"), messages("hi"), messages("thanks")])
+
+        self.assertEqual(endpoints, ["http://general", "http://code", "http://general"])
+        self.assertEqual(FakeEncoder.calls, [["hi", "thanks"]])
+
+    def test_fallback_to_the_first_route(self):
+        controller = SemanticRouterController(router_config(score_threshold=0.8), model_map=MODEL_MAP)
+        self.assertEqual(controller.score_threshold, 0.8)
+        # "compile" is closest to "code", with a similarity of 0.685 below the threshold
+        self.assertEqual(controller.route(messages("compile")), "http://general")
+        # a query without direction scores 0 with every route
+        self.assertEqual(controller.route(messages("silence")), "http://general")
+        self.assertEqual(controller.route(messages("hi")), "http://code")
+
+    def test_cached_decisions(self):
+        controller = SemanticRouterController(router_config(), model_map=MODEL_MAP)
+        FakeEncoder.calls = []
+
+        controller.route(messages("hi"))
+        controller.route(messages("hi"))
+
+        self.assertEqual(FakeEncoder.calls, [["hi"]])
+        self.assertEqual(controller.get_statistics()["decisions"]["hits"], 1)
+
+    def test_no_routes(self):
+        controller = SemanticRouterController(router_config(routes=[]), model_map=MODEL_MAP)
+        with self.assertRaises(ValueError):
+            controller.route(messages("hi"))
+
+    def test_unknown_endpoint(self):
+        controller = SemanticRouterController(router_config(), model_map={"general": MODEL_MAP["general"]})
+        with self.assertRaises(ValueError):
+            controller.route(messages("hi"))
+
+
+class TestEmbeddingDiskCache(unittest.TestCase):
+    def setUp(self):
+        FakeEncoder.calls = []
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        patches = [
+            patch.object(src, "HuggingFaceEncoder", FakeEncoder),
+            patch.object(src, "ROUTER_EMBEDDING_CACHE_DIR", self.directory.name),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_keys(self):
+        cache = EmbeddingDiskCache(self.directory.name, "huggingface:fake-model")
+        digest = hashlib.sha256("huggingface:fake-model\0hello".encode("utf-8")).hexdigest()
+        self.assertEqual(cache.path("hello"), os.path.join(self.directory.name, f"{digest}.npy"))
+        # the encoder is part of the key
+        other = EmbeddingDiskCache(self.directory.name, "openai:fake-model")
+        self.assertNotEqual(other.path("hello"), cache.path("hello"))
+
+    def test_get_and_set(self):
+        cache = EmbeddingDiskCache(self.directory.name, "huggingface:fake-model")
+        self.assertIsNone(cache.get("hello"))
+        cache.set("hello", np.array([1.0, 0.0], dtype=np.float32))
+        np.testing.assert_array_equal(cache.get("hello"), [1.0, 0.0])
+        # no temporary file is left behind
+        self.assertEqual(os.listdir(self.directory.name), [os.path.basename(cache.path("hello"))])
+
+    def test_unreadable_file(self):
+        cache = EmbeddingDiskCache(self.directory.name, "huggingface:fake-model")
+        with open(cache.path("hello"), "wb") as f:
+            f.write(b"not an array")
+        self.assertIsNone(cache.get("hello"))
+
+    def test_only_new_utterances_are_encoded(self):
+        first = SemanticRouterController(router_config(), model_map=MODEL_MAP)
+        self.assertEqual(sorted(FakeEncoder.calls[0]), ["fix this bug", "hello", "how are you", "write a function"])
+
+        # a restarted router loads every utterance from disk
+        FakeEncoder.calls = []
+        second = SemanticRouterController(router_config(), model_map=MODEL_MAP)
+        self.assertEqual(FakeEncoder.calls, [])
+        np.testing.assert_allclose(second.centroids, first.centroids)
+
+        # a changed route only encodes its new utterance
+        routes = router_config()["routes"]
+        routes[1]["utterances"].append("refactor")
+        SemanticRouterController(router_config(routes=routes), model_map=MODEL_MAP)
+        self.assertEqual(FakeEncoder.calls, [["refactor"]])
+
+    def test_other_model_is_encoded_again(self):
+        SemanticRouterController(router_config(), model_map=MODEL_MAP)
+        FakeEncoder.calls = []
+        config = router_config(embedding_models={"huggingface": "other-model"})
+        SemanticRouterController(config, model_map=MODEL_MAP)
+        self.assertEqual(len(FakeEncoder.calls), 1)
+        self.assertEqual(len(FakeEncoder.calls[0]), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+import asyncio
+import unittest
+
+import numpy as np
+from langchain_core.documents import Document
+
+from comps.cores.common.cache import LRUCache
+from comps.web_retrievers.src.integrations.google_search import OpeaGoogleSearch, top_k_similar
+
+
+class TestTopKSimilar(unittest.TestCase):
+    def test_most_similar_first(self):
+        embeddings = np.array([[1.0, 0.0], [0.0, 1.0], [0.7, 0.7], [-1.0, 0.0]], dtype=np.float32)
+        self.assertEqual(top_k_similar(embeddings, [1.0, 0.1], 3), [0, 2, 1])
+
+    def test_cosine_similarity(self):
+        # the norm of a row does not change its rank
+        embeddings = np.array([[10.0, 10.0], [0.1, 0.0]], dtype=np.float32)
+        self.assertEqual(top_k_similar(embeddings, [1.0, 0.0], 2), [1, 0])
+
+    def test_k_larger_than_rows(self):
+        embeddings = np.array([[0.0, 1.0], [1.0, 0.0]], dtype=np.float32)
+        self.assertEqual(top_k_similar(embeddings, [1.0, 0.0], 5), [1, 0])
+
+    def test_no_results(self):
+        self.assertEqual(top_k_similar(np.empty((0, 2), dtype=np.float32), [1.0, 0.0], 3), [])
+        self.assertEqual(top_k_similar(np.eye(2, dtype=np.float32), [1.0, 0.0], 0), [])
+
+    def test_zero_vectors(self):
+        embeddings = np.array([[0.0, 0.0], [1.0, 0.0]], dtype=np.float32)
+        self.assertEqual(top_k_similar(embeddings, [1.0, 0.0], 2), [1, 0])
+        self.assertEqual(len(top_k_similar(embeddings, [0.0, 0.0], 2)), 2)
+
+
+def make_retriever(html=None, ttl=60):
+    """A retriever whose pages hold the text of `html`, counting the fetches and waiting for `release`."""
+    # the component is built without connecting to Google or to the embedding service
+    retriever = OpeaGoogleSearch.__new__(OpeaGoogleSearch)
+    retriever.page_cache = LRUCache(8, ttl=ttl) if ttl else None
+    retriever._loading = {}
+    retriever.fetches = []
+    retriever.release = asyncio.Event()
+
+    async def retrieve_html(url):
+        retriever.fetches.append(url)
+        await retriever.release.wait()
+        return (html or {}).get(url)
+
+    async def embed_chunks(chunks):
+        return np.asarray([[float(len(chunk.page_content)), 1.0] for chunk in chunks], dtype=np.float32)
+
+    retriever.retrieve_html = retrieve_html
+    retriever.parse_html = lambda url, html: [Document(page_content=html, metadata={"source": url})]
+    retriever.embed_chunks = embed_chunks
+    return retriever
+
+
+async def wait_for_fetches(retriever, count):
+    while len(retriever.fetches) < count:
+        await asyncio.sleep(0)
+
+
+class TestLoadPage(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_loads_share_a_fetch(self):
+        retriever = make_retriever({"https://a.com": "page a"})
+        first = asyncio.create_task(retriever.load_page("https://a.com"))
+        second = asyncio.create_task(retriever.load_page("https://a.com"))
+        await wait_for_fetches(retriever, 1)
+        retriever.release.set()
+        pages = await asyncio.gather(first, second)
+
+        self.assertEqual(retriever.fetches, ["https://a.com"])
+        self.assertIs(pages[0], pages[1])
+        chunks, embeddings = pages[0]
+        self.assertEqual([chunk.page_content for chunk in chunks], ["page a"])
+        np.testing.assert_array_equal(embeddings, [[6.0, 1.0]])
+        self.assertEqual(retriever._loading, {})
+
+        # the page is served from the cache afterwards
+        self.assertIs(await retriever.load_page("https://a.com"), pages[0])
+        self.assertEqual(len(retriever.fetches), 1)
+
+    async def test_cancelled_caller_does_not_cancel_the_load(self):
+        retriever = make_retriever({"https://a.com": "page a"})
+        first = asyncio.create_task(retriever.load_page("https://a.com"))
+        second = asyncio.create_task(retriever.load_page("https://a.com"))
+        await wait_for_fetches(retriever, 1)
+        first.cancel()
+        retriever.release.set()
+
+        chunks, _ = await second
+        self.assertEqual([chunk.page_content for chunk in chunks], ["page a"])
+        self.assertTrue(first.cancelled())
+        self.assertEqual(retriever.fetches, ["https://a.com"])
+
+    async def test_failed_page_is_not_cached(self):
+        retriever = make_retriever({})
+        retriever.release.set()
+        pages = await asyncio.gather(retriever.load_page("https://down.com"), retriever.load_page("https://down.com"))
+
+        self.assertEqual(pages, [None, None])
+        self.assertEqual(retriever.fetches, ["https://down.com"])
+        # the next request tries again
+        self.assertIsNone(await retriever.load_page("https://down.com"))
+        self.assertEqual(len(retriever.fetches), 2)
+
+    async def test_without_cache(self):
+        retriever = make_retriever({"https://a.com": "page a"}, ttl=0)
+        retriever.release.set()
+        await retriever.load_page("https://a.com")
+        await retriever.load_page("https://a.com")
+        self.assertEqual(len(retriever.fetches), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()